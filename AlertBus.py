@@ -0,0 +1,212 @@
+import json
+import queue
+import threading
+import time
+import urllib.request
+from datetime import datetime
+
+from Metrics import registry
+
+
+class Alert:
+    # A plate found in the database. Only plain values, sinks may hold on to it for a while.
+    __slots__ = ('plate', 'owner', 'vehicle_type', 'source', 'timestamp')
+
+    def __init__(self, plate, owner, vehicle_type=None, source=None, timestamp=None):
+        self.plate = plate
+        self.owner = owner
+        self.vehicle_type = vehicle_type
+        self.source = source
+        self.timestamp = timestamp or datetime.now()
+
+    def to_dict(self):
+        return {
+            'plate': self.plate,
+            'owner': self.owner,
+            'vehicle_type': self.vehicle_type,
+            'source': None if self.source is None else str(self.source),
+            'time': self.timestamp.isoformat(sep=' ', timespec='seconds'),
+        }
+
+    def __repr__(self):
+        return f"Alert({self.plate!r}, {self.owner!r}, {self.vehicle_type!r}, {self.source!r})"
+
+
+class AlertBus:
+    # Hands alerts from the detector to any number of sinks without ever blocking it. Every sink is a callable
+    # taking an Alert and gets its own queue and thread, so a slow webhook or an operator who does not look at
+    # the screen delays only that sink. A sink that falls max_pending alerts behind loses the newest ones.
+    def __init__(self, max_pending=1000, metrics=None):
+        self.max_pending = max_pending
+        self._sinks = []  # _SinkWorker per sink
+        self._lock = threading.Lock()
+        self.published = 0
+
+        metrics = metrics or registry
+        self._published_total = metrics.counter('lpr_alerts_total', 'Alerts published by the detector')
+        self._metrics = metrics
+
+    def add_sink(self, sink, name=None):
+        # Start delivering to sink, returns it so it can be removed again
+        name = name or getattr(sink, 'name', None) or type(sink).__name__
+        worker = _SinkWorker(sink, name, self.max_pending,
+                             self._metrics.counter('lpr_alerts_dropped_total', 'Alerts a sink fell too far behind '
+                                                   'to take', sink=name))
+        with self._lock:
+            self._sinks.append(worker)
+        return sink
+
+    def remove_sink(self, sink, timeout=5):
+        # Stop delivering to sink after the alerts it already has
+        with self._lock:
+            workers = [w for w in self._sinks if w.sink is sink]
+            self._sinks = [w for w in self._sinks if w.sink is not sink]
+        for worker in workers:
+            worker.close(timeout)
+
+    def publish(self, plate, owner, vehicle_type=None, source=None):
+        # Queue an alert for every sink and return at once, same arguments as CarPlateDetector.on_alert
+        alert = plate if isinstance(plate, Alert) else Alert(plate, owner, vehicle_type, source)
+        self.published += 1
+        self._published_total.inc()
+        with self._lock:
+            sinks = list(self._sinks)
+        for worker in sinks:
+            worker.put(alert)
+        return alert
+
+    def flush(self, timeout=None):
+        # Block until every sink has handled the alerts published so far
+        with self._lock:
+            sinks = list(self._sinks)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        return all(worker.flush(None if deadline is None else max(0, deadline - time.monotonic()))
+                   for worker in sinks)
+
+    def dropped(self):
+        # Alerts lost per sink name
+        with self._lock:
+            return {worker.name: worker.dropped for worker in self._sinks}
+
+    def close(self, timeout=5):
+        # Deliver what is queued and stop every sink
+        with self._lock:
+            sinks, self._sinks = self._sinks, []
+        for worker in sinks:
+            worker.close(timeout)
+
+
+class _SinkWorker:
+    def __init__(self, sink, name, max_pending, dropped_total):
+        self.sink = sink
+        self.name = name
+        self.dropped = 0
+        self._dropped_total = dropped_total
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = threading.Thread(target=self._run, name=f"alerts-{name}", daemon=True)
+        self._thread.start()
+
+    def put(self, alert):
+        try:
+            self._queue.put_nowait(alert)
+        except queue.Full:
+            self.dropped += 1
+            self._dropped_total.inc()
+
+    def flush(self, timeout=None):
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def close(self, timeout=5):
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            pass  # Stuck sink, its daemon thread is left behind
+        self._thread.join(timeout)
+        close = getattr(self.sink, 'close', None)
+        if close:
+            close()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            if isinstance(item, threading.Event):
+                item.set()
+                continue
+            try:
+                self.sink(item)
+            except Exception as e:
+                print(f"Alert sink {self.name} failed: {e}")
+
+
+class LogFileSink:
+    # Appends every alert to a file as one JSON line
+    name = 'log'
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def __call__(self, alert):
+        self._file.write(json.dumps(alert.to_dict(), ensure_ascii=False) + '\n')
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class WebhookSink:
+    # POSTs every alert as JSON to url. A failed request is retried a few times, then the alert is given up.
+    name = 'webhook'
+
+    def __init__(self, url, timeout=5, retries=2, retry_delay=1.0, headers=None):
+        self.url = url
+        self.timeout = timeout
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.headers = {'Content-Type': 'application/json', **(headers or {})}
+        self.failed = 0  # Alerts given up
+
+    def __call__(self, alert):
+        body = json.dumps(alert.to_dict(), ensure_ascii=False).encode()
+        for attempt in range(self.retries + 1):
+            request = urllib.request.Request(self.url, data=body, headers=self.headers, method='POST')
+            try:
+                with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                    response.read()
+                return
+            except OSError as e:  # URLError, HTTPError and timeouts
+                if attempt == self.retries:
+                    self.failed += 1
+                    print(f"Webhook {self.url} failed for {alert.plate}: {e}")
+                    return
+                time.sleep(self.retry_delay * (attempt + 1))
+
+
+class SoundSink:
+    # Plays a sound for an alert, at most once every min_interval seconds however many plates arrive.
+    # play defaults to the terminal bell, the GUI passes QApplication.beep through a signal.
+    name = 'sound'
+
+    def __init__(self, play=None, min_interval=5.0, clock=time.monotonic):
+        self.play = play or (lambda: print('\a', end='', flush=True))
+        self.min_interval = min_interval
+        self.clock = clock
+        self._last = None
+        self.played = 0
+        self.skipped = 0
+
+    def __call__(self, alert):
+        now = self.clock()
+        if self._last is not None and now - self._last < self.min_interval:
+            self.skipped += 1
+            return
+        self._last = now
+        self.played += 1
+        self.play()
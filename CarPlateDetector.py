@@ -1,129 +1,352 @@
+import threading
 import time
-from PyQt5.QtWidgets import QInputDialog, QLineEdit, QMessageBox
-from ultralytics import YOLO
+import weakref
+import numpy as np
+from InferenceBackend import load_model
 from PlateCharacterDetector import PlateCharacterDetector
 from VehicleTypeDetector import VehicleTypeDetector
 from DatabaseManager import DatabaseManager
+from DedupStore import DedupStore
+from Metrics import registry
+from PlateTracker import PlateTracker
+
+
+class Plate:
+    # One reported plate. Only plain values, so results do not keep the frame alive
+    __slots__ = ('bbox', 'confidence', 'text', 'owner', 'vehicle', 'agreed')
+
+    def __init__(self, bbox, confidence, text, owner, vehicle, agreed=True):
+        self.bbox = bbox  # (x1, y1, x2, y2) in image coordinates
+        self.confidence = confidence
+        self.text = text
+        self.owner = owner
+        self.vehicle = vehicle
+        self.agreed = agreed  # False for a tracked plate whose OCR reads never reached the agreement
+
+    def __repr__(self):
+        return f"Plate({self.text!r}, {self.bbox}, {self.confidence:.2f}, {self.owner!r}, {self.vehicle!r})"
+
+
+# Live detectors per registry. Their owner cache and duplicate gauges are registered once per registry and add
+# up the detectors still alive, so a replaced detector is neither reported nor kept alive by its gauges.
+_reported = weakref.WeakKeyDictionary()
+_reported_lock = threading.Lock()
+
+
+def _report_gauges(metrics, detector):
+    with _reported_lock:
+        detectors = _reported.get(metrics)
+        if detectors is not None:
+            detectors.add(detector)
+            return
+        detectors = _reported[metrics] = weakref.WeakSet([detector])
+
+    def caches():
+        # Owner cache stats of every database in use, one that several detectors share counted once
+        return [db.owner_cache.stats() for db in {id(d.db): d.db for d in list(detectors)}.values()]
+
+    def stores():
+        return {id(d.dedup): d.dedup for d in list(detectors)}.values()
+
+    def hit_ratio():
+        stats = caches()
+        hits = sum(s['hits'] for s in stats)
+        lookups = hits + sum(s['misses'] for s in stats)
+        return hits / lookups if lookups else 0.0
+
+    # Sums over the detectors still alive, so they drop when one is collected and are exported as gauges,
+    # a counter that goes down would read as a reset to rate()
+    metrics.gauge('lpr_owner_cache_hits', 'Owner lookups answered from the cache by the live detectors',
+                  lambda: sum(s['hits'] for s in caches()))
+    metrics.gauge('lpr_owner_cache_misses', 'Owner lookups that went to the database for the live detectors',
+                  lambda: sum(s['misses'] for s in caches()))
+    metrics.gauge('lpr_owner_cache_hit_ratio', 'Share of owner lookups answered from the cache', hit_ratio)
+    metrics.gauge('lpr_owner_cache_entries', 'Plates held in the owner cache',
+                  lambda: sum(s['size'] for s in caches()))
+    metrics.gauge('lpr_duplicates', 'Plates the live detectors suppressed because they were reported within the '
+                  'cooldown', lambda: sum(store.suppressed for store in stores()))
+    metrics.gauge('lpr_dedup_entries', 'Plates remembered for duplicate suppression',
+                  lambda: sum(len(store) for store in stores()))
 
 
 class CarPlateDetector:
     def __init__(self, plate_model_path, char_model_path=None, vehicle_model_path=None, conf_threshold=0.75,
-                 cooldown=10):
-        # Load the YOLOv8
-        self.plate_model = YOLO(plate_model_path)
+                 cooldown=10, vehicle_roi_scale=None, db=None, event_log=None, plate_imgsz=None, char_imgsz=640,
+                 vehicle_imgsz=None, reuse=None, progress=None, metrics=None, dedup=None):
+        # Load the YOLOv8, from a .pt file or an exported ONNX/OpenVINO model.
+        # The *_imgsz arguments set the inference resolution per model, None keeps the trained/exported size.
+        # Models of reuse (a previous detector) loaded from the same path and size are taken over instead of
+        # being loaded again. progress is called with a message before each model is loaded.
+        # dedup is a DedupStore to share with other detectors, by default each one has its own.
+        self.model_config = {
+            'plate_model': (plate_model_path, plate_imgsz),
+            'char_detector': (char_model_path, char_imgsz),
+            'vehicle_detector': (vehicle_model_path, vehicle_imgsz),
+        }
+        self.plate_model = self._model('plate_model', reuse, progress,
+                                       lambda: load_model(plate_model_path, imgsz=plate_imgsz))
 
         # load character recognition model
-        self.char_detector = PlateCharacterDetector(char_model_path) if char_model_path else None
+        self.char_detector = self._model('char_detector', reuse, progress,
+                                         lambda: PlateCharacterDetector(char_model_path, imgsz=char_imgsz))
 
         # load vehicle type detection model
-        self.vehicle_detector = VehicleTypeDetector(vehicle_model_path) if vehicle_model_path else None
+        self.vehicle_detector = self._model('vehicle_detector', reuse, progress,
+                                            lambda: VehicleTypeDetector(vehicle_model_path, imgsz=vehicle_imgsz))
+
+        # Database manager for storing-retrieving plate info, shared with the GUI when given
+        self.db = db if db is not None else DatabaseManager()
 
-        # Initialize database manager for storing-retrieving plate info
-        self.db = DatabaseManager()
+        # Optional DetectionLogWriter that records every sighting in the Detections table
+        self.event_log = event_log
 
         self.conf_threshold = conf_threshold  # Minimum confidence
-        self.cooldown = cooldown  # Time limit to avoid duplicate entries
-        self.last_detected = {}  # Dictionary to track recently detected plates
-        self.parent_window = None  # Will be set by MainWindow for GUI dialog use
-
-    def set_parent_window(self, window):
-        #Set the parent GUI window for showing input dialogs and warnings.
-        self.parent_window = window
-
-    def _should_save_plate(self, plate_text):
-        #Prevent saving duplicate plates within a cooldown period.
-        now = time.time()
-        if plate_text in self.last_detected and now - self.last_detected[plate_text] < self.cooldown:
-            return False
-        self.last_detected[plate_text] = now
-        return True
-
-    def detect_plate(self, image):
-        plates = []  # List to store detected plates and their info
-        try:
-            # 1: Detect license plates using YOLO with the confidence threshold
-            plate_results = self.plate_model(image, conf=self.conf_threshold)
 
-            # 2: Detect vehicles in the whole image if vehicle detector is available
-            vehicle_info = []
+        # Plates reported within the cooldown, a plate that stays in view is reported once
+        self.dedup = dedup if dedup is not None else DedupStore(ttl=cooldown)
+
+        # Plate trackers per source, they let OCR skip plates whose text is already known
+        self.trackers = {}
+        self.ocr_crops = 0  # Plate crops sent to character recognition so far
+
+        # When set, vehicles are detected only in a region this many plate widths wide around each new plate
+        # instead of the whole image
+        self.vehicle_roi_scale = vehicle_roi_scale
+        self._lock = threading.Lock()  # Models are shared between the GUI and worker threads
+
+        # Stage latencies and counters, recorded into the process-wide registry unless another is given
+        metrics = metrics or registry
+        self._timers = {stage: metrics.stage(stage) for stage in
+                        ('detection', 'plate_detection', 'tracking', 'ocr', 'db_lookup', 'vehicle_detection')}
+        self._plates_total = metrics.counter('lpr_plates_total', 'Plates reported after OCR and duplicate checks')
+        self._ocr_total = metrics.counter('lpr_ocr_crops_total', 'Plate crops sent to character recognition')
+        self._errors_total = metrics.counter('lpr_detection_errors_total', 'Detection calls that failed')
+        _report_gauges(metrics, self)
+
+        # Optional callbacks so the detector can run without a GUI
+        # Called with (plate, owner, vehicle_type, source) for plates found in the database, on the detection
+        # thread with the models locked, so it must return quickly (AlertBus.publish does)
+        self.on_alert = None
+        self.on_error = None  # Called with the error message when detection fails
+
+    def _model(self, name, reuse, progress, load):
+        path = self.model_config[name][0]
+        if not path:
+            return None  # Optional model turned off
+        if reuse is not None and reuse.model_config.get(name) == self.model_config[name]:
+            return getattr(reuse, name)
+        if progress:
+            progress(f"Loading {path}")
+        return load()
+
+    def warm_up(self, shape=(480, 640)):
+        # One inference per model on a blank image, so lazy initialization (weights, thread pools, kernel
+        # selection) is done before the first real frame instead of delaying it
+        blank = np.zeros((*shape, 3), dtype=np.uint8)
+        with self._lock:
+            self.plate_model([blank], conf=self.conf_threshold)
+            if self.char_detector:
+                self.char_detector.detect_characters_batch([blank[:64, :256]])
             if self.vehicle_detector:
-                vehicle_info = self.vehicle_detector.detect_vehicle(image)
-
-            # 3: Process each detection result
-            for result in plate_results:
-                for box in result.boxes:
-                    x1, y1, x2, y2 = map(int, box.xyxy[0])  # Bounding box for plate
-                    conf = float(box.conf[0])  # Confidence of the detection
-
-                    # Crop the license plate from the image
-                    plate_roi = image[y1:y2, x1:x2]
-
-                    # 4: Perform character recognition
-                    text = ""
-                    if self.char_detector:
-                        text = self.char_detector.detect_characters(plate_roi)
-                        if not text:
-                            continue  # Skip if no characters detected
-
-                    # Check for duplicate detection and decide whether to save
-                    if text and self._should_save_plate(text):
-                        # 5: Match the detected plate to a vehicle type
-                        vehicle_type = self._match_vehicle_type((x1, y1, x2, y2), vehicle_info)
-
-                        # 6: Get owner info from database
-                        owner, vehicle_type_db = self.db.get_owner(text)
-
-                        # If vehicle type from DB is available, use it
-                        if vehicle_type_db:
-                            vehicle_type = vehicle_type_db
-
-                        # Create plate info dictionary
-                        plate_info = {
-                            'bbox': (x1, y1, x2, y2),
-                            'confidence': conf,
-                            'text': text,
-                            'roi': plate_roi,
-                            'owner': owner or "Not in database",
-                            'vehicle': vehicle_type or "Unknown"
-                        }
-
-                        plates.append(plate_info)
-
-                        # Show alert if plate is found in database
-                        if owner is not None and self.parent_window:
-                            alert_msg = f"Vehicle found!\n\nPlate: {text}\nOwner: {owner}\nVehicle Type: {vehicle_type}"
-                            QMessageBox.information(self.parent_window, "Vehicle Detected", alert_msg)
+                self.vehicle_detector.detect_vehicle(blank)
+
+    @property
+    def cooldown(self):
+        # Time limit to avoid duplicate entries
+        return self.dedup.ttl
+
+    @cooldown.setter
+    def cooldown(self, seconds):
+        self.dedup.ttl = seconds
+
+    def detect_plate(self, image, source=None, track=True, region=None):
+        # track=False treats the image on its own, e.g. a still photo that is not part of a stream.
+        # region (x1, y1, x2, y2) limits the plate search to that part of the image, e.g. where motion was seen
+        return self.detect_plates([image], [source], track, [region])[0]
+
+    def detect_plates(self, images, sources=None, track=True, regions=None):
+        # Detect plates in several images (e.g. the newest frame of every camera) with batched inference,
+        # returns one list of plates per image
+        if sources is None:
+            sources = [None] * len(images)
+        if regions is None:
+            regions = [None] * len(images)
+        with self._lock:
+            return self._detect_plates(images, sources, track, regions)
+
+    def reset_tracking(self, source=None):
+        # Forget the tracks of one source, or of all sources
+        if source is None:
+            self.trackers.clear()
+        else:
+            self.trackers.pop(source, None)
+
+    def _detect_plates(self, images, sources, track=True, regions=None):
+        plates = [[] for _ in images]  # Detected plates and their info per image
+        regions = regions or [None] * len(images)
+        timers = self._timers
+        started = time.perf_counter()
+        try:
+            # 1: Detect license plates in all images (or their regions) in one pass using YOLO with the
+            # confidence threshold
+            inputs = [image if region is None else image[region[1]:region[3], region[0]:region[2]]
+                      for image, region in zip(images, regions)]
+            plate_results = self.plate_model(inputs, conf=self.conf_threshold)
+
+            # 2: Collect every detected plate box in image coordinates as (image index, bbox, conf, roi)
+            detections = self._plate_boxes(images, plate_results, regions)
+            now = time.perf_counter()
+            timers['plate_detection'].observe(now - started)
+
+            # 3: Follow the plates across frames, every source has its own tracker
+            tracks = [None] * len(detections)
+            trackers = [None] * len(images)
+            expired = []  # (image index, track) of tracks that left view with a settled text
+            step = now
+            if track and self.char_detector:
+                for i, source in enumerate(sources):
+                    indices = [d for d, detection in enumerate(detections) if detection[0] == i]
+                    tracker = trackers[i] = self.trackers.setdefault(source, PlateTracker())
+                    matched = tracker.update([detections[d][1:3] for d in indices])
+                    for d, plate_track in zip(indices, matched):
+                        tracks[d] = plate_track
+                    expired.extend((i, plate_track) for plate_track in tracker.expired)
+                now = time.perf_counter()
+                timers['tracking'].observe(now - step)
+
+            # 4: Perform character recognition in one batch on the plates whose tracks have not committed a text.
+            # Tracked plates are reported once, on the frame their reads reach consensus or are settled without it.
+            texts = [""] * len(detections)
+            step = now
+            if self.char_detector and detections:
+                ocr_indices = [d for d, plate_track in enumerate(tracks)
+                               if plate_track is None or trackers[detections[d][0]].needs_ocr(plate_track)]
+                reads = self.char_detector.detect_characters_batch([detections[d][3] for d in ocr_indices],
+                                                                   with_confidence=True)
+                self.ocr_crops += len(ocr_indices)
+                self._ocr_total.inc(len(ocr_indices))
+
+                for d, characters in zip(ocr_indices, reads):
+                    plate_track = tracks[d]
+                    if plate_track is None:
+                        texts[d] = ''.join(c for c, _ in characters)
+                    elif trackers[detections[d][0]].add_reading(plate_track, characters):
+                        texts[d] = plate_track.text
+                now = time.perf_counter()
+                timers['ocr'].observe(now - step)
+
+            # 5: Keep the plates that pass the duplicate check and get owner info from database
+            candidates = [[] for _ in images]
+            step = now
+            found = [(i, bbox, conf, text, tracks[d] is None or tracks[d].agreed, False)
+                     for d, ((i, bbox, conf, _), text) in enumerate(zip(detections, texts))]
+            # A plate that left view is reported at its last predicted box, its vehicle is no longer in the image
+            found += [(i, plate_track.bbox, plate_track.conf, plate_track.text, False, True)
+                      for i, plate_track in expired]
+            for i, bbox, conf, text, agreed, gone in found:
+                if self.char_detector and not text:
+                    continue  # Skip if no characters detected
+
+                # Check for duplicate detection and decide whether to save
+                if text and self.dedup.admit(text):
+                    owner, vehicle_type_db = self.db.get_owner(text)
+                    candidates[i].append((bbox, conf, text, owner, vehicle_type_db, agreed, gone))
+                elif text and self.event_log:
+                    # A duplicate is not reported but still a sighting, recorded without looking up its vehicle
+                    self.event_log.log(text, conf, bbox, None, sources[i])
+            if any(candidates):
+                timers['db_lookup'].observe(time.perf_counter() - step)
+
+            for i, image in enumerate(images):
+                # 6: Detect vehicles only when a new plate still needs its vehicle type
+                vehicle_info = []
+                unknown_types = [c[0] for c in candidates[i] if not c[4] and not c[6]]
+                if self.vehicle_detector and unknown_types:
+                    step = time.perf_counter()
+                    if self.vehicle_roi_scale:
+                        vehicle_regions = [self._vehicle_region(bbox, image.shape) for bbox in unknown_types]
+                        vehicle_info = self.vehicle_detector.detect_vehicle_regions(image, vehicle_regions)
+                    else:
+                        vehicle_info = self.vehicle_detector.detect_vehicle(image)
+                    timers['vehicle_detection'].observe(time.perf_counter() - step)
+
+                # 7: Match the detected plates to vehicle types, vehicle type from DB wins if available
+                vehicle_types = iter(self._match_vehicle_types([c[0] for c in candidates[i] if not c[6]], vehicle_info))
+
+                for bbox, conf, text, owner, vehicle_type_db, agreed, gone in candidates[i]:
+                    matched_type = None if gone else next(vehicle_types)
+                    vehicle_type = vehicle_type_db or matched_type
+                    plate = Plate(bbox, conf, text, owner or "Not in database", vehicle_type or "Unknown", agreed)
+                    plates[i].append(plate)
+                    self._plates_total.inc()
+
+                    if self.event_log:
+                        self.event_log.log(text, conf, bbox, plate.vehicle, sources[i])
+
+                    # Raise alert if plate is found in database
+                    if owner is not None and self.on_alert:
+                        self.on_alert(text, owner, vehicle_type, sources[i])
 
         except Exception as e:
             print(f"Detection error: {e}")
-            if self.parent_window:
-                QMessageBox.warning(self.parent_window, "Detection Error", f"An error occurred: {str(e)}")
+            self._errors_total.inc()
+            if self.on_error:
+                self.on_error(str(e))
 
+        timers['detection'].observe(time.perf_counter() - started)
         return plates
 
-    def _match_vehicle_type(self, plate_bbox, vehicle_info):
+    @staticmethod
+    def _plate_boxes(images, results, regions):
+        # (image index, bbox, conf, roi) of every plate box. The boxes of a result are converted to Python values
+        # in one go, not box by box, and shifted by the origin of the region the result was detected in.
+        detections = []
+        for i, (image, result) in enumerate(zip(images, results)):
+            boxes = result.boxes
+            if not len(boxes):
+                continue
+            xyxy = boxes.xyxy.astype(int)  # Bounding boxes for plates
+            if regions[i] is not None:
+                offset_x, offset_y = regions[i][:2]
+                xyxy += (offset_x, offset_y, offset_x, offset_y)
 
-        if not vehicle_info:
-            return "Unknown"
+            for (x1, y1, x2, y2), conf in zip(xyxy.tolist(), boxes.conf.tolist()):
+                # Crop the license plate from the image
+                detections.append((i, (x1, y1, x2, y2), conf, image[y1:y2, x1:x2]))
+        return detections
 
+    def _vehicle_region(self, plate_bbox, image_shape):
+        # Expanded region around a plate that should contain its vehicle, the plate sits near the bottom
         px1, py1, px2, py2 = plate_bbox
-        plate_center = ((px1 + px2) // 2, (py1 + py2) // 2)  # Center point of the plate
+        img_h, img_w = image_shape[:2]
 
-        best_match = None
-        best_area = 0
+        width = (px2 - px1) * self.vehicle_roi_scale
+        height = width * 0.9
+        center_x = (px1 + px2) / 2
+        bottom = py2 + (py2 - py1) * 2
 
-        for vehicle in vehicle_info:
-            vx1, vy1, vx2, vy2 = vehicle['bbox']
+        x1 = max(0, int(center_x - width / 2))
+        x2 = min(img_w, int(center_x + width / 2))
+        y1 = max(0, int(bottom - height))
+        y2 = min(img_h, int(bottom))
+        return x1, y1, x2, y2
 
-            # Check if plate center lies within vehicle bounding box
-            if (vx1 <= plate_center[0] <= vx2 and
-                    vy1 <= plate_center[1] <= vy2):
+    @staticmethod
+    def _match_vehicle_types(plate_bboxes, vehicle_info):
+        # Vehicle type of every plate: the largest vehicle whose box contains the plate center.
+        # All plates are checked against all vehicles at once.
+        if not vehicle_info or not plate_bboxes:
+            return ["Unknown"] * len(plate_bboxes)
 
-                # Calculate area to choose the largest matching vehicle
-                area = (vx2 - vx1) * (vy2 - vy1)
+        plate_boxes = np.asarray(plate_bboxes, dtype=np.int64)
+        center_x = (plate_boxes[:, 0] + plate_boxes[:, 2]) // 2  # Center point of the plates
+        center_y = (plate_boxes[:, 1] + plate_boxes[:, 3]) // 2
+        vx1, vy1, vx2, vy2 = np.asarray([vehicle.bbox for vehicle in vehicle_info], dtype=np.int64).T
 
-                if area > best_area:
-                    best_area = area
-                    best_match = vehicle['label']
+        # (plates, vehicles) containment of each plate center, scored by vehicle area
+        inside = ((vx1 <= center_x[:, None]) & (center_x[:, None] <= vx2) &
+                  (vy1 <= center_y[:, None]) & (center_y[:, None] <= vy2))
+        areas = np.where(inside, (vx2 - vx1) * (vy2 - vy1), 0)
 
-        return best_match if best_match else "Unknown"
+        best = areas.argmax(axis=1)  # First of equally large vehicles wins
+        return [vehicle_info[v].label if areas[p, v] > 0 else "Unknown" for p, v in enumerate(best.tolist())]
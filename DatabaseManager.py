@@ -1,73 +1,709 @@
+import csv
+import queue
 import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
 from datetime import datetime
 
+# Characters OCR tends to confuse, each group maps to one canonical character for fuzzy plate search
+OCR_CONFUSIONS = {'O': '0', 'Q': '0', 'I': '1', 'Z': '2', 'S': '5', 'G': '6', 'B': '8'}
+
+# Separators written between the groups of a plate ("34 ABC 123", "B-AB-1234"), not part of its key.
+# SQLite has no character classes, so the key strips exactly these instead of everything but letters and digits.
+PLATE_SEPARATORS = (' ', '-', '.', '_', '/')
+
+
+def plate_key(text):
+    # Canonical form of a plate, equal for readings that only differ in separators or commonly confused
+    # characters. Must match _plate_key_sql, stored plates are found through an index on that expression.
+    text = text.upper()
+    for separator in PLATE_SEPARATORS:
+        text = text.replace(separator, '')
+    return ''.join(OCR_CONFUSIONS.get(c, c) for c in text)
+
+
+def _plate_key_sql(column):
+    # SQL expression computing plate_key() of a column, indexed so fuzzy prefix search does not scan the table
+    expression = f"UPPER({column})"
+    for separator in PLATE_SEPARATORS:
+        expression = f"REPLACE({expression}, '{separator}', '')"
+    for confused, canonical in OCR_CONFUSIONS.items():
+        expression = f"REPLACE({expression}, '{confused}', '{canonical}')"
+    return expression
+
+
+PLATE_KEY = _plate_key_sql("plate")
+
+# Statements are kept as constants so sqlite3's per-connection statement cache prepares each of them only once
+SELECT_OWNER = "SELECT owner, vehicle_type FROM Plates WHERE plate = ?"
+UPSERT_PLATE = """
+    INSERT INTO Plates (plate, owner, vehicle_type, date_time)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT(plate) DO UPDATE SET
+        owner = excluded.owner,
+        vehicle_type = excluded.vehicle_type,
+        date_time = excluded.date_time
+"""
+SELECT_PLATES = "SELECT id, plate, owner, vehicle_type, date_time FROM Plates ORDER BY id DESC"
+
+# Triggers keeping the full-text index in sync with single-row writes
+SEARCH_TRIGGERS = {
+    'plates_search_insert': """
+        CREATE TRIGGER IF NOT EXISTS plates_search_insert AFTER INSERT ON Plates BEGIN
+            INSERT INTO PlatesSearch (rowid, plate, owner, vehicle_type, date_time)
+            VALUES (new.id, new.plate, new.owner, new.vehicle_type, new.date_time);
+        END
+    """,
+    'plates_search_delete': """
+        CREATE TRIGGER IF NOT EXISTS plates_search_delete AFTER DELETE ON Plates BEGIN
+            INSERT INTO PlatesSearch (PlatesSearch, rowid, plate, owner, vehicle_type, date_time)
+            VALUES ('delete', old.id, old.plate, old.owner, old.vehicle_type, old.date_time);
+        END
+    """,
+    'plates_search_update': """
+        CREATE TRIGGER IF NOT EXISTS plates_search_update AFTER UPDATE ON Plates BEGIN
+            INSERT INTO PlatesSearch (PlatesSearch, rowid, plate, owner, vehicle_type, date_time)
+            VALUES ('delete', old.id, old.plate, old.owner, old.vehicle_type, old.date_time);
+            INSERT INTO PlatesSearch (rowid, plate, owner, vehicle_type, date_time)
+            VALUES (new.id, new.plate, new.owner, new.vehicle_type, new.date_time);
+        END
+    """,
+}
+
+# Bulk import with a full-text index: rows are staged in a temp table and written with set-based statements
+# while the triggers are dropped. Row by row, FTS5 flushes its pending index data for every statement, which
+# made large imports several times slower.
+CREATE_BULK_STAGE = """
+    CREATE TEMP TABLE IF NOT EXISTS BulkPlates (plate TEXT, owner TEXT, vehicle_type TEXT, date_time TEXT)
+"""
+CLEAR_BULK_STAGE = "DELETE FROM temp.BulkPlates"
+INSERT_BULK_STAGE = "INSERT INTO temp.BulkPlates (plate, owner, vehicle_type, date_time) VALUES (?, ?, ?, ?)"
+DROP_BULK_STAGE = "DROP TABLE temp.BulkPlates"
+SELECT_LAST_PLATE_ID = "SELECT COALESCE(MAX(id), 0) FROM Plates"
+UPSERT_BULK_STAGE = """
+    INSERT INTO Plates (plate, owner, vehicle_type, date_time)
+    SELECT plate, owner, vehicle_type, date_time FROM temp.BulkPlates WHERE true ORDER BY rowid
+    ON CONFLICT(plate) DO UPDATE SET
+        owner = excluded.owner,
+        vehicle_type = excluded.vehicle_type,
+        date_time = excluded.date_time
+"""
+# Existing rows the import updates, taken out of the index before and indexed again after it
+UNINDEX_BULK_STAGE = """
+    INSERT INTO PlatesSearch (PlatesSearch, rowid, plate, owner, vehicle_type, date_time)
+    SELECT 'delete', id, plate, owner, vehicle_type, date_time FROM Plates
+    WHERE plate IN (SELECT plate FROM temp.BulkPlates) ORDER BY id
+"""
+INDEX_BULK_UPDATED = """
+    INSERT INTO PlatesSearch (rowid, plate, owner, vehicle_type, date_time)
+    SELECT id, plate, owner, vehicle_type, date_time FROM Plates
+    WHERE id <= ? AND plate IN (SELECT plate FROM temp.BulkPlates) ORDER BY id
+"""
+# Rows the import added, the rowid range after the previous last id
+INDEX_BULK_ADDED = """
+    INSERT INTO PlatesSearch (rowid, plate, owner, vehicle_type, date_time)
+    SELECT id, plate, owner, vehicle_type, date_time FROM Plates WHERE id > ? ORDER BY id
+"""
+# Full-text search over every column (trigram index, substring matching) plus fuzzy plate prefix search
+SEARCH_PLATES = f"""
+    SELECT id, plate, owner, vehicle_type, date_time FROM Plates
+    WHERE id IN (
+        SELECT * FROM (
+            SELECT rowid FROM PlatesSearch WHERE PlatesSearch MATCH ? ORDER BY rowid DESC LIMIT ?
+        )
+        UNION
+        SELECT * FROM (
+            SELECT id FROM Plates WHERE {PLATE_KEY} >= ? AND {PLATE_KEY} < ? ORDER BY id DESC LIMIT ?
+        )
+    )
+    ORDER BY id DESC
+    LIMIT ?
+"""
+# Used for terms shorter than a trigram or when SQLite has no trigram tokenizer
+SEARCH_PLATES_LIKE = f"""
+    SELECT id, plate, owner, vehicle_type, date_time FROM Plates
+    WHERE plate LIKE ? OR owner LIKE ? OR vehicle_type LIKE ? OR date_time LIKE ?
+        OR ({PLATE_KEY} >= ? AND {PLATE_KEY} < ?)
+    ORDER BY id DESC
+    LIMIT ?
+"""
+# Filters used by the paginated Database page, same matching rules as search_plates
+SEARCH_FILTER = f"""
+    id IN (
+        SELECT rowid FROM PlatesSearch WHERE PlatesSearch MATCH ?
+        UNION
+        SELECT id FROM Plates WHERE {PLATE_KEY} >= ? AND {PLATE_KEY} < ?
+    )
+"""
+SEARCH_FILTER_LIKE = f"""
+    (plate LIKE ? OR owner LIKE ? OR vehicle_type LIKE ? OR date_time LIKE ?
+        OR ({PLATE_KEY} >= ? AND {PLATE_KEY} < ?))
+"""
+SELECT_PLATE_BY_ID = "SELECT plate FROM Plates WHERE id = ?"
+SELECT_NEWEST_OWNERS = "SELECT plate, owner, vehicle_type FROM Plates ORDER BY id DESC LIMIT ?"
+COUNT_ALL_PLATES = "SELECT COUNT(*) FROM Plates"
+DELETE_PLATE = "DELETE FROM Plates WHERE id = ?"
+INSERT_DETECTION = """
+    INSERT INTO Detections (plate, date_time, confidence, x1, y1, x2, y2, vehicle_type, source)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+SELECT_DETECTIONS = """
+    SELECT id, plate, date_time, confidence, x1, y1, x2, y2, vehicle_type, source FROM Detections
+    WHERE plate = ?
+    ORDER BY date_time DESC
+"""
+
+
+class OwnerCache:
+    # Thread-safe LRU cache of plate -> (owner, vehicle_type). Plates with a row in the table are known, even
+    # with a NULL owner, plates without one are cached as (None, None) for a short time. Once it holds the whole
+    # Plates table it is complete: plates it does not hold are unknown, so lookups never go to the database.
+    # Evicting or expiring a known plate ends that.
+    def __init__(self, maxsize=200000, ttl=None, negative_ttl=30, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl  # Seconds a plate of the table stays cached, None keeps it until evicted
+        self.negative_ttl = negative_ttl  # Seconds a plate missing from the table stays cached
+        self.clock = clock
+
+        self._entries = OrderedDict()  # plate -> (owner, vehicle_type, expires_at, known)
+        self._lock = threading.Lock()
+        self.complete = False
+        self.generation = 0  # Bumped by every write, lookups started before a write do not fill the cache
+        self.evicted = 0  # Known plates dropped for lack of room
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, plate):
+        # Cached (owner, vehicle_type) or None on a miss
+        with self._lock:
+            entry = self._entries.get(plate)
+            if entry is not None and (entry[2] is None or entry[2] > self.clock()):
+                self._entries.move_to_end(plate)
+                self.hits += 1
+                return entry[0], entry[1]
+
+            if entry is not None:
+                del self._entries[plate]  # Expired
+                if entry[3]:
+                    self.complete = False
+            if self.complete:
+                self.hits += 1
+                return None, None
+            self.misses += 1
+            return None
+
+    def put(self, plate, owner, vehicle_type):
+        # Write-through of a plate just written to the database
+        with self._lock:
+            self.generation += 1
+            self._store(plate, owner, vehicle_type, True)
+
+    def put_many(self, plates):
+        # Write-through of (plate, owner, vehicle_type) rows just written to the database
+        with self._lock:
+            self.generation += 1
+            for plate, owner, vehicle_type in plates:
+                self._store(plate, owner, vehicle_type, True)
+
+    def fill(self, plate, row, generation):
+        # Cache the (owner, vehicle_type) row read from the database, None when the plate has none, unless a
+        # write happened since the lookup began
+        with self._lock:
+            if generation == self.generation:
+                self._store(plate, *(row or (None, None)), row is not None)
+
+    def _store(self, plate, owner, vehicle_type, known):
+        ttl = self.ttl if known else self.negative_ttl
+        expires_at = self.clock() + ttl if ttl is not None else None
+
+        self._entries[plate] = (owner, vehicle_type, expires_at, known)
+        self._entries.move_to_end(plate)
+        while len(self._entries) > self.maxsize:
+            _, evicted = self._entries.popitem(last=False)  # Least recently used
+            if evicted[3]:
+                self.evicted += 1
+                self.complete = False
+
+    def load(self, chunks, total):
+        # Fill the cache with the Plates table, given as chunks of (plate, owner, vehicle_type) rows out of total
+        # rows. It becomes complete if every row fit and none of them expires.
+        evicted = self.evicted
+        loaded = 0
+        for chunk in chunks:
+            self.put_many(chunk)
+            loaded += len(chunk)
+        with self._lock:
+            self.complete = loaded == total and self.ttl is None and self.evicted == evicted
+        return loaded
+
+    def invalidate(self, plate=None):
+        # Drop one plate, or everything when no plate is given
+        with self._lock:
+            self.generation += 1
+            if plate is None:
+                self._entries.clear()
+                self.complete = False
+            else:
+                self._entries.pop(plate, None)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._entries),
+                'complete': self.complete,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
 
 class DatabaseManager:
-    def __init__(self, db_name="LPR.db"):
+    PLATE_COLUMNS = ("id", "plate", "owner", "vehicle_type", "date_time")
+
+    def __init__(self, db_name="LPR.db", pool_size=4, owner_cache_size=200000):
         self.db_name = db_name
+
+        # get_owner results, kept up to date by every write that goes through this manager
+        self.owner_cache = OwnerCache(maxsize=owner_cache_size)
+
+        # Pool of long-lived connections shared by the GUI and the detection threads
+        self._pool = queue.LifoQueue()
+        self._pool_size = pool_size
+        self._pool_lock = threading.Lock()
+        self._opened = 0  # Connections created so far, never more than pool_size
+        self._closed = False
+
+        # SQLite allows one writer at a time, in WAL mode readers are not blocked by it. Reentrant so writes can
+        # update the owner cache after their transaction and before the next writer.
+        self._write_lock = threading.RLock()
+
         self._create_table()
 
     def _connect(self):
-        return sqlite3.connect(self.db_name)
+        conn = sqlite3.connect(self.db_name, timeout=10, check_same_thread=False, cached_statements=256)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")  # Safe with WAL, avoids an fsync per commit
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA cache_size=-16000")  # 16 MB page cache per connection
+        conn.execute("PRAGMA mmap_size=268435456")
+        conn.execute("PRAGMA busy_timeout=10000")
+        return conn
+
+    @contextmanager
+    def _connection(self):
+        # Borrow a connection from the pool, waits when all of them are in use
+        if self._closed:
+            raise sqlite3.ProgrammingError("Cannot operate on a closed database.")
+
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            with self._pool_lock:
+                can_open = self._opened < self._pool_size
+                if can_open:
+                    self._opened += 1
+            if can_open:
+                try:
+                    conn = self._connect()
+                except sqlite3.Error:
+                    with self._pool_lock:
+                        self._opened -= 1
+                    raise
+            else:
+                conn = self._pool.get()
+
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            if self._closed:
+                self._discard(conn)
+            else:
+                self._pool.put(conn)
+
+    @contextmanager
+    def _transaction(self):
+        # Cursor inside a write transaction that is committed on success and rolled back on error
+        with self._write_lock, self._connection() as conn:
+            try:
+                yield conn.cursor()
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+    def close(self):
+        # Close every pooled connection, connections still in use are closed when they are returned
+        self._closed = True
+        while True:
+            try:
+                self._discard(self._pool.get_nowait())
+            except queue.Empty:
+                break
+
+    def _discard(self, conn):
+        conn.close()
+        with self._pool_lock:
+            self._opened -= 1
 
     def _create_table(self):
         # Create table if not exists
-        conn = self._connect()
-        cursor = conn.cursor()
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS Plates (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                plate TEXT UNIQUE,
-                owner TEXT,
-                vehicle_type TEXT,
-                date_time TEXT
-            )
-        """)
-        conn.commit()
-        conn.close()
+        with self._transaction() as cursor:
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS Plates (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    plate TEXT UNIQUE,
+                    owner TEXT,
+                    vehicle_type TEXT,
+                    date_time TEXT
+                )
+            """)
 
-    def insert_plate(self, plate_text, owner, vehicle_type=None):
+            # Append-only history of every sighting
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS Detections (
+                    id INTEGER PRIMARY KEY,
+                    plate TEXT NOT NULL,
+                    date_time TEXT NOT NULL,
+                    confidence REAL,
+                    x1 INTEGER,
+                    y1 INTEGER,
+                    x2 INTEGER,
+                    y2 INTEGER,
+                    vehicle_type TEXT,
+                    source TEXT
+                )
+            """)
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_detections_plate ON Detections (plate, date_time)")
+
+            # Indexes for the Database page: sorting/filtering and fuzzy plate search
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_plates_date_time ON Plates (date_time)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_plates_vehicle_type ON Plates (vehicle_type)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_plates_owner ON Plates (owner)")
+            # Renamed whenever the key expression changes, so databases of older versions rebuild it
+            cursor.execute("DROP INDEX IF EXISTS idx_plates_key")
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_plates_key2 ON Plates ({PLATE_KEY})")
+
+        self._fts = self._create_search_index()
 
+    def _create_search_index(self):
+        # FTS5 trigram index over Plates kept in sync by triggers, returns False if SQLite does not support it
         try:
-            conn = self._connect()
-            cursor = conn.cursor()
-            date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-            # Check if plate already exists
-            cursor.execute("SELECT 1 FROM Plates WHERE plate = ?", (plate_text,))
-            if cursor.fetchone():
-                # Update existing record
-                cursor.execute("""
-                    UPDATE Plates 
-                    SET owner = ?, vehicle_type = ?, date_time = ?
-                    WHERE plate = ?
-                """, (owner, vehicle_type, date, plate_text))
-            else:
-                # Insert new record
+            with self._transaction() as cursor:
+                exists = cursor.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'PlatesSearch'").fetchone()
+
                 cursor.execute("""
-                    INSERT INTO Plates (plate, owner, vehicle_type, date_time) 
-                    VALUES (?, ?, ?, ?)
-                """, (plate_text, owner, vehicle_type, date))
+                    CREATE VIRTUAL TABLE IF NOT EXISTS PlatesSearch USING fts5(
+                        plate, owner, vehicle_type, date_time,
+                        content='Plates', content_rowid='id', tokenize='trigram'
+                    )
+                """)
+                for trigger in SEARCH_TRIGGERS.values():
+                    cursor.execute(trigger)
 
-            conn.commit()
+                # Let FTS5 buffer up to 64 MB of index data per transaction (default 1 MB), bulk imports then
+                # write fewer segments that need merging. Single-row writes never come near it.
+                cursor.execute("INSERT INTO PlatesSearch (PlatesSearch, rank) VALUES ('hashsize', 67108864)")
+
+                # Index the rows of a database created before the search table existed
+                if not exists:
+                    cursor.execute("INSERT INTO PlatesSearch (PlatesSearch) VALUES ('rebuild')")
+            return True
+        except sqlite3.OperationalError as e:
+            print(f"Full-text search unavailable, falling back to LIKE: {e}")
+            return False
+
+    def insert_plate(self, plate_text, owner, vehicle_type=None):
+
+        try:
+            with self._write_lock:
+                with self._transaction() as cursor:
+                    date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+                    # Insert new record or update the existing one in a single statement
+                    cursor.execute(UPSERT_PLATE, (plate_text, owner, vehicle_type, date))
+                self.owner_cache.put(plate_text, owner, vehicle_type)
         except sqlite3.Error as e:
             print(f"Database error: {e}")
             raise
-        finally:
-            conn.close()
+
+    def insert_plates_bulk(self, plates):
+        # Insert or update many (plate, owner, vehicle_type[, date_time]) rows in one transaction,
+        # returns the number of rows written
+        date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        count = 0
+        written = None  # Rows for the owner cache when it holds the whole table
+
+        def rows():
+            nonlocal count
+            for plate in plates:
+                plate_text, owner = plate[0], plate[1]
+                vehicle_type = plate[2] if len(plate) > 2 else None
+                date_time = plate[3] if len(plate) > 3 and plate[3] else date
+                count += 1
+                if written is not None:
+                    written.append((plate_text, owner, vehicle_type))
+                yield plate_text, owner, vehicle_type, date_time
+
+        try:
+            with self._write_lock:
+                if self.owner_cache.complete:
+                    written = []
+                with self._transaction() as cursor:
+                    if self._fts:
+                        self._upsert_indexed(cursor, rows())
+                    else:
+                        cursor.executemany(UPSERT_PLATE, rows())
+
+                if written is not None:
+                    self.owner_cache.put_many(written)
+                else:
+                    # Any number of plates may have changed, cheaper to start the cache over
+                    self.owner_cache.invalidate()
+        except sqlite3.Error as e:
+            # Rolled back, the cache still matches the table
+            print(f"Database error: {e}")
+            raise
+
+        return count
+
+    @staticmethod
+    def _upsert_indexed(cursor, rows):
+        # Bulk upsert that updates the full-text index once for the whole batch instead of through the per-row
+        # triggers. Runs inside the caller's transaction, other connections never see the triggers missing.
+        cursor.execute(CREATE_BULK_STAGE)  # sqlite3 commits DDL outside a transaction, the DELETE starts it
+        cursor.execute(CLEAR_BULK_STAGE)
+        last_id = cursor.execute(SELECT_LAST_PLATE_ID).fetchone()[0]
+        cursor.executemany(INSERT_BULK_STAGE, rows)
+
+        cursor.execute(UNINDEX_BULK_STAGE)
+        for name in SEARCH_TRIGGERS:
+            cursor.execute(f"DROP TRIGGER {name}")
+        cursor.execute(UPSERT_BULK_STAGE)
+        for trigger in SEARCH_TRIGGERS.values():
+            cursor.execute(trigger)
+
+        cursor.execute(INDEX_BULK_UPDATED, (last_id,))
+        cursor.execute(INDEX_BULK_ADDED, (last_id,))
+        cursor.execute(DROP_BULK_STAGE)
+
+    def import_from_csv(self, file_path, encoding='utf-8-sig'):
+        # Counterpart of the CSV export: reads plate, owner, vehicle_type and date_time columns, id is ignored
+        with open(file_path, newline='', encoding=encoding) as f:
+            reader = csv.DictReader(f)
+            missing = {'plate', 'owner'} - set(reader.fieldnames or ())
+            if missing:
+                raise ValueError(f"CSV file is missing columns: {', '.join(sorted(missing))}")
+
+            return self.insert_plates_bulk(
+                (row['plate'], row['owner'] or None, row.get('vehicle_type') or None, row.get('date_time'))
+                for row in reader if row['plate']
+            )
 
     def get_owner(self, plate_text):
 
+        cached = self.owner_cache.get(plate_text)
+        if cached is not None:
+            return cached
+
+        generation = self.owner_cache.generation  # Taken before the read, see OwnerCache.fill
         try:
-            conn = self._connect()
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT owner, vehicle_type FROM Plates WHERE plate = ?
-            """, (plate_text,))
-            result = cursor.fetchone()
-            return result if result else (None, None)
+            with self._connection() as conn:
+                result = conn.execute(SELECT_OWNER, (plate_text,)).fetchone()
         except sqlite3.Error as e:
             print(f"Database error: {e}")
             return (None, None)
-        finally:
-            conn.close()
\ No newline at end of file
+
+        self.owner_cache.fill(plate_text, result, generation)
+        return result if result else (None, None)
+
+    def preload_owner_cache(self, chunk_size=10000):
+        # Warm the owner cache with the whole Plates table. When all of it fits, the cache is complete and
+        # lookups never touch the disk, plates it does not hold are unknown. Writes wait until it is loaded.
+        cache = self.owner_cache
+        with self._write_lock, self._connection() as conn:
+            total = conn.execute(COUNT_ALL_PLATES).fetchone()[0]
+            cursor = conn.execute(SELECT_NEWEST_OWNERS, (cache.maxsize,))
+            loaded = cache.load(iter(lambda: cursor.fetchmany(chunk_size), []), total)
+
+        if loaded < total:
+            print(f"Owner cache preload truncated: {loaded} of {total} plates fit, the rest are looked up in the "
+                  f"database. Raise owner_cache_size to hold them all.")
+        return loaded
+
+    def get_plates(self):
+        # All plate records, newest first
+        with self._connection() as conn:
+            return conn.execute(SELECT_PLATES).fetchall()
+
+    def search_plates(self, search_term, limit=None):
+        # Plate records where any column contains the search term or whose plate starts with it allowing
+        # OCR confusions such as O/0 and I/1, newest first
+        search_term = search_term.strip()
+        limit = -1 if limit is None else limit  # LIMIT -1 means no limit in SQLite
+
+        key_range = self._plate_key_range(search_term)
+
+        with self._connection() as conn:
+            if self._fts and len(search_term) >= 3:
+                phrase = self._fts_phrase(search_term)
+                return conn.execute(SEARCH_PLATES, (phrase, limit, *key_range, limit, limit)).fetchall()
+
+            pattern = f"%{search_term}%"
+            return conn.execute(SEARCH_PLATES_LIKE, (pattern, pattern, pattern, pattern, *key_range, limit)).fetchall()
+
+    @staticmethod
+    def _plate_key_range(search_term):
+        # Range of plate keys starting with the key of the search term, empty if it has no plate characters
+        key = plate_key(search_term)
+        return (key, key + '\uffff') if key else ('', '')
+
+    @staticmethod
+    def _fts_phrase(search_term):
+        # Search term as a quoted FTS5 phrase so operators and punctuation are matched literally
+        return '"' + search_term.replace('"', '""') + '"'
+
+    def _search_filter(self, search_term):
+        # WHERE clause and parameters matching the search term
+        key_range = self._plate_key_range(search_term)
+
+        if self._fts and len(search_term) >= 3:
+            return SEARCH_FILTER, [self._fts_phrase(search_term), *key_range]
+
+        pattern = f"%{search_term}%"
+        return SEARCH_FILTER_LIKE, [pattern, pattern, pattern, pattern, *key_range]
+
+    def fetch_plates_page(self, after=None, limit=200, sort_column="id", descending=True, search_term=None):
+        # One page of plate records using keyset pagination: after is the (sort value, id) of the last row of
+        # the previous page, or None for the first page. Rows with a NULL sort value come last when
+        # descending and first when ascending, like SQLite sorts them.
+        if sort_column not in self.PLATE_COLUMNS:
+            raise ValueError(f"Unknown column: {sort_column}")
+
+        base_filters, base_params = [], []
+        if search_term and search_term.strip():
+            search_filter, search_params = self._search_filter(search_term.strip())
+            base_filters.append(search_filter)
+            base_params.extend(search_params)
+
+        direction = "DESC" if descending else "ASC"
+        compare = "<" if descending else ">"
+
+        def segment(nulls, remaining, cursor):
+            # Rows of either the NULL or the non-NULL part of the sort column, continuing after cursor
+            filters, params = list(base_filters), list(base_params)
+            if sort_column == "id":
+                order = f"id {direction}"
+                if cursor:
+                    filters.append(f"id {compare} ?")
+                    params.append(cursor[1])
+            elif nulls:
+                filters.append(f"{sort_column} IS NULL")
+                order = f"id {direction}"
+                if cursor:
+                    filters.append(f"id {compare} ?")
+                    params.append(cursor[1])
+            else:
+                filters.append(f"{sort_column} IS NOT NULL")
+                order = f"{sort_column} {direction}, id {direction}"
+                if cursor:
+                    filters.append(f"({sort_column}, id) {compare} (?, ?)")
+                    params.extend(cursor)
+
+            where = f"WHERE {' AND '.join(filters)}" if filters else ""
+            query = f"SELECT id, plate, owner, vehicle_type, date_time FROM Plates {where} ORDER BY {order} LIMIT ?"
+            return conn.execute(query, (*params, remaining)).fetchall()
+
+        with self._connection() as conn:
+            if sort_column == "id":
+                return segment(False, limit, after)
+
+            # NULL and non-NULL parts in sort order, the cursor tells which one the previous page ended in
+            parts = [False, True] if descending else [True, False]
+            start = parts.index(after[0] is None) if after is not None else 0
+
+            rows = []
+            for i in range(start, len(parts)):
+                cursor = after if i == start else None
+                rows.extend(segment(parts[i], limit - len(rows), cursor))
+                if len(rows) >= limit:
+                    break
+            return rows
+
+    def fetch_plates_at(self, offset, limit=200, sort_column="id", descending=True, search_term=None):
+        # limit plate records starting at row offset, in the order of fetch_plates_page. For jumps into the
+        # table: OFFSET steps over the skipped rows, continue with fetch_plates_page from the last row.
+        if sort_column not in self.PLATE_COLUMNS:
+            raise ValueError(f"Unknown column: {sort_column}")
+
+        where, params = self._export_filter(search_term=search_term)
+        direction = "DESC" if descending else "ASC"
+        order = f"id {direction}" if sort_column == "id" else f"{sort_column} {direction}, id {direction}"
+        query = f"SELECT id, plate, owner, vehicle_type, date_time FROM Plates {where} ORDER BY {order}"
+        query += " LIMIT ? OFFSET ?"
+        with self._connection() as conn:
+            return conn.execute(query, (*params, limit, offset)).fetchall()
+
+    def _export_filter(self, start=None, end=None, vehicle_type=None, search_term=None):
+        # WHERE clause for exports: date_time in [start, end), exact vehicle type and/or search term
+        filters, params = [], []
+        if start:
+            filters.append("date_time >= ?")
+            params.append(str(start))
+        if end:
+            filters.append("date_time < ?")
+            params.append(str(end))
+        if vehicle_type:
+            filters.append("vehicle_type = ?")
+            params.append(vehicle_type)
+        if search_term and search_term.strip():
+            search_filter, search_params = self._search_filter(search_term.strip())
+            filters.append(search_filter)
+            params.extend(search_params)
+        return (f"WHERE {' AND '.join(filters)}" if filters else ""), params
+
+    def count_plates(self, start=None, end=None, vehicle_type=None, search_term=None):
+        where, params = self._export_filter(start, end, vehicle_type, search_term)
+        with self._connection() as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM Plates {where}", params).fetchone()[0]
+
+    def iter_plates(self, start=None, end=None, vehicle_type=None, search_term=None, chunk_size=10000):
+        # Plate records in id order as lists of at most chunk_size rows, read with one cursor so only one chunk
+        # is in memory at a time
+        where, params = self._export_filter(start, end, vehicle_type, search_term)
+        query = f"SELECT id, plate, owner, vehicle_type, date_time FROM Plates {where} ORDER BY id"
+        with self._connection() as conn:
+            cursor = conn.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield rows
+
+    def delete_plate(self, plate_id):
+        with self._write_lock:
+            with self._transaction() as cursor:
+                row = cursor.execute(SELECT_PLATE_BY_ID, (plate_id,)).fetchone()
+                cursor.execute(DELETE_PLATE, (plate_id,))
+
+            if row:
+                self.owner_cache.invalidate(row[0])
+
+    def insert_detections(self, detections):
+        # Append (plate, date_time, confidence, x1, y1, x2, y2, vehicle_type, source) rows in one transaction
+        with self._transaction() as cursor:
+            cursor.executemany(INSERT_DETECTION, detections)
+
+    def get_detections(self, plate_text):
+        # Sighting history of a plate, newest first
+        with self._connection() as conn:
+            return conn.execute(SELECT_DETECTIONS, (plate_text,)).fetchall()
+
+    def cache_stats(self):
+        # Hit/miss counters of the owner cache
+        return self.owner_cache.stats()
@@ -0,0 +1,128 @@
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# Shared state of several processes: the first process to claim a plate within ttl seconds wins
+CREATE_DEDUP = "CREATE TABLE IF NOT EXISTS Dedup (key TEXT PRIMARY KEY, seen REAL NOT NULL) WITHOUT ROWID"
+CLAIM_KEY = """
+    INSERT INTO Dedup (key, seen) VALUES (?, ?)
+    ON CONFLICT(key) DO UPDATE SET seen = excluded.seen WHERE excluded.seen - Dedup.seen >= ?
+"""
+SELECT_SEEN = "SELECT seen FROM Dedup WHERE key = ?"
+DELETE_EXPIRED = "DELETE FROM Dedup WHERE seen <= ?"
+
+
+class DedupStore:
+    # Remembers which plates were reported in the last ttl seconds, so a plate that stays in view is saved once.
+    # Entries are kept in the order they were seen, expired ones are dropped from the front on every call, so the
+    # store only holds what was seen within ttl and each entry costs O(1) to add and to expire. max_entries is a
+    # hard cap for bursts of noisy reads: past it the oldest plates are forgotten early.
+    #
+    # With path, the processes (or detectors) using the same SQLite file share their state, so a car seen by
+    # two lanes is reported by the first one only. Their clocks must agree, so the wall clock is the default then.
+    def __init__(self, ttl=10, max_entries=100000, clock=None, path=None, prune_every=1000):
+        self.ttl = ttl  # Seconds a plate is suppressed for after it was reported, 0 turns suppression off
+        self.max_entries = max_entries
+        self.clock = clock or (time.time if path else time.monotonic)
+
+        self._entries = OrderedDict()  # key -> time it was reported, or refused, oldest first
+        self._refused = {}  # key -> time another process reported it, for the entries it was refused for
+        self._lock = threading.Lock()
+        self.suppressed = 0  # Duplicates rejected so far
+        self.evicted = 0  # Live entries dropped because of max_entries
+
+        self.path = path
+        self._conn = None
+        self._claims = 0
+        self._prune_every = prune_every  # Shared claims between removals of expired rows from the table
+        if path:
+            self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            with self._conn:
+                self._conn.execute(CREATE_DEDUP)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def admit(self, key):
+        # True when key was not reported within ttl seconds, it then counts as reported now.
+        # False for a duplicate, which does not extend the time it is suppressed for.
+        if self.ttl <= 0:
+            return True
+
+        with self._lock:
+            now = self.clock()
+            self._expire(now)
+
+            seen = self._entries.get(key)
+            if seen is not None:
+                seen = self._refused.get(key, seen)
+            if seen is not None and now - seen < self.ttl:
+                self.suppressed += 1
+                return False
+
+            if self._conn is not None:
+                seen = self._claim(key, now)
+                if seen is not None:
+                    # Reported by another process, remember when so the next frames do not ask again. The entry
+                    # is queued at the time it was refused, the older claim at the back would hold up expiry.
+                    self._remember(key, now, seen)
+                    self.suppressed += 1
+                    return False
+
+            self._remember(key, now)
+            return True
+
+    def _expire(self, now):
+        entries = self._entries
+        while entries:
+            key, seen = next(iter(entries.items()))
+            if now - seen < self.ttl:
+                break
+            del entries[key]
+            self._refused.pop(key, None)
+
+    def _remember(self, key, now, claimed=None):
+        self._entries[key] = now
+        self._entries.move_to_end(key)
+        if claimed is None:
+            self._refused.pop(key, None)
+        else:
+            self._refused[key] = claimed
+        while len(self._entries) > self.max_entries:
+            key, _ = self._entries.popitem(last=False)
+            self._refused.pop(key, None)
+            self.evicted += 1
+
+    def _claim(self, key, now):
+        # Claim key in the shared table, None when this process got it, otherwise the time the other one did
+        try:
+            with self._conn:
+                claimed = self._conn.execute(CLAIM_KEY, (key, now, self.ttl)).rowcount
+                if not claimed:
+                    row = self._conn.execute(SELECT_SEEN, (key,)).fetchone()
+                    return row[0] if row else None
+
+                self._claims += 1
+                if self._claims % self._prune_every == 0:
+                    self._conn.execute(DELETE_EXPIRED, (now - self.ttl,))
+        except sqlite3.Error as e:
+            # Deciding locally may report a plate twice, dropping it would lose it
+            print(f"Dedup database error: {e}")
+        return None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._refused.clear()
+
+    def stats(self):
+        with self._lock:
+            return {'size': len(self._entries), 'suppressed': self.suppressed, 'evicted': self.evicted}
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
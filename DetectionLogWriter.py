@@ -0,0 +1,98 @@
+import queue
+import threading
+import time
+from datetime import datetime
+
+
+class DetectionLogWriter:
+    # Writes detection events to the Detections table from a background thread, committing in batches
+    def __init__(self, db, batch_size=1000, flush_interval=1.0, max_pending=100000):
+        self.db = db
+        self.batch_size = batch_size  # Commit once this many events are pending
+        self.flush_interval = flush_interval  # ...or once the oldest pending event is this many seconds old
+
+        self._queue = queue.Queue(maxsize=max_pending)
+        self.written = 0  # Events committed to the database
+        self.dropped = 0  # Events thrown away because the queue was full or a write failed
+        self._closed = False
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def log(self, plate, confidence, bbox, vehicle_type=None, source=None, timestamp=None):
+        # Queue one detection event, never blocks the caller
+        if self._closed:
+            return
+        timestamp = timestamp or datetime.now()
+        x1, y1, x2, y2 = bbox
+        event = (plate, timestamp.isoformat(sep=' ', timespec='milliseconds'), confidence, x1, y1, x2, y2,
+                 vehicle_type, source)
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self, timeout=None):
+        # Block until every event logged so far is committed, False if that did not happen within timeout
+        deadline = None if timeout is None else time.monotonic() + timeout
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(None if deadline is None else max(0, deadline - time.monotonic()))
+
+    def close(self, timeout=10):
+        # Flush pending events and stop the writer thread
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            pass  # Stuck writer, its daemon thread is left behind
+        self._thread.join(timeout)
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def _run(self):
+        stop = False
+        while not stop:
+            batch = []
+            waiters = []  # flush() callers to wake up once this batch is committed
+
+            # Wait for the first event, then collect more until the batch is full or the interval runs out
+            item = self._queue.get()
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if item is None:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    batch.append(item)
+
+                if stop or waiters or len(batch) >= self.batch_size:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+
+            self._write(batch)
+            for waiter in waiters:
+                waiter.set()
+
+    def _write(self, batch):
+        if not batch:
+            return
+        try:
+            self.db.insert_detections(batch)
+            self.written += len(batch)
+        except Exception as e:
+            print(f"Detection log error: {e}")
+            self.dropped += len(batch)
@@ -0,0 +1,313 @@
+import math
+import os
+import queue
+import threading
+import time
+import cv2
+from Metrics import DEPTH_BUCKETS, registry
+from MotionGate import MotionGate
+
+
+class FrameQueue:
+    # Bounded queue that drops the oldest item instead of blocking the producer
+    def __init__(self, maxsize=1, drop_counter=None):
+        self._queue = queue.Queue(maxsize=maxsize)
+        self.dropped = 0  # Number of stale items thrown away
+        self.drop_counter = drop_counter  # Optional Metrics counter of the drops
+
+    def put(self, item):
+        while True:
+            try:
+                self._queue.put_nowait(item)
+                return
+            except queue.Full:
+                # Make room by discarding the oldest item
+                try:
+                    self._queue.get_nowait()
+                    self.dropped += 1
+                    if self.drop_counter:
+                        self.drop_counter.inc()
+                except queue.Empty:
+                    pass
+
+    def put_wait(self, item, stop_event):
+        # Blocking put for consumers that must see every item, gives up once stop_event is set
+        while not stop_event.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def get(self, timeout=None):
+        # Raises queue.Empty when nothing arrives within the timeout
+        return self._queue.get(timeout=timeout)
+
+    def get_nowait(self):
+        try:
+            return self._queue.get_nowait()
+        except queue.Empty:
+            return None
+
+    def qsize(self):
+        return self._queue.qsize()
+
+
+class FrameScheduler:
+    # Decides which frames of a source are decoded for inference. Only every stride-th frame is decoded,
+    # the others are just grabbed which skips the decode. With adaptive on, the stride follows the measured
+    # inference latency so detection keeps pace with the source FPS instead of falling behind.
+    HEADROOM = 1.1  # Aim slightly below the latency limit so decoded frames are not dropped as stale
+
+    def __init__(self, fps=0, stride=1, adaptive=True, max_stride=15, smoothing=0.2):
+        self.fps = fps
+        self.min_stride = max(1, stride)
+        self.max_stride = max(self.min_stride, max_stride)
+        self.stride = self.min_stride
+        self.adaptive = adaptive and fps > 0  # Without a known FPS there is no rate to keep up with
+        self.smoothing = smoothing  # Weight of the newest latency sample in the moving average
+
+        self.latency = None  # Smoothed inference latency in seconds
+        self.decoded = 0
+        self.skipped = 0
+        self._countdown = 0
+
+    def should_decode(self):
+        # Called once per source frame, True when the frame should be decoded and sent to inference
+        if self._countdown > 0:
+            self._countdown -= 1
+            self.skipped += 1
+            return False
+        self._countdown = self.stride - 1
+        self.decoded += 1
+        return True
+
+    def record_latency(self, seconds):
+        # Feed back how long inference of one decoded frame took
+        if self.latency is None:
+            self.latency = seconds
+        else:
+            self.latency += self.smoothing * (seconds - self.latency)
+
+        if self.adaptive:
+            stride = math.ceil(self.latency * self.fps * self.HEADROOM)
+            self.stride = min(self.max_stride, max(self.min_stride, stride))
+
+
+def drop_counter(queue_name):
+    return registry.counter('lpr_frames_dropped_total', 'Frames or results discarded because the next stage was busy',
+                            queue=queue_name)
+
+
+def queue_depth(queue_name):
+    return registry.histogram('lpr_queue_depth', 'Items waiting in a pipeline queue, sampled on every handover',
+                              DEPTH_BUCKETS, queue=queue_name)
+
+
+class CaptureThread(threading.Thread):
+    # Reads frames from a cv2.VideoCapture and pushes them into a FrameQueue
+    def __init__(self, cap, frame_queue, stop_event, realtime=False, frame_ready=None, scheduler=None,
+                 lossless=False):
+        super().__init__(daemon=True)
+        self.cap = cap
+        self.frame_queue = frame_queue
+        self.stop_event = stop_event
+        self.frame_ready = frame_ready  # Optional threading.Event set after every frame, shared by several captures
+        self.scheduler = scheduler  # Optional FrameScheduler choosing the frames to decode
+        self.lossless = lossless  # Wait for room in the queue instead of dropping the oldest frame
+
+        # Files are paced at their own FPS so playback runs at normal speed
+        fps = cap.get(cv2.CAP_PROP_FPS) if realtime else 0
+        self.frame_interval = 1.0 / fps if fps and fps > 0 else 0
+
+        self._decode_time = registry.stage('capture')
+        self._skipped = registry.counter('lpr_frames_skipped_total', 'Frames not sent to detection', reason='stride')
+
+    def run(self):
+        next_time = time.perf_counter()
+        while not self.stop_event.is_set():
+            if self.scheduler and not self.scheduler.should_decode():
+                # Skipped frames are only grabbed, which is much cheaper than decoding them
+                if not self.cap.grab():
+                    break
+                self._skipped.inc()
+            else:
+                start = time.perf_counter()
+                ret, frame = self.cap.read()
+                if not ret:
+                    break
+                self._decode_time.observe(time.perf_counter() - start)
+                self._put(frame)
+
+            if self.frame_interval:
+                next_time += self.frame_interval
+                delay = next_time - time.perf_counter()
+                if delay > 0:
+                    self.stop_event.wait(delay)
+                else:
+                    next_time = time.perf_counter()
+
+        # None marks the end of the stream for the inference stage
+        self._put(None)
+
+    def _put(self, frame):
+        if self.lossless:
+            self.frame_queue.put_wait(frame, self.stop_event)
+        else:
+            self.frame_queue.put(frame)
+        if self.frame_ready:
+            self.frame_ready.set()
+
+
+class InferenceThread(threading.Thread):
+    # Runs the detector on the newest captured frame and publishes the results
+    def __init__(self, detector, frame_queue, result_queue, stop_event, on_result=None, on_finished=None,
+                 on_error=None, source=None, scheduler=None, lossless=False, motion_gate=None, motion_roi=False):
+        super().__init__(daemon=True)
+        self.detector = detector
+        self.source = source  # Recorded with every detection event
+        self.scheduler = scheduler  # Told the latency of every frame so it can adapt its stride
+        self.lossless = lossless  # Wait for the consumer instead of dropping the oldest result
+        self.motion_gate = motion_gate  # Optional MotionGate, frames without motion skip detection
+        self.motion_roi = motion_roi  # Search plates only in the moving region reported by the gate
+        self.frame_queue = frame_queue
+        self.result_queue = result_queue
+        self.stop_event = stop_event
+        self.on_result = on_result
+        self.on_finished = on_finished
+        self.on_error = on_error
+
+        self._gate_time = registry.stage('motion_gate')
+        self._static = registry.counter('lpr_frames_skipped_total', 'Frames not sent to detection', reason='static')
+        self._frames_total = registry.counter('lpr_frames_total', 'Frames that went through detection')
+        self._frame_depth = queue_depth('frames')
+        self._result_depth = queue_depth('results')
+
+    def run(self):
+        while not self.stop_event.is_set():
+            try:
+                frame = self.frame_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            self._frame_depth.observe(self.frame_queue.qsize())
+
+            if frame is None:
+                # Capture reached the end of the stream
+                if self.on_finished:
+                    self.on_finished()
+                return
+
+            try:
+                start = time.perf_counter()
+                moving, region = True, None
+                if self.motion_gate:
+                    moving, region = self.motion_gate.check(frame)
+                    self._gate_time.observe(time.perf_counter() - start)
+                if moving:
+                    plates = self.detector.detect_plate(frame, self.source, region=region if self.motion_roi else None)
+                    self._frames_total.inc()
+                else:
+                    plates = []  # Static frame, still published so the display keeps running
+                    self._static.inc()
+                if self.scheduler:
+                    self.scheduler.record_latency(time.perf_counter() - start)
+            except Exception as e:
+                print(f"Inference error: {e}")
+                if self.on_error:
+                    self.on_error(str(e))
+                return
+
+            self._result_depth.observe(self.result_queue.qsize())
+            if self.lossless:
+                self.result_queue.put_wait((frame, plates), self.stop_event)
+            else:
+                self.result_queue.put((frame, plates))
+            if self.on_result:
+                self.on_result()
+
+
+class DetectionPipeline:
+    # Capture -> inference -> results pipeline that runs without any GUI
+    def __init__(self, detector, source, on_result=None, on_finished=None, on_error=None,
+                 frame_queue_size=1, result_queue_size=8, realtime=None, offline=False, stride=1,
+                 motion=False, motion_roi=False):
+        self.detector = detector
+        self.source = source
+        self.realtime = realtime  # Pace the source at its FPS, by default only files are paced
+
+        # Offline mode processes a file as fast as possible: no pacing, no dropped frames and a fixed stride.
+        # Otherwise the stride adapts so detection keeps up with the source.
+        self.offline = offline
+        self.stride = stride  # Detect every stride-th frame (the minimum when adaptive)
+        self.scheduler = None
+
+        # Skip detection on frames where nothing moved, optionally searching only the moving region
+        self.motion = motion
+        self.motion_roi = motion_roi
+        self.motion_gate = None
+        self.on_result = on_result
+        self.on_finished = on_finished
+        self.on_error = on_error
+
+        self.frames = FrameQueue(frame_queue_size, drop_counter('frames'))  # Capture -> inference
+        self.results = FrameQueue(result_queue_size, drop_counter('results'))  # Inference -> render
+
+        self.cap = None
+        self._stop_event = threading.Event()
+        self._threads = []
+
+    @property
+    def running(self):
+        return any(thread.is_alive() for thread in self._threads)
+
+    def start(self):
+        # Open the source and start the worker threads, returns False if the source can not be opened
+        self.cap = cv2.VideoCapture(self.source)
+        if not self.cap.isOpened():
+            self.cap.release()
+            self.cap = None
+            return False
+
+        realtime = self.realtime
+        if realtime is None:
+            realtime = isinstance(self.source, str) and os.path.isfile(self.source)
+        if self.offline:
+            realtime = False
+        self.scheduler = FrameScheduler(self.cap.get(cv2.CAP_PROP_FPS), self.stride, adaptive=not self.offline)
+        self.motion_gate = MotionGate() if self.motion else None
+
+        self.detector.reset_tracking(str(self.source))  # Tracks of an earlier run do not carry over
+        self._stop_event.clear()
+        self._threads = [
+            CaptureThread(self.cap, self.frames, self._stop_event, realtime=realtime, scheduler=self.scheduler,
+                          lossless=self.offline),
+            InferenceThread(self.detector, self.frames, self.results, self._stop_event,
+                            on_result=self.on_result, on_finished=self.on_finished, on_error=self.on_error,
+                            source=str(self.source), scheduler=self.scheduler, lossless=self.offline,
+                            motion_gate=self.motion_gate, motion_roi=self.motion_roi),
+        ]
+        for thread in self._threads:
+            thread.start()
+        return True
+
+    def stop(self, timeout=2.0):
+        # Signal the threads to stop and wait for them before releasing the source
+        self._stop_event.set()
+        for thread in self._threads:
+            if thread is not threading.current_thread():
+                thread.join(timeout)
+        self._threads = []
+
+        if self.cap:
+            self.cap.release()
+            self.cap = None
+
+    def take_results(self):
+        # All pending (frame, plates) pairs, oldest first
+        results = []
+        while True:
+            result = self.results.get_nowait()
+            if result is None:
+                return results
+            results.append(result)
@@ -0,0 +1,31 @@
+from PyQt5.QtCore import QObject, pyqtSignal
+from DetectionPipeline import DetectionPipeline
+
+
+class DetectionWorker(QObject):
+    # Qt front-end for DetectionPipeline, results are delivered to the GUI thread through signals
+    result_ready = pyqtSignal()  # New results can be taken with take_results()
+    finished = pyqtSignal()  # Source reached the end of the stream
+    error = pyqtSignal(str)  # Inference failed and the pipeline stopped
+
+    def __init__(self, detector, source, parent=None, offline=False, motion=False, motion_roi=False):
+        super().__init__(parent)
+        self.pipeline = DetectionPipeline(
+            detector,
+            source,
+            on_result=self.result_ready.emit,
+            on_finished=self.finished.emit,
+            on_error=self.error.emit,
+            offline=offline,
+            motion=motion,
+            motion_roi=motion_roi
+        )
+
+    def start(self):
+        return self.pipeline.start()
+
+    def stop(self):
+        self.pipeline.stop()
+
+    def take_results(self):
+        return self.pipeline.take_results()
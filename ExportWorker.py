@@ -0,0 +1,31 @@
+import threading
+from PyQt5.QtCore import QThread, pyqtSignal
+from PlateExporter import PlateExporter, ExportCancelled
+
+
+class ExportWorker(QThread):
+    # Runs a PlateExporter in the background and reports progress to the GUI thread through signals
+    progress = pyqtSignal(int, int)  # (written, total)
+    succeeded = pyqtSignal(int)  # Number of exported records
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+    def __init__(self, db, file_path, parent=None, **filters):
+        super().__init__(parent)
+        self.exporter = PlateExporter(db)
+        self.file_path = file_path
+        self.filters = filters  # start, end, vehicle_type, search_term
+        self._cancel_event = threading.Event()
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    def run(self):
+        try:
+            written = self.exporter.export(self.file_path, progress=self.progress.emit,
+                                           cancel_event=self._cancel_event, **self.filters)
+            self.succeeded.emit(written)
+        except ExportCancelled:
+            self.cancelled.emit()
+        except Exception as e:
+            self.failed.emit(str(e))
@@ -0,0 +1,57 @@
+import cv2
+import numpy as np
+from PyQt5.QtGui import QImage
+
+# Qt 5.14+ shows BGR buffers as they are, older versions get an RGB conversion into a second reused buffer
+BGR888 = getattr(QImage, 'Format_BGR888', None)
+
+
+class FrameRenderer:
+    # Draws frames with their plates for display. The frame is first shrunk to the display size into a buffer
+    # that is reused while the size stays the same, boxes and labels are drawn on that small buffer and the
+    # QImage wraps it without a copy. Detection keeps running on the full frames, only the display is smaller.
+    def __init__(self, color=(0, 255, 0), font_scale=0.6):
+        self.color = color  # BGR
+        self.font_scale = font_scale  # In display pixels, so labels stay readable however large the frame is
+        self._buffer = None  # Display sized BGR image
+        self._rgb = None  # Only without Format_BGR888
+        self.allocations = 0  # Buffers allocated so far, stays at one per display size
+
+    def render(self, frame, plates, width, height):
+        # QImage of frame fitted into width x height keeping its aspect ratio, with the plates drawn on it.
+        # It points into the renderer's buffer, so convert it (e.g. QPixmap.fromImage) before the next render.
+        h, w = frame.shape[:2]
+        scale = min(width / w, height / h)
+        size = (max(1, int(w * scale)), max(1, int(h * scale)))
+
+        # Bilinear: smoother than the nearest-pixel scaling QPixmap.scaled does by default, and several times
+        # faster than INTER_AREA on 1080p frames
+        buffer = self._reserve('_buffer', size)
+        cv2.resize(frame, size, dst=buffer, interpolation=cv2.INTER_LINEAR)
+
+        thickness = 1 if scale < 0.75 else 2
+        for plate in plates:
+            # Draw bounding boxes and text in display coordinates
+            x1, y1, x2, y2 = (int(v * scale) for v in plate.bbox)
+            cv2.rectangle(buffer, (x1, y1), (x2, y2), self.color, thickness)
+
+            confidence_percent = plate.confidence * 100
+            text = f"{plate.text} ({plate.vehicle}) - {confidence_percent:.1f}%"
+            cv2.putText(buffer, text, (x1, max(12, y1 - 6)), cv2.FONT_HERSHEY_SIMPLEX, self.font_scale, self.color,
+                        thickness, cv2.LINE_AA)
+
+        if BGR888 is not None:
+            return QImage(buffer.data, size[0], size[1], buffer.strides[0], BGR888)
+
+        rgb = self._reserve('_rgb', size)
+        cv2.cvtColor(buffer, cv2.COLOR_BGR2RGB, dst=rgb)
+        return QImage(rgb.data, size[0], size[1], rgb.strides[0], QImage.Format_RGB888)
+
+    def _reserve(self, name, size):
+        # The buffer of that name, allocated again only when the display size changed
+        buffer = getattr(self, name)
+        if buffer is None or buffer.shape[1::-1] != size:
+            buffer = np.empty((size[1], size[0], 3), dtype=np.uint8)
+            setattr(self, name, buffer)
+            self.allocations += 1
+        return buffer
@@ -0,0 +1,258 @@
+import ast
+import glob
+import os
+import cv2
+import numpy as np
+
+# Every backend returns Results objects with the same shape as ultralytics results (result.boxes with xyxy,
+# conf and cls, result.names), so the detectors do not care which one loaded their model:
+#   .pt                            ultralytics / PyTorch
+#   .onnx                          ONNX Runtime
+#   .xml or *_openvino_model/      OpenVINO
+# Exported models only need NumPy, OpenCV and their runtime, see export_models.py.
+
+MAX_DETECTIONS = 300
+MAX_WH = 7680  # Box offset per class so one NMS pass keeps classes apart
+
+
+def letterbox(image, size, color=(114, 114, 114)):
+    # Resize keeping the aspect ratio and pad to a size x size square.
+    # Returns the canvas, the scale and the (left, top) padding to map boxes back.
+    h, w = image.shape[:2]
+    scale = min(size / h, size / w)
+    new_w, new_h = max(1, round(w * scale)), max(1, round(h * scale))
+    resized = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+
+    canvas = np.full((size, size, 3), color, dtype=np.uint8)
+    top, left = (size - new_h) // 2, (size - new_w) // 2
+    canvas[top:top + new_h, left:left + new_w] = resized
+    return canvas, scale, (left, top)
+
+
+def preprocess(images, size):
+    # Letterbox BGR images into one float32 NCHW RGB blob scaled to 0..1, as exported YOLO models expect.
+    # Returns the blob and the (scale, pad) of every image.
+    prepared = [letterbox(image, size) for image in images]
+    blob = np.stack([canvas for canvas, _, _ in prepared])
+    blob = np.ascontiguousarray(blob[..., ::-1].transpose(0, 3, 1, 2), dtype=np.float32) / 255.0
+    return blob, [(scale, pad) for _, scale, pad in prepared]
+
+
+def nms(boxes, scores, iou_threshold):
+    # Greedy non-maximum suppression, returns the kept indices by descending score.
+    # Every step compares the best remaining box with all others at once.
+    x1, y1, x2, y2 = boxes.T
+    areas = (x2 - x1) * (y2 - y1)
+    order = np.argsort(-scores)
+
+    keep = []
+    while order.size:
+        best, rest = order[0], order[1:]
+        keep.append(best)
+
+        w = np.clip(np.minimum(x2[best], x2[rest]) - np.maximum(x1[best], x1[rest]), 0, None)
+        h = np.clip(np.minimum(y2[best], y2[rest]) - np.maximum(y1[best], y1[rest]), 0, None)
+        inter = w * h
+        iou = inter / (areas[best] + areas[rest] - inter + 1e-9)
+        order = rest[iou <= iou_threshold]
+
+    return np.asarray(keep, dtype=np.int64)
+
+
+class Boxes:
+    # NumPy counterpart of ultralytics Boxes: xyxy (N, 4), conf (N,) and cls (N,).
+    # Iterating yields one Boxes per detection, so box.xyxy[0], box.conf[0] and box.cls[0] work as before.
+    def __init__(self, xyxy, conf, cls):
+        self.xyxy = xyxy
+        self.conf = conf
+        self.cls = cls
+
+    def __len__(self):
+        return len(self.conf)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield Boxes(self.xyxy[i:i + 1], self.conf[i:i + 1], self.cls[i:i + 1])
+
+
+class Results:
+    def __init__(self, boxes, names):
+        self.boxes = boxes
+        self.names = names  # class id -> label
+
+
+def _empty_boxes():
+    return Boxes(np.zeros((0, 4), dtype=np.float32), np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.float32))
+
+
+class UltralyticsBackend:
+    # PyTorch model through ultralytics, results are converted to NumPy once
+    def __init__(self, model_path, imgsz=None):
+        from ultralytics import YOLO
+        self.model = YOLO(model_path)
+        self.imgsz = imgsz
+
+    @property
+    def names(self):
+        return self.model.names
+
+    def __call__(self, source, conf=None, imgsz=None):
+        kwargs = {'verbose': False}
+        if conf is not None:
+            kwargs['conf'] = conf
+        if imgsz or self.imgsz:
+            kwargs['imgsz'] = imgsz or self.imgsz
+
+        results = []
+        for result in self.model(source, **kwargs):
+            boxes = result.boxes.cpu().numpy()
+            results.append(Results(Boxes(boxes.xyxy, boxes.conf, boxes.cls), result.names))
+        return results
+
+
+class ExportedBackend:
+    # Shared pre- and post-processing of exported YOLOv8 detection models: NumPy letterbox in, raw head
+    # output of shape (batch, 4 + classes, anchors) out, decoded and suppressed here
+    def __init__(self, imgsz, batch, names, iou=0.7):
+        self.imgsz = imgsz  # Input size, fixed by the export unless it has dynamic axes
+        self.batch = batch  # Fixed batch size of the export, None when dynamic
+        self.names = names
+        self.iou = iou
+
+    def _infer(self, blob):
+        raise NotImplementedError
+
+    def __call__(self, source, conf=None, imgsz=None):
+        images = source if isinstance(source, list) else [source]
+        if not images:
+            return []
+        conf = 0.25 if conf is None else conf
+        size = imgsz if self.dynamic_size and imgsz else self.imgsz
+
+        blob, params = preprocess(images, size)
+        step = self.batch or len(images)
+        outputs = np.concatenate([self._infer(blob[i:i + step]) for i in range(0, len(images), step)])
+
+        return [self._postprocess(output, conf, scale, pad, image.shape)
+                for output, (scale, pad), image in zip(outputs, params, images)]
+
+    @property
+    def dynamic_size(self):
+        return False
+
+    def _postprocess(self, output, conf, scale, pad, shape):
+        predictions = output.T  # (anchors, 4 + classes)
+        class_scores = predictions[:, 4:]
+        cls = class_scores.argmax(axis=1)
+        scores = class_scores[np.arange(len(cls)), cls]
+
+        mask = scores > conf
+        if not mask.any():
+            return Results(_empty_boxes(), self.names)
+        predictions, cls, scores = predictions[mask], cls[mask], scores[mask]
+
+        cx, cy, w, h = predictions[:, 0], predictions[:, 1], predictions[:, 2], predictions[:, 3]
+        boxes = np.stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], axis=1)
+
+        keep = nms(boxes + cls[:, None] * MAX_WH, scores, self.iou)[:MAX_DETECTIONS]
+        boxes, scores, cls = boxes[keep], scores[keep], cls[keep]
+
+        # Undo the letterbox
+        left, top = pad
+        boxes = (boxes - np.array([left, top, left, top], dtype=np.float32)) / scale
+        boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, shape[1])
+        boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, shape[0])
+
+        return Results(Boxes(boxes.astype(np.float32), scores.astype(np.float32), cls.astype(np.float32)),
+                       self.names)
+
+
+def _parse_names(names, count=None):
+    # Class names are stored by the ultralytics export as the text of a dict, e.g. "{0: 'car', 1: 'truck'}"
+    if isinstance(names, str):
+        try:
+            names = ast.literal_eval(names)
+        except (ValueError, SyntaxError):
+            names = None
+    if isinstance(names, dict):
+        return {int(k): str(v) for k, v in names.items()}
+    if isinstance(names, list):
+        return dict(enumerate(names))
+    return {i: str(i) for i in range(count or 0)}
+
+
+class OnnxBackend(ExportedBackend):
+    def __init__(self, model_path, imgsz=640, threads=None):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        batch, _, height, _ = model_input.shape  # Dynamic axes are names instead of numbers
+        self._dynamic_size = not isinstance(height, int)
+
+        classes = self.session.get_outputs()[0].shape[1]
+        names = _parse_names(self.session.get_modelmeta().custom_metadata_map.get('names'),
+                             classes - 4 if isinstance(classes, int) else None)
+        super().__init__(imgsz if self._dynamic_size else height, batch if isinstance(batch, int) else None, names)
+
+    @property
+    def dynamic_size(self):
+        return self._dynamic_size
+
+    def _infer(self, blob):
+        return self.session.run(None, {self.input_name: blob})[0]
+
+
+class OpenVINOBackend(ExportedBackend):
+    def __init__(self, model_path, imgsz=640, threads=None):
+        import openvino as ov
+
+        xml_path = model_path
+        if os.path.isdir(model_path):
+            xml_path = glob.glob(os.path.join(model_path, "*.xml"))[0]
+
+        core = ov.Core()
+        model = core.read_model(xml_path)
+        config = {"INFERENCE_NUM_THREADS": threads} if threads else {}
+        self.compiled = core.compile_model(model, "CPU", config)
+        self.output = self.compiled.output(0)
+
+        shape = model.input(0).get_partial_shape()
+        self._dynamic_size = shape[2].is_dynamic
+        batch = shape[0].get_length() if shape[0].is_static else None
+        height = imgsz if self._dynamic_size else shape[2].get_length()
+
+        # The ultralytics export writes the class names next to the model
+        names = None
+        metadata_path = os.path.join(os.path.dirname(xml_path), "metadata.yaml")
+        if os.path.exists(metadata_path):
+            import yaml
+            with open(metadata_path) as f:
+                names = yaml.safe_load(f).get('names')
+        classes = model.output(0).get_partial_shape()[1]
+        super().__init__(height, batch, _parse_names(names, classes.get_length() - 4 if classes.is_static else None))
+
+    @property
+    def dynamic_size(self):
+        return self._dynamic_size
+
+    def _infer(self, blob):
+        return self.compiled(blob)[self.output]
+
+
+def load_model(model_path, imgsz=None, threads=None):
+    # Pick the backend from the model file: ONNX, OpenVINO or a PyTorch .pt through ultralytics.
+    # Anything that is not a path is taken as an already loaded model, e.g. the stubs of the benchmark suite.
+    if not isinstance(model_path, (str, os.PathLike)):
+        return model_path
+    path = os.fspath(model_path).rstrip("/\\")
+    if path.endswith(".onnx"):
+        return OnnxBackend(path, imgsz or 640, threads)
+    if path.endswith(".xml") or path.endswith("_openvino_model"):
+        return OpenVINOBackend(path, imgsz or 640, threads)
+    return UltralyticsBackend(model_path, imgsz)
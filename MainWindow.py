@@ -1,22 +1,33 @@
 import sys
+import time
 import cv2
 import sqlite3
-import qrcode
-import pandas as pd
-from pyzbar.pyzbar import decode
 import webbrowser
 from datetime import datetime
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel,
                              QPushButton, QStackedWidget, QLineEdit, QTextEdit, QFileDialog,
-                             QMessageBox, QTableWidget, QTableWidgetItem, QHeaderView, QInputDialog, QDialog)
-from PyQt5.QtGui import QPixmap, QImage, QIcon, QColor, QDoubleValidator, QIntValidator
-from PyQt5.QtCore import Qt, QTimer, QUrl
+                             QMessageBox, QTableView, QAbstractItemView, QHeaderView, QInputDialog, QDialog,
+                             QProgressDialog, QCheckBox, QProgressBar, QListWidget, QListWidgetItem)
+from PyQt5.QtGui import QPixmap, QIcon, QColor, QDoubleValidator, QIntValidator
+from PyQt5.QtCore import Qt, QUrl, QTimer, pyqtSignal
 from PyQt5.QtGui import QDesktopServices
-from CarPlateDetector import CarPlateDetector
+from AlertBus import AlertBus, LogFileSink, SoundSink, WebhookSink
 from DatabaseManager import DatabaseManager
+from DetectionLogWriter import DetectionLogWriter
+from DetectionWorker import DetectionWorker
+from ExportWorker import ExportWorker
+from FrameRenderer import FrameRenderer
+from Metrics import MetricsServer, quantile, registry
+from ModelLoader import ModelLoader
+from PlateTableModel import PlateTableModel
 
 
 class MainWindow(QMainWindow):
+    # Detector callbacks may run on the worker thread, signals hand them over to the GUI thread
+    plate_alert = pyqtSignal(object)
+    alert_sound = pyqtSignal()
+    detection_error = pyqtSignal(str)
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Car Plate Recognition System")
@@ -28,15 +39,42 @@ class MainWindow(QMainWindow):
         self.vehicle_model_path = "models/VehicleModel/weights/best.pt"
         self.db_path = "LPR.db"
 
+        # Inference sizes per model, None uses the size the model was trained or exported at
+        self.plate_imgsz = None
+        self.char_imgsz = 640  # Plate crops are small, 160-256 is often enough (check with accuracy_latency.py)
+        self.vehicle_imgsz = None
+
         # Detection parameters
         self.conf_threshold = 0.75
         self.cooldown = 10
+        self.motion_gate = False  # Skip detection on frames where nothing moves
+        self.motion_roi = False  # Search plates only in the moving part of the frame
+        self.metrics_port = None  # Serve Prometheus metrics on localhost at this port, None for off
+        self.metrics_server = None
+        self.alert_log_path = None  # Append alerts to this file as JSON lines, None for off
+        self.webhook_url = None  # POST alerts to this URL, None for off
+
+        # Alerts of the detector go to the notification panel, a sound and the optional log file and webhook,
+        # each on its own thread so none of them holds up detection
+        self.alert_bus = AlertBus()
+        self.alert_bus.add_sink(self.plate_alert.emit, name='panel')
+        self.alert_bus.add_sink(SoundSink(play=self.alert_sound.emit))
+        self.alert_sinks = {}  # 'log' / 'webhook' -> sink
 
         # Initialize detector and database
         self.detector = None
+        self.model_loader = None  # Background loading of the detector models
+        self.reload_models = False  # Settings changed while the models were loading
+        self.pending_action = None  # Run once the models are ready, e.g. start_camera
+        self.error_dialog_open = False  # Detection errors arrive every frame, only one dialog at a time
+        self.last_error = (None, 0.0)  # (message, time) of the last error dialog
         self.db = DatabaseManager(self.db_path)
-        self.cap = None
-        self.timer = QTimer()
+        self.event_log = DetectionLogWriter(self.db)  # Sighting history, written in the background
+        self.worker = None  # Capture/inference pipeline for the camera or video
+        self.export_worker = None  # Background export of the Plates table
+        self.active_display = None  # (label, results) widgets the worker renders into
+        self.frame_renderer = FrameRenderer()  # Draws camera/video frames at the size of their label
+        self.image_renderer = FrameRenderer()
 
         # Create main widgets
         self.create_navigation()
@@ -50,8 +88,28 @@ class MainWindow(QMainWindow):
         central_widget.setLayout(main_layout)
         self.setCentralWidget(central_widget)
 
+        # Busy indicator in the status bar while models load
+        self.load_progress = QProgressBar()
+        self.load_progress.setRange(0, 0)
+        self.load_progress.setMaximumWidth(150)
+        self.load_progress.hide()
+        self.statusBar().addPermanentWidget(self.load_progress)
+
         # Connect signals
-        self.timer.timeout.connect(self.update_frame)
+        self.plate_alert.connect(self.show_plate_alert)
+        self.alert_sound.connect(QApplication.beep)
+        self.detection_error.connect(self.show_detection_error)
+
+        # Load the models in the background as soon as the window is shown, not on the first Start
+        QTimer.singleShot(0, self.initialize_detector)
+
+        # Live metrics overlay of the Real-Time page, refreshed once a second
+        self.render_time = registry.stage('render')
+        self.metrics_snapshots = {}  # stage -> histogram counts at the previous refresh
+        self.metrics_refreshed = time.perf_counter()
+        self.metrics_timer = QTimer(self)
+        self.metrics_timer.timeout.connect(self.refresh_metrics_overlay)
+        self.metrics_timer.start(1000)
 
     def create_navigation(self):
         # Create the navigation sidebar
@@ -160,6 +218,14 @@ class MainWindow(QMainWindow):
         self.video_label.setMinimumSize(640, 480)
         layout.addWidget(self.video_label)
 
+        # Stage latencies drawn over the video
+        self.metrics_overlay = QLabel(self.video_label)
+        self.metrics_overlay.setStyleSheet(
+            "background-color: rgba(0, 0, 0, 160); color: #2ecc71; font-family: monospace; padding: 6px;")
+        self.metrics_overlay.setAttribute(Qt.WA_TransparentForMouseEvents)
+        self.metrics_overlay.move(8, 8)
+        self.metrics_overlay.hide()
+
         # Controls
         control_layout = QHBoxLayout()
 
@@ -172,16 +238,35 @@ class MainWindow(QMainWindow):
         self.btn_stop.clicked.connect(self.stop_camera)
         self.btn_stop.setEnabled(False)
 
+        self.metrics_check = QCheckBox("Show metrics")
+        self.metrics_check.toggled.connect(self.toggle_metrics_overlay)
+
         control_layout.addWidget(self.btn_start)
         control_layout.addWidget(self.btn_stop)
+        control_layout.addWidget(self.metrics_check)
         layout.addLayout(control_layout)
 
-        # Results
+        # Results, with the alerts for plates found in the database next to them
         self.detection_results = QTextEdit()
         self.detection_results.setReadOnly(True)
         self.detection_results.setStyleSheet("font-family: monospace;")
-        layout.addWidget(QLabel("Detection Results:"))
-        layout.addWidget(self.detection_results)
+
+        self.alert_list = QListWidget()
+        self.alert_list.setStyleSheet("font-family: monospace; color: #e67e22;")
+        self.btn_clear_alerts = QPushButton("Clear Alerts")
+        self.btn_clear_alerts.clicked.connect(self.alert_list.clear)
+
+        results_layout = QHBoxLayout()
+        results_column = QVBoxLayout()
+        results_column.addWidget(QLabel("Detection Results:"))
+        results_column.addWidget(self.detection_results)
+        alerts_column = QVBoxLayout()
+        alerts_column.addWidget(QLabel("Alerts:"))
+        alerts_column.addWidget(self.alert_list)
+        alerts_column.addWidget(self.btn_clear_alerts)
+        results_layout.addLayout(results_column, 3)
+        results_layout.addLayout(alerts_column, 2)
+        layout.addLayout(results_layout)
 
         page.setLayout(layout)
         return page
@@ -216,12 +301,28 @@ class MainWindow(QMainWindow):
         layout.addWidget(self.btn_load_image)
         layout.addWidget(self.btn_detect_image)
 
-        # Results
+        # Results, plates that are not in the database can be registered from the list next to them
         self.image_results = QTextEdit()
         self.image_results.setReadOnly(True)
         self.image_results.setStyleSheet("font-family: monospace;")
-        layout.addWidget(QLabel("Detection Results:"))
-        layout.addWidget(self.image_results)
+        self.image_plates = []  # Plates of the last detection
+
+        self.unknown_plates = QListWidget()
+        self.unknown_plates.itemDoubleClicked.connect(self.register_unknown_plate)
+        self.btn_register_plate = QPushButton("Add Owner...")
+        self.btn_register_plate.clicked.connect(lambda: self.register_unknown_plate(self.unknown_plates.currentItem()))
+
+        results_layout = QHBoxLayout()
+        results_column = QVBoxLayout()
+        results_column.addWidget(QLabel("Detection Results:"))
+        results_column.addWidget(self.image_results)
+        unknown_column = QVBoxLayout()
+        unknown_column.addWidget(QLabel("Not in Database:"))
+        unknown_column.addWidget(self.unknown_plates)
+        unknown_column.addWidget(self.btn_register_plate)
+        results_layout.addLayout(results_column, 3)
+        results_layout.addLayout(unknown_column, 2)
+        layout.addLayout(results_layout)
 
         page.setLayout(layout)
         return page
@@ -258,7 +359,11 @@ class MainWindow(QMainWindow):
         self.btn_stop_video.clicked.connect(self.stop_video)
         self.btn_stop_video.setEnabled(False)
 
+        # Offline mode detects on every frame as fast as possible instead of playing in real time
+        self.offline_video_check = QCheckBox("Process every frame (as fast as possible)")
+
         layout.addWidget(self.btn_load_video)
+        layout.addWidget(self.offline_video_check)
         layout.addWidget(self.btn_play_video)
         layout.addWidget(self.btn_stop_video)
 
@@ -298,12 +403,15 @@ class MainWindow(QMainWindow):
         layout.addLayout(search_layout)
 
         # Table
-        self.table = QTableWidget()
-        self.table.setColumnCount(5)
-        self.table.setHorizontalHeaderLabels(["ID", "Plate", "Owner", "Vehicle Type", "Date/Time"])
+        # Table, rows are fetched page by page from the database while scrolling
+        self.plate_model = PlateTableModel(self.db, parent=self)
+        self.table = QTableView()
+        self.table.setModel(self.plate_model)
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
-        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
-        self.table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setSortingEnabled(True)
+        self.table.sortByColumn(0, Qt.DescendingOrder)
 
         layout.addWidget(self.table)
 
@@ -322,10 +430,13 @@ class MainWindow(QMainWindow):
         self.btn_remove.setStyleSheet("padding: 8px; font-size: 14px;")
         self.btn_remove.clicked.connect(self.remove_plate)
 
-        self.btn_export_csv = QPushButton("Export to CSV")
+        self.btn_export_csv = QPushButton("Export CSV/Parquet")
         self.btn_export_csv.setStyleSheet("padding: 8px; font-size: 14px;")
         self.btn_export_csv.clicked.connect(self.export_to_csv)
 
+        self.btn_import_csv = QPushButton("Import CSV")
+        self.btn_import_csv.setStyleSheet("padding: 8px; font-size: 14px;")
+        self.btn_import_csv.clicked.connect(self.import_from_csv)
 
         self.btn_generate_qr = QPushButton("Generate QR")
         self.btn_generate_qr.setStyleSheet("padding: 8px; font-size: 14px;")
@@ -341,6 +452,7 @@ class MainWindow(QMainWindow):
         btn_layout.addWidget(self.btn_generate_qr)
         btn_layout.addWidget(self.btn_scan_qr)
         btn_layout.addWidget(self.btn_export_csv)
+        btn_layout.addWidget(self.btn_import_csv)
         layout.addLayout(btn_layout)
 
         # Load initial data
@@ -373,6 +485,17 @@ class MainWindow(QMainWindow):
         self.vehicle_path_edit = QLineEdit(self.vehicle_model_path)
         layout.addWidget(self.vehicle_path_edit)
 
+        # Inference sizes, smaller is faster on CPU
+        layout.addWidget(QLabel("Inference Sizes (plate / character / vehicle, multiples of 32, empty = model default):"))
+        sizes = QHBoxLayout()
+        self.plate_imgsz_edit = QLineEdit(str(self.plate_imgsz or ""))
+        self.char_imgsz_edit = QLineEdit(str(self.char_imgsz or ""))
+        self.vehicle_imgsz_edit = QLineEdit(str(self.vehicle_imgsz or ""))
+        for edit in (self.plate_imgsz_edit, self.char_imgsz_edit, self.vehicle_imgsz_edit):
+            edit.setValidator(QIntValidator(32, 1920))
+            sizes.addWidget(edit)
+        layout.addLayout(sizes)
+
         layout.addWidget(QLabel("Database Path:"))
         self.db_path_edit = QLineEdit(self.db_path)
         layout.addWidget(self.db_path_edit)
@@ -388,6 +511,28 @@ class MainWindow(QMainWindow):
         self.cooldown_edit.setValidator(QIntValidator(1, 60))
         layout.addWidget(self.cooldown_edit)
 
+        layout.addWidget(QLabel("Metrics Port (Prometheus endpoint on localhost, empty = off):"))
+        self.metrics_port_edit = QLineEdit(str(self.metrics_port or ""))
+        self.metrics_port_edit.setValidator(QIntValidator(1, 65535))
+        layout.addWidget(self.metrics_port_edit)
+
+        layout.addWidget(QLabel("Alert Log File (JSON lines, empty = off):"))
+        self.alert_log_edit = QLineEdit(self.alert_log_path or "")
+        layout.addWidget(self.alert_log_edit)
+
+        layout.addWidget(QLabel("Alert Webhook URL (JSON POST per alert, empty = off):"))
+        self.webhook_edit = QLineEdit(self.webhook_url or "")
+        self.webhook_edit.setPlaceholderText("http://host:port/path")
+        layout.addWidget(self.webhook_edit)
+
+        self.motion_gate_check = QCheckBox("Skip frames without motion (idle lanes)")
+        self.motion_gate_check.setChecked(self.motion_gate)
+        layout.addWidget(self.motion_gate_check)
+
+        self.motion_roi_check = QCheckBox("Search plates only in the moving region")
+        self.motion_roi_check.setChecked(self.motion_roi)
+        layout.addWidget(self.motion_roi_check)
+
         # Save button
         self.btn_save = QPushButton("Save Settings")
         self.btn_save.setStyleSheet("padding: 10px; font-size: 16px;")
@@ -428,80 +573,100 @@ class MainWindow(QMainWindow):
 
     # Camera functions
     def start_camera(self):
-        # Start camera for real-time detection
+        # Start camera for real-time detection, once the models are ready
         if not self.detector:
-            self.initialize_detector()
+            self.initialize_detector(then=self.start_camera)
+            return
 
-        self.cap = cv2.VideoCapture(0)
-        if not self.cap.isOpened():
+        if not self.start_worker(0, self.video_label, self.detection_results):
             QMessageBox.critical(self, "Error", "Could not open camera!")
             return
 
         self.btn_start.setEnabled(False)
         self.btn_stop.setEnabled(True)
-        self.timer.start(30)  # Update every 30ms
 
     def stop_camera(self):
         # Stop camera
-        self.timer.stop()
-        if self.cap:
-            self.cap.release()
-            self.cap = None
+        if self.active_display and self.active_display[0] is self.video_label:
+            self.stop_worker()
 
         self.btn_start.setEnabled(True)
         self.btn_stop.setEnabled(False)
         self.video_label.clear()
 
-    def update_frame(self):
-        try:
-            ret, frame = self.cap.read()
-            if not ret:
-                if hasattr(self, 'current_video_path'):
-                    self.stop_video()
-                return
-
-            rgb_image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-
-            # Detect plates
-            plates = self.detector.detect_plate(frame)
-
-            for plate in plates:
-                # Draw bounding boxes and text
-                x1, y1, x2, y2 = plate['bbox']
-                cv2.rectangle(rgb_image, (x1, y1), (x2, y2), (0, 255, 0), 2)
+    def start_worker(self, source, label, results, offline=False):
+        # Start the capture/inference pipeline, frames are rendered into the given widgets
+        self.stop_worker()
+
+        self.worker = DetectionWorker(self.detector, source, self, offline=offline, motion=self.motion_gate,
+                                      motion_roi=self.motion_roi)
+        self.worker.result_ready.connect(self.update_frame)
+        self.worker.finished.connect(self.on_worker_finished)
+        self.worker.error.connect(self.on_worker_error)
+        if not self.worker.start():
+            self.worker = None
+            return False
+
+        self.active_display = (label, results)
+        return True
+
+    def stop_worker(self):
+        # Stop the running pipeline, pending results are discarded
+        if self.worker:
+            self.worker.stop()
+            gate = self.worker.pipeline.motion_gate
+            if gate and gate.frames:
+                self.statusBar().showMessage(
+                    f"Motion gate skipped {gate.skipped_fraction:.0%} of {gate.frames} frames")
+            self.worker.deleteLater()
+            self.worker = None
+        self.active_display = None
+
+    def stop_active_source(self):
+        # Stop whichever of camera or video is running
+        if self.active_display and self.active_display[0] is self.video_file_label:
+            self.stop_video()
+        elif self.active_display:
+            self.stop_camera()
 
-                confidence_percent = plate['confidence'] * 100
-                text = f"{plate['text']} ({plate['vehicle']}) - {confidence_percent:.1f}%"
-                cv2.putText(rgb_image, text, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 255, 0), 2)
+    def on_worker_finished(self):
+        # End of the video file
+        self.stop_active_source()
 
-                # Update results display
-                result_text = (f"Plate: {plate['text']}\nOwner: {plate['owner']}\nVehicle Type: {plate['vehicle']}\nConfidence: {confidence_percent:.1f}%\n\n")
+    def on_worker_error(self, message):
+        self.stop_active_source()
+        QMessageBox.critical(self, "Error", f"Error: {message}")
 
-                if hasattr(self, 'current_video_path'):  # Video mode
-                    self.video_results.append(result_text)
-                else:  # Real-time mode
-                    self.detection_results.append(result_text)
+    def update_frame(self):
+        # Render step, runs on the GUI thread whenever the worker has new results
+        if not self.worker or not self.active_display:
+            return
 
-            # Display the frame
-            h, w, ch = rgb_image.shape
-            bytes_per_line = ch * w
-            qt_image = QImage(rgb_image.data, w, h, bytes_per_line, QImage.Format_RGB888)
-            pixmap = QPixmap.fromImage(qt_image)
+        results = self.worker.take_results()
+        if not results:
+            return
+        label, results_widget = self.active_display
+        start = time.perf_counter()
 
-            if hasattr(self, 'current_video_path'):  # Video mode
-                self.video_file_label.setPixmap(
-                    pixmap.scaled(self.video_file_label.width(), self.video_file_label.height(), Qt.KeepAspectRatio))
-            else:  # Real-time mode
-                self.video_label.setPixmap(
-                    pixmap.scaled(self.video_label.width(), self.video_label.height(), Qt.KeepAspectRatio))
+        try:
+            # Plates of every pending result are reported, only the newest frame is shown
+            for _, plates in results:
+                for plate in plates:
+                    confidence_percent = plate.confidence * 100
+                    # A plate whose OCR reads never agreed is reported with its best reading, marked as such
+                    text = plate.text if plate.agreed else f"{plate.text} (uncertain reading)"
+                    result_text = (f"Plate: {text}\nOwner: {plate.owner}\nVehicle Type: {plate.vehicle}\nConfidence: {confidence_percent:.1f}%\n\n")
+                    results_widget.append(result_text)
+
+            # Display the frame, shrunk to the label before the plates are drawn on it
+            frame, plates = results[-1]
+            qt_image = self.frame_renderer.render(frame, plates, label.width(), label.height())
+            label.setPixmap(QPixmap.fromImage(qt_image))
+            self.render_time.observe(time.perf_counter() - start)
 
         except Exception as e:
             print(f"Frame update error: {e}")
-            if hasattr(self, 'current_video_path'):
-                self.stop_video()
-            else:
-                self.stop_camera()
-            QMessageBox.critical(self, "Error", f"Error: {str(e)}")
+            self.on_worker_error(str(e))
 
     # Image functions
     def load_image(self):
@@ -515,62 +680,62 @@ class MainWindow(QMainWindow):
             self.btn_detect_image.setEnabled(True)
 
     def detect_image(self):
-        # Detect plates in loaded image
+        # Detect plates in loaded image, once the models are ready
         if not self.detector:
-            self.initialize_detector()
+            self.initialize_detector(then=self.detect_image)
+            return
 
         if hasattr(self, 'current_image_path'):
             image = cv2.imread(self.current_image_path)
             if image is not None:
-                rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-
                 # Detect plates
-                plates = self.detector.detect_plate(image)
-                self.image_results.clear()
+                plates = self.detector.detect_plate(image, self.current_image_path, track=False)
+                self.image_plates = plates
 
+                # Update results, plates that are not in the database are listed for the operator to register
+                # whenever they like instead of asking for every one of them right away
+                self.show_image_results()
+                self.unknown_plates.clear()
                 for plate in plates:
-                    x1, y1, x2, y2 = plate['bbox']
-                    cv2.rectangle(rgb_image, (x1, y1), (x2, y2), (0, 255, 0), 2)
-
-                    confidence_percent = plate['confidence'] * 100
-                    text = f"{plate['text']} - {confidence_percent:.1f}%"
-                    cv2.putText(rgb_image, text, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 255, 0), 2)
-
-                    # Update results
-                    result_text = f"Plate: {plate['text']}\nOwner: {plate['owner']}\nVehicle Type: {plate['vehicle']}\nConfidence: {confidence_percent:.1f}%\n\n"
-                    self.image_results.insertPlainText(result_text)
-
-                    # If plate is not in the database, ask for owner information
-                    if plate['owner'] == "Not in database":
-                        owner, ok = QInputDialog.getText(
-                            self,
-                            "Owner Information",
-                            f"Plate '{plate['text']}' not found in database.\nPlease enter owner name:",
-                            QLineEdit.Normal,
-                            ""
-                        )
-                        if ok and owner:
-                            try:
-                                self.db.insert_plate(plate['text'], owner, plate['vehicle'])
-                                # Update information
-                                plate['owner'] = owner
-                                # Refresh results
-                                self.image_results.clear()
-                                for p in plates:
-                                    self.image_results.insertPlainText(
-                                        f"Plate: {p['text']}\nOwner: {p['owner']}\nVehicle Type: {p['vehicle']}\nConfidence: {p['confidence'] * 100:.1f}%\n\n"
-                                    )
-                            except Exception as e:
-                                QMessageBox.warning(self, "Error", f"Failed to save to database: {str(e)}")
+                    if plate.owner == "Not in database":
+                        item = QListWidgetItem(f"{plate.text} ({plate.vehicle})")
+                        item.setData(Qt.UserRole, plate)
+                        self.unknown_plates.addItem(item)
 
                 # Update displayed image
-                h, w, ch = rgb_image.shape
-                bytes_per_line = ch * w
-                qt_image = QImage(rgb_image.data, w, h, bytes_per_line, QImage.Format_RGB888)
-                pixmap = QPixmap.fromImage(qt_image)
+                qt_image = self.image_renderer.render(image, plates, self.image_label.width(),
+                                                      self.image_label.height())
                 self.image_results.ensureCursorVisible()  # Scroll to the bottom
-                self.image_label.setPixmap(
-                    pixmap.scaled(self.image_label.width(), self.image_label.height(), Qt.KeepAspectRatio))
+                self.image_label.setPixmap(QPixmap.fromImage(qt_image))
+
+    def show_image_results(self):
+        self.image_results.clear()
+        for plate in self.image_plates:
+            self.image_results.insertPlainText(
+                f"Plate: {plate.text}\nOwner: {plate.owner}\nVehicle Type: {plate.vehicle}\nConfidence: {plate.confidence * 100:.1f}%\n\n"
+            )
+
+    def register_unknown_plate(self, item):
+        # Ask for the owner of a plate from the Not in Database list and save it
+        if item is None:
+            return
+        plate = item.data(Qt.UserRole)
+        owner, ok = QInputDialog.getText(
+            self,
+            "Owner Information",
+            f"Plate '{plate.text}' not found in database.\nPlease enter owner name:",
+            QLineEdit.Normal,
+            ""
+        )
+        if ok and owner:
+            try:
+                self.db.insert_plate(plate.text, owner, plate.vehicle)
+            except Exception as e:
+                QMessageBox.warning(self, "Error", f"Failed to save to database: {str(e)}")
+                return
+            plate.owner = owner
+            self.unknown_plates.takeItem(self.unknown_plates.row(item))
+            self.show_image_results()
 
     # Video functions
     def load_video(self):
@@ -582,32 +747,31 @@ class MainWindow(QMainWindow):
             self.video_file_label.setText(f"Video loaded: {file_path}")
 
     def play_video(self):
-        # Play the loaded video with plate detection
+        # Play the loaded video with plate detection, once the models are ready
         if not self.detector:
-            self.initialize_detector()
-
-        if self.cap and not hasattr(self, 'current_video_path'):
-            self.stop_camera()
+            self.initialize_detector(then=self.play_video)
+            return
 
         if not hasattr(self, 'current_video_path'):
             QMessageBox.warning(self, "Warning", "Please load a video first!")
             return
 
-        self.cap = cv2.VideoCapture(self.current_video_path)
-        if not self.cap.isOpened():
+        # Only one source runs at a time
+        if self.active_display and self.active_display[0] is self.video_label:
+            self.stop_camera()
+
+        if not self.start_worker(self.current_video_path, self.video_file_label, self.video_results,
+                                 offline=self.offline_video_check.isChecked()):
             QMessageBox.critical(self, "Error", "Could not open video file!")
             return
 
         self.btn_play_video.setEnabled(False)
         self.btn_stop_video.setEnabled(True)
-        self.timer.start(30)  # Same as camera update rate
 
     def stop_video(self):
         # Stop video playback
-        self.timer.stop()
-        if self.cap:
-            self.cap.release()
-            self.cap = None
+        if self.active_display and self.active_display[0] is self.video_file_label:
+            self.stop_worker()
 
         if hasattr(self, 'current_video_path'):
             del self.current_video_path
@@ -619,17 +783,8 @@ class MainWindow(QMainWindow):
 
     # Database functions
     def load_database(self):
-        # Load all plates from database into the table
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM Plates ORDER BY id DESC")
-        data = cursor.fetchall()
-        conn.close()
-
-        self.table.setRowCount(len(data))
-        for row_idx, row_data in enumerate(data):
-            for col_idx, col_data in enumerate(row_data):
-                self.table.setItem(row_idx, col_idx, QTableWidgetItem(str(col_data)))
+        # Show all plates, the model loads the first page and the rest while scrolling
+        self.plate_model.set_search(None)
 
     def search_database(self):
         # Search plates in database
@@ -638,20 +793,14 @@ class MainWindow(QMainWindow):
             self.load_database()
             return
 
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT * FROM Plates 
-            WHERE plate LIKE ? OR owner LIKE ? OR vehicle_type LIKE ? OR date_time LIKE ?
-            ORDER BY id DESC
-        """, (f"%{search_term}%", f"%{search_term}%", f"%{search_term}%", f"%{search_term}%"))
-        data = cursor.fetchall()
-        conn.close()
-
-        self.table.setRowCount(len(data))
-        for row_idx, row_data in enumerate(data):
-            for col_idx, col_data in enumerate(row_data):
-                self.table.setItem(row_idx, col_idx, QTableWidgetItem(str(col_data)))
+        self.plate_model.set_search(search_term)
+
+    def selected_plate_row(self):
+        # (id, plate, owner, vehicle_type, date_time) of the selected table row as text, or None
+        index = self.table.currentIndex()
+        if not index.isValid():
+            return None
+        return [str(value) for value in self.plate_model.row_data(index.row())]
 
     def add_plate(self):
         # Add new plate to database
@@ -670,10 +819,9 @@ class MainWindow(QMainWindow):
 
     def remove_plate(self):
         # Remove selected plate from database
-        selected_row = self.table.currentRow()
-        if selected_row >= 0:
-            plate_id = self.table.item(selected_row, 0).text()
-            plate = self.table.item(selected_row, 1).text()
+        selected = self.selected_plate_row()
+        if selected:
+            plate_id, plate = selected[0], selected[1]
 
             reply = QMessageBox.question(
                 self, "Confirm",
@@ -682,11 +830,7 @@ class MainWindow(QMainWindow):
             )
 
             if reply == QMessageBox.Yes:
-                conn = sqlite3.connect(self.db_path)
-                cursor = conn.cursor()
-                cursor.execute("DELETE FROM Plates WHERE id = ?", (plate_id,))
-                conn.commit()
-                conn.close()
+                self.db.delete_plate(plate_id)
 
                 self.load_database()
                 QMessageBox.information(self, "Success", "Plate removed successfully!")
@@ -694,17 +838,16 @@ class MainWindow(QMainWindow):
     # QR Code functions
     def generate_qr_code(self):
         # Generate QR code for selected plate
-        selected_row = self.table.currentRow()
-        if selected_row >= 0:
+        selected = self.selected_plate_row()
+        if selected:
             # Get plate information (excluding date_time)
-            plate_number = self.table.item(selected_row, 1).text()
-            owner = self.table.item(selected_row, 2).text()
-            vehicle_type = self.table.item(selected_row, 3).text()
+            plate_number, owner, vehicle_type = selected[1], selected[2], selected[3]
 
             # Create data string (without date)
             data = f"Plate: {plate_number}\nOwner: {owner}\nVehicle: {vehicle_type}"
 
-            # Generate QR code
+            # Generate QR code, qrcode is imported here as it is rarely needed
+            import qrcode
             qr = qrcode.QRCode(
                 version=1,
                 error_correction=qrcode.constants.ERROR_CORRECT_L,
@@ -730,7 +873,8 @@ class MainWindow(QMainWindow):
 
         if file_path:
             try:
-                # Read the image and decode QR code
+                # Read the image and decode QR code, pyzbar is imported here as it is rarely needed
+                from pyzbar.pyzbar import decode
                 image = cv2.imread(file_path)
                 decoded_objects = decode(image)
 
@@ -770,9 +914,9 @@ class MainWindow(QMainWindow):
 
     def generate_shareable_link(self):
         # Generate a shareable HTML page with vehicle info
-        selected_row = self.table.currentRow()
-        if selected_row >= 0:
-            plate_number = self.table.item(selected_row, 1).text()
+        selected = self.selected_plate_row()
+        if selected:
+            plate_number = selected[1]
 
             html_content = f"""
             <html>
@@ -800,19 +944,59 @@ class MainWindow(QMainWindow):
                 QMessageBox.information(self, "Success", f"Shareable link saved as {file_path}")
 
     def export_to_csv(self):
-        try:
-            # Connect to the database and read all data
-            conn = sqlite3.connect(self.db_path)
-            df = pd.read_sql_query("SELECT * FROM Plates", conn)
-            conn.close()
+        if self.export_worker:
+            QMessageBox.warning(self, "Warning", "An export is already running!")
+            return
 
-            # Ask user where to save the file
-            file_path, _ = QFileDialog.getSaveFileName(self, "Save as CSV", "plates.csv", "CSV Files (*.csv)")
-            if file_path:
-                df.to_csv(file_path, index=False, encoding='utf-8-sig')
-                QMessageBox.information(self, "Success", "Plate data exported to CSV successfully!")
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Failed to export data: {str(e)}")
+        # Ask user where to save the file
+        file_path, selected_filter = QFileDialog.getSaveFileName(
+            self, "Export Plates", "plates.csv", "CSV Files (*.csv);;Parquet Files (*.parquet)")
+        if not file_path:
+            return
+        if "parquet" in selected_filter and not file_path.lower().endswith(".parquet"):
+            file_path += ".parquet"
+
+        # The table is streamed to the file in the background, the dialog only shows progress
+        self.export_progress = QProgressDialog("Exporting plates...", "Cancel", 0, 0, self)
+        self.export_progress.setWindowTitle("Export")
+        self.export_progress.setMinimumDuration(500)
+
+        self.export_worker = ExportWorker(self.db, file_path, self)
+        self.export_worker.progress.connect(self.on_export_progress)
+        self.export_worker.succeeded.connect(self.on_export_succeeded)
+        self.export_worker.failed.connect(self.on_export_failed)
+        self.export_worker.cancelled.connect(self.on_export_finished)
+        self.export_progress.canceled.connect(self.export_worker.cancel)
+        self.export_worker.start()
+
+    def on_export_progress(self, written, total):
+        self.export_progress.setMaximum(total)
+        self.export_progress.setValue(written)
+
+    def on_export_succeeded(self, written):
+        self.on_export_finished()
+        QMessageBox.information(self, "Success", f"{written} plates exported successfully!")
+
+    def on_export_failed(self, message):
+        self.on_export_finished()
+        QMessageBox.critical(self, "Error", f"Failed to export data: {message}")
+
+    def on_export_finished(self):
+        self.export_progress.close()
+        self.export_worker.wait()
+        self.export_worker.deleteLater()
+        self.export_worker = None
+
+    def import_from_csv(self):
+        # Import plate records from a CSV file in the export format
+        file_path, _ = QFileDialog.getOpenFileName(self, "Import CSV", "", "CSV Files (*.csv)")
+        if file_path:
+            try:
+                count = self.db.import_from_csv(file_path)
+                self.load_database()
+                QMessageBox.information(self, "Success", f"{count} plates imported successfully!")
+            except Exception as e:
+                QMessageBox.critical(self, "Error", f"Failed to import data: {str(e)}")
 
     # Settings functions
     def save_settings(self):
@@ -820,7 +1004,7 @@ class MainWindow(QMainWindow):
         self.plate_model_path = self.plate_path_edit.text()
         self.char_model_path = self.char_path_edit.text()
         self.vehicle_model_path = self.vehicle_path_edit.text()
-        self.db_path = self.db_path_edit.text()
+        db_path = self.db_path_edit.text()
 
         # Get threshold and cooldown values
         try:
@@ -841,35 +1025,247 @@ class MainWindow(QMainWindow):
             self.settings_status.setStyleSheet("color: red;")
             return
 
-        # Reinitialize detector with new settings
-        self.initialize_detector()
+        try:
+            sizes = [self.parse_imgsz(edit.text())
+                     for edit in (self.plate_imgsz_edit, self.char_imgsz_edit, self.vehicle_imgsz_edit)]
+        except ValueError as e:
+            self.settings_status.setText(f"Invalid inference size: {str(e)}")
+            self.settings_status.setStyleSheet("color: red;")
+            return
+        self.plate_imgsz, self.char_imgsz, self.vehicle_imgsz = sizes
+
+        self.motion_gate = self.motion_gate_check.isChecked()
+        self.motion_roi = self.motion_roi_check.isChecked()
+
+        port = int(self.metrics_port_edit.text()) if self.metrics_port_edit.text().strip() else None
+        if port != self.metrics_port:
+            if self.metrics_server:
+                self.metrics_server.stop()
+                self.metrics_server = None
+            self.metrics_port = None
+            if port:
+                try:
+                    self.metrics_server = MetricsServer(port).start()
+                    self.metrics_port = port
+                except OSError as e:
+                    self.settings_status.setText(f"Could not serve metrics on port {port}: {str(e)}")
+                    self.settings_status.setStyleSheet("color: red;")
+                    return
+
+        try:
+            self.configure_alert_sinks(self.alert_log_edit.text().strip() or None,
+                                       self.webhook_edit.text().strip() or None)
+        except (OSError, ValueError) as e:
+            self.settings_status.setText(f"Invalid alert settings: {str(e)}")
+            self.settings_status.setStyleSheet("color: red;")
+            return
+
+        # The running camera or video keeps the old detector, stop it
+        self.stop_active_source()
 
         # Update database connection
-        self.db = DatabaseManager(self.db_path)
+        if db_path != self.db_path:
+            self.db_path = db_path
+            self.event_log.close()
+            self.db.close()
+            self.db = DatabaseManager(self.db_path)
+            self.event_log = DetectionLogWriter(self.db)
+            self.plate_model.db = self.db
+            self.load_database()
+
+        # Reload only the models whose path or size changed, other settings apply to the loaded detector
+        if self.model_loader or not self.detector or self.detector.model_config != self.model_config():
+            self.initialize_detector()
+        else:
+            self.detector.conf_threshold = self.conf_threshold
+            self.detector.cooldown = self.cooldown
+            self.detector.db = self.db
+            self.detector.event_log = self.event_log
 
         self.settings_status.setText("Settings saved successfully!")
         self.settings_status.setStyleSheet("color: green;")
 
-    def initialize_detector(self):
-        # Initialize the plate detector with current settings
+    def configure_alert_sinks(self, log_path, webhook_url):
+        # Swap the log file and webhook sinks of the alert bus for the given ones, None turns a sink off
+        if webhook_url and not webhook_url.startswith(("http://", "https://")):
+            raise ValueError("Webhook URL must start with http:// or https://")
+        if log_path != self.alert_log_path:
+            new_sink = LogFileSink(log_path) if log_path else None  # Raises OSError before anything is changed
+            if self.alert_sinks.get('log'):
+                self.alert_bus.remove_sink(self.alert_sinks.pop('log'))
+            if new_sink:
+                self.alert_sinks['log'] = self.alert_bus.add_sink(new_sink)
+            self.alert_log_path = log_path
+        if webhook_url != self.webhook_url:
+            if self.alert_sinks.get('webhook'):
+                self.alert_bus.remove_sink(self.alert_sinks.pop('webhook'))
+            if webhook_url:
+                self.alert_sinks['webhook'] = self.alert_bus.add_sink(WebhookSink(webhook_url))
+            self.webhook_url = webhook_url
+
+    @staticmethod
+    def parse_imgsz(text):
+        # Empty means the model default, YOLO needs a multiple of its 32 pixel stride
+        if not text.strip():
+            return None
+        size = int(text)
+        if size < 32 or size % 32:
+            raise ValueError("Sizes must be multiples of 32")
+        return size
+
+    def model_config(self):
+        # Model paths and sizes, in the form CarPlateDetector.model_config keeps them
+        return {
+            'plate_model': (self.plate_model_path, self.plate_imgsz),
+            'char_detector': (self.char_model_path, self.char_imgsz),
+            'vehicle_detector': (self.vehicle_model_path, self.vehicle_imgsz),
+        }
+
+    def initialize_detector(self, then=None):
+        # Load the plate detector with current settings in the background. then is called once it is ready.
+        if then:
+            self.pending_action = then
+        if self.model_loader:
+            self.reload_models = True  # Load again with the newest settings when the running load is done
+            return
+
+        settings = {
+            'plate_model_path': self.plate_model_path,
+            'char_model_path': self.char_model_path,
+            'vehicle_model_path': self.vehicle_model_path,
+            'conf_threshold': self.conf_threshold,
+            'cooldown': self.cooldown,
+            'db': self.db,
+            'event_log': self.event_log,
+            'plate_imgsz': self.plate_imgsz,
+            'char_imgsz': self.char_imgsz,
+            'vehicle_imgsz': self.vehicle_imgsz,
+        }
+        # Unchanged models of the current detector are reused, detection waits until the new one is ready
+        reuse, self.detector = self.detector, None
+        self.model_loader = ModelLoader(settings, reuse, self)
+        self.model_loader.progress.connect(self.on_models_progress)
+        self.model_loader.loaded.connect(self.on_models_loaded)
+        self.model_loader.failed.connect(self.on_models_failed)
+        self.load_progress.show()
+        self.model_loader.start()
+
+    def finish_model_loading(self):
+        self.model_loader.wait()
+        self.model_loader.deleteLater()
+        self.model_loader = None
+        self.load_progress.hide()
+
+    def on_models_progress(self, message):
+        self.statusBar().showMessage(f"{message}...")
+
+    def on_models_loaded(self, detector):
+        self.finish_model_loading()
+
+        # Settings may have changed the database while loading
+        detector.db = self.db
+        detector.event_log = self.event_log
+
+        # Alerts go through the alert bus, errors to the GUI thread
+        detector.on_alert = self.alert_bus.publish
+        detector.on_error = self.detection_error.emit
+        self.detector = detector
+
+        if self.reload_models:
+            self.reload_models = False
+            self.initialize_detector()
+            return
+
+        self.statusBar().showMessage("Models ready", 3000)
+        action, self.pending_action = self.pending_action, None
+        if action:
+            action()
+
+    def on_models_failed(self, message):
+        self.finish_model_loading()
+        self.statusBar().clearMessage()
+        if self.reload_models:
+            self.reload_models = False
+            self.initialize_detector()
+            return
+
+        # The eager load at startup (or after saving settings) fails quietly, e.g. on a checkout without the
+        # weights where only the Database page is used. A dialog only when the user is waiting to detect.
+        action, self.pending_action = self.pending_action, None
+        if action:
+            QMessageBox.critical(self, "Error", f"Failed to initialize detector: {message}")
+        else:
+            self.statusBar().showMessage(f"Models not loaded: {message}")
+
+    def toggle_metrics_overlay(self, checked):
+        self.metrics_overlay.setVisible(checked)
+        if checked:
+            self.refresh_metrics_overlay()
+
+    def refresh_metrics_overlay(self):
+        # Latency percentiles of every stage over the last refresh interval, plus drop and cache counters
+        if not self.metrics_check.isChecked():
+            return
+        now = time.perf_counter()
+        elapsed, self.metrics_refreshed = now - self.metrics_refreshed, now
+
+        lines = [f"{'stage':<18}{'p50 ms':>8}{'p95 ms':>8}{'per s':>7}"]
+        for stage, histogram in sorted(registry.stages().items()):
+            counts, _ = histogram.snapshot()
+            previous = self.metrics_snapshots.get(stage, [0] * len(counts))
+            self.metrics_snapshots[stage] = counts
+            recent = [c - p for c, p in zip(counts, previous)]
+            if sum(recent):
+                p50 = quantile(histogram.buckets, recent, 0.5) * 1000
+                p95 = quantile(histogram.buckets, recent, 0.95) * 1000
+                lines.append(f"{stage:<18}{p50:>8.1f}{p95:>8.1f}{sum(recent) / elapsed:>7.1f}")
+
+        hit_ratio = registry.value('lpr_owner_cache_hit_ratio')
+        lines.append(f"dropped {registry.total('lpr_frames_dropped_total')}  "
+                     f"skipped {registry.total('lpr_frames_skipped_total')}  "
+                     f"cache hits {hit_ratio or 0:.0%}")
+        self.metrics_overlay.setText("\n".join(lines))
+        self.metrics_overlay.adjustSize()
+
+    def show_plate_alert(self, alert):
+        # Add an alert for a plate found in the database to the top of the panel, nothing to acknowledge
+        source = f"  [{alert.source}]" if alert.source is not None else ""
+        self.alert_list.insertItem(
+            0, f"{alert.timestamp:%H:%M:%S}  {alert.plate}  {alert.owner} ({alert.vehicle_type or 'Unknown'}){source}")
+        while self.alert_list.count() > 500:
+            self.alert_list.takeItem(self.alert_list.count() - 1)
+        self.statusBar().showMessage(f"Vehicle found: {alert.plate} - {alert.owner}", 5000)
+
+    def show_detection_error(self, message):
+        # A failing model fails on every frame. Errors always go to the status bar, the dialog opens only when
+        # none is open and not for the same error again within a minute.
+        self.statusBar().showMessage(f"Detection error: {message}", 5000)
+        now = time.monotonic()
+        if self.error_dialog_open or (message == self.last_error[0] and now - self.last_error[1] < 60):
+            return
+
+        self.error_dialog_open = True
         try:
-            self.detector = CarPlateDetector(
-                plate_model_path=self.plate_model_path,
-                char_model_path=self.char_model_path,
-                vehicle_model_path=self.vehicle_model_path,
-                conf_threshold=self.conf_threshold,
-                cooldown=self.cooldown
-            )
-            # Set the parent window for showing dialogs
-            self.detector.set_parent_window(self)
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Failed to initialize detector: {str(e)}")
-            self.detector = None
+            QMessageBox.warning(self, "Detection Error", f"An error occurred: {message}")
+        finally:
+            self.error_dialog_open = False
+            self.last_error = (message, time.monotonic())
 
     def closeEvent(self, event):
         # Handle application close event
         self.stop_camera()
         self.stop_video()
+        self.stop_worker()
+        if self.model_loader:
+            self.model_loader.wait()  # A model load can not be interrupted
+        if self.export_worker:
+            self.export_worker.cancel()
+            self.export_worker.wait()
+        if self.metrics_server:
+            self.metrics_server.stop()
+        self.alert_bus.close(timeout=2)
+        self.event_log.close()  # Flush pending detection events before the database goes away
+        self.db.close()
         event.accept()
 
 
@@ -0,0 +1,193 @@
+import bisect
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Instrumentation of the detection pipeline: stage latencies and queue depths as histograms, dropped/skipped
+# frames as counters and cache statistics as gauges. Recording is a bisect and a few additions under a lock,
+# cheap enough to stay on. The registry renders the Prometheus text format, MetricsServer serves it locally.
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)  # Seconds
+DEPTH_BUCKETS = (0, 1, 2, 4, 8, 16, 32, 64)
+
+
+def quantile(buckets, counts, q):
+    # Estimate the q-quantile from per-bucket counts (last one is +Inf) by interpolating inside the bucket
+    total = sum(counts)
+    if not total:
+        return None
+    rank = q * total
+    seen = 0
+    for i, count in enumerate(counts):
+        if seen + count >= rank and count:
+            if i == len(buckets):
+                return buckets[-1]  # Beyond the last bound, the bound is the best estimate
+            lower = buckets[i - 1] if i else 0.0
+            return lower + (buckets[i] - lower) * (rank - seen) / count
+        seen += count
+    return buckets[-1]
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # Per bucket, not cumulative, the last one is +Inf
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+
+    def snapshot(self):
+        # (counts, sum) at this moment, the difference of two snapshots describes the time in between
+        with self._lock:
+            return list(self.counts), self.sum
+
+    def quantile(self, q):
+        return quantile(self.buckets, self.snapshot()[0], q)
+
+
+class Counter:
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+
+class MetricsRegistry:
+    # Metrics by name and labels. Asking twice for the same name and labels returns the same metric,
+    # so components can look their metrics up once and keep them.
+    def __init__(self):
+        self._families = {}  # name -> (kind, help, {labels: metric or callback})
+        self._lock = threading.Lock()
+
+    def _get(self, kind, name, help, labels, factory):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            family = self._families.setdefault(name, (kind, help, {}))
+            metrics = family[2]
+            if key not in metrics:
+                metrics[key] = factory()
+            return metrics[key]
+
+    def histogram(self, name, help, buckets=LATENCY_BUCKETS, **labels):
+        return self._get('histogram', name, help, labels, lambda: Histogram(buckets))
+
+    def counter(self, name, help, **labels):
+        return self._get('counter', name, help, labels, Counter)
+
+    def gauge(self, name, help, fn, kind='gauge', **labels):
+        # Value read from fn() when rendered, e.g. a cache size. Registering again replaces the callback.
+        # kind='counter' for callbacks that return an ever increasing total.
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._families.setdefault(name, (kind, help, {}))[2][key] = fn
+
+    def stage(self, stage):
+        # Latency histogram of one pipeline stage
+        return self.histogram('lpr_stage_seconds', 'Time spent per pipeline stage', stage=stage)
+
+    def stages(self):
+        # {stage: Histogram} of every stage recorded so far
+        with self._lock:
+            family = self._families.get('lpr_stage_seconds')
+            return {dict(key)['stage']: metric for key, metric in family[2].items()} if family else {}
+
+    def value(self, name, **labels):
+        # Current value of a counter or gauge, None when it does not exist
+        with self._lock:
+            family = self._families.get(name)
+            metric = family[2].get(tuple(sorted(labels.items()))) if family else None
+        if isinstance(metric, Counter):
+            return metric.value
+        if metric is not None:
+            return metric()
+        return None
+
+    def total(self, name):
+        # Sum of a counter over all its labels
+        with self._lock:
+            family = self._families.get(name)
+            metrics = list(family[2].values()) if family else []
+        return sum(m.value if isinstance(m, Counter) else m() for m in metrics)
+
+    def render(self):
+        # Prometheus text exposition format
+        with self._lock:
+            families = [(name, kind, help, list(metrics.items()))
+                        for name, (kind, help, metrics) in sorted(self._families.items())]
+
+        lines = []
+        for name, kind, help, metrics in families:
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for key, metric in metrics:
+                if isinstance(metric, Histogram):
+                    counts, total = metric.snapshot()
+                    cumulative = 0
+                    for bound, count in zip(metric.buckets + (float('inf'),), counts):
+                        cumulative += count
+                        le = '+Inf' if bound == float('inf') else repr(float(bound))
+                        lines.append(f"{name}_bucket{_labels(key + (('le', le),))} {cumulative}")
+                    lines.append(f"{name}_sum{_labels(key)} {total}")
+                    lines.append(f"{name}_count{_labels(key)} {cumulative}")
+                else:
+                    try:
+                        value = metric.value if isinstance(metric, Counter) else metric()
+                    except Exception:
+                        continue  # A callback whose object is gone, e.g. a closed database
+                    lines.append(f"{name}{_labels(key)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(key):
+    if not key:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in key) + "}"
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# Process-wide registry the detector, pipelines and GUI record into
+registry = MetricsRegistry()
+
+
+class MetricsServer:
+    # Serves the registry at http://host:port/metrics for Prometheus, on localhost unless told otherwise
+    def __init__(self, port, host="127.0.0.1", metrics=None):
+        metrics = metrics or registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = metrics.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # No line per scrape
+
+        self.server = ThreadingHTTPServer((host, port), Handler)  # Raises OSError when the port is taken
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,28 @@
+from PyQt5.QtCore import QThread, pyqtSignal
+from CarPlateDetector import CarPlateDetector
+
+
+class ModelLoader(QThread):
+    # Builds and warms up a CarPlateDetector in the background so the window stays responsive while the
+    # models load. Models of reuse whose path and size did not change are taken over instead of reloaded.
+    progress = pyqtSignal(str)  # Current step
+    loaded = pyqtSignal(object)  # The ready CarPlateDetector
+    failed = pyqtSignal(str)
+
+    def __init__(self, settings, reuse=None, parent=None):
+        super().__init__(parent)
+        self.settings = settings  # Keyword arguments of CarPlateDetector
+        self.reuse = reuse
+
+    def run(self):
+        try:
+            detector = CarPlateDetector(**self.settings, reuse=self.reuse, progress=self.progress.emit)
+            self.progress.emit("Warming up models")
+            detector.warm_up()
+
+            # Warm the owner cache so plate lookups during detection do not hit the disk
+            self.progress.emit("Loading owner cache")
+            detector.db.preload_owner_cache()
+            self.loaded.emit(detector)
+        except Exception as e:
+            self.failed.emit(str(e))
@@ -1,43 +1,64 @@
-from ultralytics import YOLO
+from InferenceBackend import load_model, letterbox
 
 
 class PlateCharacterDetector:
-    def __init__(self, model_path):
-        # Load the YOLO Model
-        self.model = YOLO(model_path)
+    def __init__(self, model_path, imgsz=640, max_batch=16):
+        # Load the YOLO Model, exported ONNX/OpenVINO models work as well
+        self.model = load_model(model_path, imgsz=imgsz)
+        self.imgsz = imgsz  # Square input size the crops are letterboxed to, plates are small so 160-256 often suffice
+        self.max_batch = max_batch  # Upper bound of crops per forward pass
 
     def detect_characters(self, plate_img):
 
         results = self.model(plate_img)
-        characters = []
+        return self._plate_text(results)
 
-        for result in results:
-            for box in result.boxes:
-                # Get the x-coordinate left of the bounding box for sorting
-                x1, _, _, _ = map(int, box.xyxy[0].tolist())
+    def detect_characters_batch(self, plate_imgs, with_confidence=False):
+        # Recognize the characters of several plate crops with batched inference, texts keep the input order.
+        # with_confidence returns a list of (character, confidence) pairs per crop instead of the text.
+        texts = [[] if with_confidence else "" for _ in plate_imgs]
+
+        # Empty crops can not be resized, they simply produce no text
+        indices = [i for i, img in enumerate(plate_imgs) if img is not None and img.size > 0]
+
+        for start in range(0, len(indices), self.max_batch):
+            chunk = indices[start:start + self.max_batch]
+            batch = [letterbox(plate_imgs[i], self.imgsz)[0] for i in chunk]
+            results = self.model(batch, imgsz=self.imgsz)
+
+            for i, result in zip(chunk, results):
+                characters = self._plate_characters([result])
+                texts[i] = characters if with_confidence else ''.join(c for c, _ in characters)
 
-                # Get the class ID and corresponding label character
-                cls_id = int(box.cls[0])
-                label = result.names.get(cls_id, '?')
+        return texts
 
-                # Store character and its x-position
-                characters.append((x1, label))
+    def _plate_text(self, results):
+        return ''.join(c for c, _ in self._plate_characters(results))
+
+    @staticmethod
+    def _plate_characters(results):
+        # Plate characters left to right as (character, confidence) pairs
+        characters = []
+
+        for result in results:
+            boxes = result.boxes
+            # Left x-coordinate of every box for sorting, class ID and corresponding label character, confidence
+            x1 = boxes.xyxy[:, 0].astype(int).tolist()
+            labels = [result.names.get(cls_id, '?') for cls_id in boxes.cls.astype(int).tolist()]
+            characters.extend(zip(x1, labels, boxes.conf.tolist()))
 
         # Sort characters by their x-coordinate left to right
         characters.sort(key=lambda x: x[0])
 
-        # Bound characters to form the plate text
-        plate_text = ''.join(label for _, label in characters)
-
         # Remove any non-alphanumeric characters
-        plate_text = ''.join(c for c in plate_text if c.isalnum())
+        plate_chars = [(label, conf) for _, label, conf in characters if label.isalnum()]
 
          #For the Turkish Plate
-        if len(plate_text) > 1 and plate_text[0].isalpha() and plate_text[1].isdigit():
-            plate_text = plate_text[1:]
+        if len(plate_chars) > 1 and plate_chars[0][0].isalpha() and plate_chars[1][0].isdigit():
+            plate_chars = plate_chars[1:]
 
 
-        if len(plate_text) > 1 and plate_text[-1].isalpha() and plate_text[-2].isdigit():
-            plate_text = plate_text[:-1]
+        if len(plate_chars) > 1 and plate_chars[-1][0].isalpha() and plate_chars[-2][0].isdigit():
+            plate_chars = plate_chars[:-1]
 
-        return plate_text
+        return plate_chars
@@ -0,0 +1,84 @@
+import csv
+import os
+
+
+class ExportCancelled(Exception):
+    pass
+
+
+class PlateExporter:
+    # Streams plate records from the database into CSV or Parquet files chunk by chunk,
+    # so memory use does not depend on the size of the table
+    FORMATS = ("csv", "parquet")
+
+    def __init__(self, db, chunk_size=10000):
+        self.db = db
+        self.chunk_size = chunk_size
+
+    def export(self, file_path, fmt=None, start=None, end=None, vehicle_type=None, search_term=None,
+               progress=None, cancel_event=None):
+        # Write the matching records to file_path and return how many were written.
+        # The format follows the file extension unless given, progress is called with (written, total) after
+        # every chunk and setting cancel_event stops the export and removes the partial file.
+        fmt = (fmt or os.path.splitext(file_path)[1].lstrip(".") or "csv").lower()
+        if fmt not in self.FORMATS:
+            raise ValueError(f"Unsupported export format: {fmt}")
+
+        filters = dict(start=start, end=end, vehicle_type=vehicle_type, search_term=search_term)
+        total = self.db.count_plates(**filters) if progress else 0
+        chunks = self.db.iter_plates(chunk_size=self.chunk_size, **filters)
+
+        try:
+            if fmt == "parquet":
+                return self._write_parquet(file_path, chunks, total, progress, cancel_event)
+            return self._write_csv(file_path, chunks, total, progress, cancel_event)
+        except ExportCancelled:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+            raise
+        finally:
+            chunks.close()  # Hands the database connection back to the pool
+
+    def _write_csv(self, file_path, chunks, total, progress, cancel_event):
+        written = 0
+        with open(file_path, "w", newline="", encoding="utf-8-sig") as f:
+            writer = csv.writer(f)
+            writer.writerow(self.db.PLATE_COLUMNS)
+            for rows in chunks:
+                writer.writerows(rows)
+                written = self._advance(written, len(rows), total, progress, cancel_event)
+        return written
+
+    def _write_parquet(self, file_path, chunks, total, progress, cancel_event):
+        # pyarrow is only needed for this format, import it on first use
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet export requires the pyarrow package")
+
+        schema = pa.schema([
+            ("id", pa.int64()),
+            ("plate", pa.string()),
+            ("owner", pa.string()),
+            ("vehicle_type", pa.string()),
+            ("date_time", pa.string()),
+        ])
+
+        written = 0
+        with pq.ParquetWriter(file_path, schema) as writer:
+            for rows in chunks:
+                columns = list(zip(*rows))
+                writer.write_batch(pa.record_batch([pa.array(column, type=field.type)
+                                                    for column, field in zip(columns, schema)], schema=schema))
+                written = self._advance(written, len(rows), total, progress, cancel_event)
+        return written
+
+    @staticmethod
+    def _advance(written, count, total, progress, cancel_event):
+        written += count
+        if progress:
+            progress(written, total)
+        if cancel_event is not None and cancel_event.is_set():
+            raise ExportCancelled()
+        return written
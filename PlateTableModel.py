@@ -0,0 +1,88 @@
+from collections import OrderedDict
+
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+
+class PlateTableModel(QAbstractTableModel):
+    # Table model for the Plates table that only holds the pages around what the view shows.
+    # The row count comes from a COUNT query, so the scroll bar covers the whole table. Pages are read when a
+    # row of them is drawn: the page after a loaded one continues from its last row (keyset pagination), a jump
+    # with the scroll bar reads its page by offset. At most max_pages pages are kept, the least recently drawn
+    # ones are dropped. Sorting and searching run in SQL.
+    HEADERS = ["ID", "Plate", "Owner", "Vehicle Type", "Date/Time"]
+
+    def __init__(self, db, page_size=200, max_pages=20, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self.page_size = page_size
+        self.max_pages = max_pages
+
+        self.sort_column = "id"
+        self.descending = True
+        self.search_term = None
+
+        self._count = 0
+        self._pages = OrderedDict()  # page number -> rows, least recently used first
+        self._cursors = {0: None}  # page number -> (sort value, id) of the last row of the page before it
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._count
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and index.isValid():
+            row = self.row_data(index.row())
+            return str(row[index.column()]) if row else None
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self.sort_column = self.db.PLATE_COLUMNS[column]
+        self.descending = order == Qt.DescendingOrder
+        self.refresh()
+
+    def set_search(self, search_term):
+        self.search_term = search_term or None
+        self.refresh()
+
+    def refresh(self):
+        # Drop the loaded pages and count the rows again
+        self.beginResetModel()
+        self._pages.clear()
+        self._cursors = {0: None}
+        self._count = self.db.count_plates(search_term=self.search_term)
+        self.endResetModel()
+
+    def row_data(self, row):
+        # Raw (id, plate, owner, vehicle_type, date_time) tuple of a row, None when the table has fewer rows
+        # now than when it was counted
+        number, offset = divmod(row, self.page_size)
+        page = self._page(number)
+        return page[offset] if offset < len(page) else None
+
+    def _page(self, number):
+        page = self._pages.get(number)
+        if page is not None:
+            self._pages.move_to_end(number)
+            return page
+
+        if number in self._cursors:
+            page = self.db.fetch_plates_page(self._cursors[number], self.page_size, self.sort_column,
+                                             self.descending, self.search_term)
+        else:
+            page = self.db.fetch_plates_at(number * self.page_size, self.page_size, self.sort_column,
+                                           self.descending, self.search_term)
+        if page:
+            last = page[-1]
+            self._cursors[number + 1] = (last[self.db.PLATE_COLUMNS.index(self.sort_column)], last[0])
+
+        self._pages[number] = page
+        while len(self._pages) > self.max_pages:
+            self._pages.popitem(last=False)
+        return page
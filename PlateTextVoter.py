@@ -0,0 +1,56 @@
+from collections import defaultdict
+
+
+class PlateTextVoter:
+    # Combines several OCR reads of the same plate into one text by confidence weighted voting:
+    # first on the plate length, then on the character at every position of that length.
+    def __init__(self, agreement=0.7, min_reads=3):
+        self.agreement = agreement  # Weight share the winning length and every winning character need
+        self.min_reads = min_reads  # Reads needed before a consensus can be committed
+
+        self.reads = 0
+        self.committed = None  # Consensus text once agreed on, it never changes afterwards
+        self._length_weights = defaultdict(float)
+        self._positions = {}  # length -> [{character: weight}] per position
+
+    def add(self, characters):
+        # Add one read as (character, confidence) pairs, returns the committed text or None
+        if self.committed is not None or not characters:
+            return self.committed
+
+        self.reads += 1
+        self._length_weights[len(characters)] += sum(conf for _, conf in characters) / len(characters)
+        positions = self._positions.setdefault(len(characters), [defaultdict(float) for _ in characters])
+        for votes, (character, conf) in zip(positions, characters):
+            votes[character] += conf
+
+        text, agreement = self.consensus()
+        if self.reads >= self.min_reads and agreement >= self.agreement:
+            self.committed = text
+        return self.committed
+
+    def settle(self, agreement):
+        # Commit the best text so far when its agreement reaches this lower share, for a plate whose reads ran out
+        # before they agreed. min_reads still applies: fewer reads are mostly a track broken off another one.
+        # Returns the committed text or None
+        if self.committed is None and self.reads >= self.min_reads:
+            text, share = self.consensus()
+            if share >= agreement:
+                self.committed = text
+        return self.committed
+
+    def consensus(self):
+        # Current best text and its agreement, the lowest winning share over the length and all positions
+        if not self._length_weights:
+            return "", 0.0
+
+        length = max(self._length_weights, key=self._length_weights.get)
+        agreement = self._length_weights[length] / sum(self._length_weights.values())
+
+        text = []
+        for votes in self._positions[length]:
+            character = max(votes, key=votes.get)
+            text.append(character)
+            agreement = min(agreement, votes[character] / sum(votes.values()))
+
+        return ''.join(text), agreement
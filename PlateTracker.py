@@ -0,0 +1,148 @@
+import itertools
+import numpy as np
+from PlateTextVoter import PlateTextVoter
+
+
+def iou_matrix(boxes_a, boxes_b):
+    # Pairwise IoU of two lists of (x1, y1, x2, y2) boxes
+    a = np.asarray(boxes_a, dtype=np.float32).reshape(-1, 4)
+    b = np.asarray(boxes_b, dtype=np.float32).reshape(-1, 4)
+
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - inter
+    return np.where(union > 0, inter / np.maximum(union, 1e-6), 0.0)
+
+
+class PlateTrack:
+    # One plate followed across frames. Position is smoothed with a constant-velocity alpha-beta filter
+    # (a steady-state Kalman filter) so the box can be predicted for the next frame.
+    ALPHA = 0.6  # Weight of the measured position
+    BETA = 0.3  # Weight of the measured velocity
+
+    def __init__(self, track_id, bbox, conf, voter):
+        self.track_id = track_id
+        self.state = np.asarray(bbox, dtype=np.float32)  # Smoothed (x1, y1, x2, y2)
+        self.velocity = np.zeros(4, dtype=np.float32)  # Per-frame change of the box
+        self.conf = conf
+
+        self.hits = 1  # Frames the track was matched in
+        self.misses = 0  # Consecutive frames without a match
+
+        # Character recognition state, OCR reads are voted on until they agree
+        self.voter = voter
+        self.ocr_runs = 0
+        self.agreed = True  # False when the text was settled below the agreement, see PlateTracker.settle
+
+    @property
+    def text(self):
+        # Consensus text, None until the reads agree
+        return self.voter.committed
+
+    @property
+    def bbox(self):
+        return tuple(int(v) for v in self.state)
+
+    def predict(self):
+        # Expected box in the next frame
+        return self.state + self.velocity
+
+    def update(self, bbox, conf):
+        measured = np.asarray(bbox, dtype=np.float32)
+        predicted = self.predict()
+        residual = measured - predicted
+        self.state = predicted + self.ALPHA * residual
+        self.velocity = self.velocity + self.BETA * residual
+        self.conf = conf
+        self.hits += 1
+        self.misses = 0
+
+    def mark_missed(self):
+        self.state = self.predict()
+        self.misses += 1
+
+
+class PlateTracker:
+    # Gives plate boxes stable track IDs across frames (IoU matching against predicted boxes, like SORT)
+    # and votes on the OCR reads of every track. Once a track's reads agree it commits one text and OCR
+    # stops for it, so OCR work grows with the number of vehicles instead of the frame rate.
+    # A track whose reads never agree is settled when it reaches max_ocr_runs reads or expires: its best text is
+    # committed with agreed=False if it reaches settle_agreement after min_reads reads, otherwise it is dropped.
+    def __init__(self, iou_threshold=0.3, max_misses=15, agreement=0.7, min_reads=3, max_ocr_runs=30,
+                 settle_agreement=0.4):
+        self.iou_threshold = iou_threshold  # Minimum IoU to continue a track
+        self.max_misses = max_misses  # Frames a track survives without a match
+        self.agreement = agreement  # Vote share needed to commit a text, see PlateTextVoter
+        self.min_reads = min_reads  # OCR reads needed before a text can be committed
+        self.max_ocr_runs = max_ocr_runs  # OCR reads per track at most
+        self.settle_agreement = settle_agreement  # Lower vote share for the text of a settled track
+
+        self.tracks = []
+        self.expired = []  # Tracks that expired in the last update and were settled with a text
+        self._ids = itertools.count(1)
+
+    def update(self, detections):
+        # Match (bbox, conf) detections to tracks, returns the track of every detection in the same order
+        assigned = [None] * len(detections)
+
+        if self.tracks and detections:
+            ious = iou_matrix([t.predict() for t in self.tracks], [bbox for bbox, _ in detections])
+
+            # Greedy assignment, best overlaps first
+            pairs = np.argwhere(ious >= self.iou_threshold)
+            order = np.argsort(-ious[pairs[:, 0], pairs[:, 1]])
+            used_tracks = set()
+            for t, d in pairs[order]:
+                if t in used_tracks or assigned[d] is not None:
+                    continue
+                track = self.tracks[t]
+                track.update(*detections[d])
+                assigned[d] = track
+                used_tracks.add(t)
+
+        # Tracks without a detection coast on their prediction until they expire
+        matched = {id(track) for track in assigned if track is not None}
+        for track in self.tracks:
+            if id(track) not in matched:
+                track.mark_missed()
+        self.expired = [t for t in self.tracks if t.misses > self.max_misses and self.needs_ocr(t) and self.settle(t)]
+        self.tracks = [t for t in self.tracks if t.misses <= self.max_misses]
+
+        # Unmatched detections start new tracks
+        for d, (bbox, conf) in enumerate(detections):
+            if assigned[d] is None:
+                track = PlateTrack(next(self._ids), bbox, conf, PlateTextVoter(self.agreement, self.min_reads))
+                self.tracks.append(track)
+                assigned[d] = track
+
+        return assigned
+
+    def needs_ocr(self, track):
+        # OCR runs until the track has committed its text or used up its reads
+        return track.text is None and track.ocr_runs < self.max_ocr_runs
+
+    def add_reading(self, track, characters):
+        # Vote with one OCR read of (character, confidence) pairs, True when this read committed the text
+        if not self.needs_ocr(track):
+            return False
+        track.ocr_runs += 1
+        if track.voter.add(characters) is not None:
+            return True
+        return track.ocr_runs >= self.max_ocr_runs and self.settle(track)
+
+    def settle(self, track):
+        # Commit the best text of a track whose reads did not agree, True when it reached settle_agreement
+        if track.voter.settle(self.settle_agreement) is None:
+            return False
+        track.agreed = False
+        return True
+
+    def reset(self):
+        self.tracks = []
+        self.expired = []
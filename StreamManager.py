@@ -0,0 +1,225 @@
+import os
+import threading
+import time
+import cv2
+from DetectionPipeline import FrameQueue, FrameScheduler, CaptureThread, drop_counter
+from Metrics import DEPTH_BUCKETS, registry
+from MotionGate import MotionGate
+
+
+def parse_source(source):
+    # Device indices may arrive as strings from the command line or settings, files and URLs stay strings
+    if isinstance(source, str) and source.isdigit():
+        return int(source)
+    return source
+
+
+class VideoStream:
+    # One decoded source: its capture, its newest-frame queue and counters
+    def __init__(self, key, cap, realtime, frame_ready, motion=False):
+        self.key = key  # Source name, also the tracker and detection log source of its plates
+        self.cap = cap
+        self.frames = FrameQueue(1, drop_counter('frames'))  # Only the newest frame is kept, stale frames are dropped
+        self.stop_event = threading.Event()
+        self.scheduler = FrameScheduler(cap.get(cv2.CAP_PROP_FPS))  # Skips decoding while inference lags behind
+        self.capture = CaptureThread(cap, self.frames, self.stop_event, realtime=realtime, frame_ready=frame_ready,
+                                     scheduler=self.scheduler)
+        self.motion_gate = MotionGate() if motion else None  # Skips detection on frames without motion
+        self.processed = 0  # Frames that went through inference
+
+    def stop(self, timeout=2.0):
+        self.stop_event.set()
+        if self.capture.is_alive() and self.capture is not threading.current_thread():
+            self.capture.join(timeout)
+        self.cap.release()
+
+
+class StreamManager:
+    # Decodes several sources (device indices, files, RTSP URLs) on their own capture threads and feeds one
+    # shared detector. Every inference round takes the newest frame of each source and runs them as one batch,
+    # so all cameras share a single set of models and a slow camera never holds up the others.
+    def __init__(self, detector, max_batch=8, on_result=None, on_finished=None, on_error=None,
+                 result_queue_size=32, motion=False, motion_roi=False):
+        self.detector = detector
+        self.max_batch = max_batch  # Upper bound of frames per inference call
+        self.motion = motion  # Gate every source with a MotionGate, static frames skip inference
+        self.motion_roi = motion_roi  # Search plates only in the moving region of a frame
+        self.on_result = on_result  # Called with (source, frame, plates) for every processed frame
+        self.on_finished = on_finished  # Called with the source when it ends
+        self.on_error = on_error
+
+        self.results = FrameQueue(result_queue_size, drop_counter('results'))  # (source, frame, plates) for polling
+
+        self.batches = 0  # Inference calls so far
+        self.batched_frames = 0  # Frames in those calls
+
+        self._streams = {}
+        self._lock = threading.Lock()
+        self._frame_ready = threading.Event()  # Set by any capture thread when it has a new frame
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._offset = 0  # Rotates the source order when there are more sources than max_batch
+
+        self._batch_size = registry.histogram('lpr_batch_size', 'Frames per shared inference call', DEPTH_BUCKETS)
+        self._gate_time = registry.stage('motion_gate')
+        self._static = registry.counter('lpr_frames_skipped_total', 'Frames not sent to detection', reason='static')
+        self._frames_total = registry.counter('lpr_frames_total', 'Frames that went through detection')
+
+    @property
+    def sources(self):
+        with self._lock:
+            return list(self._streams)
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def add_source(self, source, name=None, realtime=None):
+        # Open a source and start decoding it, returns False if it can not be opened. The name identifies it
+        # in results and defaults to the source itself. Files are paced at their own FPS like a camera
+        # unless realtime is given.
+        source = parse_source(source)
+        key = name or str(source)
+        with self._lock:
+            if key in self._streams:
+                return True
+
+        cap = cv2.VideoCapture(source)
+        if not cap.isOpened():
+            cap.release()
+            return False
+
+        if realtime is None:
+            realtime = isinstance(source, str) and os.path.isfile(source)
+        stream = VideoStream(key, cap, realtime, self._frame_ready, self.motion)
+        self.detector.reset_tracking(key)  # Tracks of an earlier run do not carry over
+        with self._lock:
+            self._streams[key] = stream
+        stream.capture.start()
+        return True
+
+    def remove_source(self, name):
+        key = str(parse_source(name))
+        with self._lock:
+            stream = self._streams.pop(key, None)
+        if stream:
+            stream.stop()
+            self.detector.reset_tracking(key)
+
+    def start(self):
+        # Start the shared inference thread, sources can be added before or after
+        if self.running:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=2.0):
+        # Stop inference and every source
+        self._stop_event.set()
+        self._frame_ready.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+        self._thread = None
+
+        for source in self.sources:
+            self.remove_source(source)
+
+    def take_results(self):
+        # All pending (source, frame, plates) results, oldest first
+        results = []
+        while True:
+            result = self.results.get_nowait()
+            if result is None:
+                return results
+            results.append(result)
+
+    def stats(self):
+        # Per-source frame counters and the average batch size
+        with self._lock:
+            streams = list(self._streams.values())
+        return {
+            'sources': {s.key: {'processed': s.processed, 'dropped': s.frames.dropped, 'skipped': s.scheduler.skipped,
+                                'stride': s.scheduler.stride,
+                                'static': s.motion_gate.skipped_fraction if s.motion_gate else 0.0}
+                        for s in streams},
+            'batches': self.batches,
+            'mean_batch': self.batched_frames / self.batches if self.batches else 0.0,
+        }
+
+    def _next_batch(self):
+        # Newest pending frame of each source, starting at a rotating offset so every source gets its turn
+        with self._lock:
+            streams = list(self._streams.values())
+        if not streams:
+            return []
+
+        self._offset = (self._offset + 1) % len(streams)
+        streams = streams[self._offset:] + streams[:self._offset]
+
+        batch = []
+        for stream in streams:
+            if len(batch) >= self.max_batch:
+                self._frame_ready.set()  # Frames are left over for the next round
+                break
+
+            frame = stream.frames.get_nowait()
+            if frame is not None:
+                batch.append((stream, frame))
+            elif not stream.capture.is_alive():
+                # Capture reached the end of the stream and everything it produced was processed
+                self.remove_source(stream.key)
+                if self.on_finished:
+                    self.on_finished(stream.key)
+        return batch
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            self._frame_ready.wait(0.1)
+            self._frame_ready.clear()
+
+            batch = self._next_batch()
+            if not batch:
+                continue
+
+            try:
+                start = time.perf_counter()
+                results = [[] for _ in batch]
+                moving, regions = [], []
+                for i, (stream, frame) in enumerate(batch):
+                    is_moving, region = True, None
+                    if stream.motion_gate:
+                        checked = time.perf_counter()
+                        is_moving, region = stream.motion_gate.check(frame)
+                        self._gate_time.observe(time.perf_counter() - checked)
+                    if is_moving:
+                        moving.append(i)
+                        regions.append(region if self.motion_roi else None)
+                    else:
+                        self._static.inc()
+
+                if moving:
+                    detected = self.detector.detect_plates([batch[i][1] for i in moving],
+                                                           [batch[i][0].key for i in moving], regions=regions)
+                    for i, plates in zip(moving, detected):
+                        results[i] = plates
+                    self._batch_size.observe(len(moving))
+                    self._frames_total.inc(len(moving))
+                # A source gets one frame per round, so the round time is its per-frame latency
+                latency = time.perf_counter() - start
+                for stream, _ in batch:
+                    stream.scheduler.record_latency(latency)
+            except Exception as e:
+                print(f"Inference error: {e}")
+                if self.on_error:
+                    self.on_error(str(e))
+                time.sleep(0.1)  # Do not spin on a persistent failure
+                continue
+
+            self.batches += 1
+            self.batched_frames += len(batch)
+            for (stream, frame), plates in zip(batch, results):
+                stream.processed += 1
+                self.results.put((stream.key, frame, plates))
+                if self.on_result:
+                    self.on_result(stream.key, frame, plates)
@@ -1,37 +1,57 @@
-from ultralytics import YOLO
+from InferenceBackend import load_model
+
+
+class Vehicle:
+    # One detected vehicle, bbox is (x1, y1, x2, y2) in image coordinates
+    __slots__ = ('bbox', 'confidence', 'label')
+
+    def __init__(self, bbox, confidence, label):
+        self.bbox = bbox
+        self.confidence = confidence
+        self.label = label
+
+    def __repr__(self):
+        return f"Vehicle({self.label!r}, {self.bbox}, {self.confidence:.2f})"
 
 
 class VehicleTypeDetector:
-    def __init__(self, model_path):
-        # Load Yolo Model
-        self.model = YOLO(model_path)
+    def __init__(self, model_path, imgsz=None):
+        # Load Yolo Model, imgsz overrides the inference resolution it was trained with
+        self.model = load_model(model_path, imgsz=imgsz)
 
     def detect_vehicle(self, image):
 
         results = self.model(image)
 
-        # List to store detected vehicles
-        vehicles = []
+        return self._vehicles(results)
 
-        # Process each detection result
-        for result in results:
-            for box in result.boxes:
-                # Get the bounding box coordinates (top-left and bottom-right)
-                x1, y1, x2, y2 = map(int, box.xyxy[0])
+    def detect_vehicle_regions(self, image, regions):
+        # Detect vehicles inside several (x1, y1, x2, y2) regions of the image with one batched call,
+        # boxes are returned in full image coordinates
+        regions = [r for r in regions if r[2] > r[0] and r[3] > r[1]]
+        if not regions:
+            return []
 
-                # Get the confidence score of the detection
-                conf = float(box.conf[0])
+        crops = [image[y1:y2, x1:x2] for x1, y1, x2, y2 in regions]
+        results = self.model(crops)
 
-                # Get the class ID and corresponding label  car, truck, bus
-                class_id = int(box.cls[0])
-                label = result.names[class_id]
+        return self._vehicles(results, offsets=[(x1, y1) for x1, y1, _, _ in regions])
 
-                # Store the vehicle information in the list
-                vehicles.append({
-                    'bbox': (x1, y1, x2, y2),  # Bounding box
-                    'confidence': conf,  # Confidence
-                    'label': label  # Detected class label
-                })
+    @staticmethod
+    def _vehicles(results, offsets=None):
+        # Vehicles of all results, boxes of result i shifted by offsets[i] (crop origin in the image).
+        # Every result is converted to Python values once instead of box by box.
+        vehicles = []
+        for i, result in enumerate(results):
+            boxes = result.boxes
+            if not len(boxes):
+                continue
+            xyxy = boxes.xyxy.astype(int)
+            if offsets:
+                offset_x, offset_y = offsets[i]
+                xyxy += (offset_x, offset_y, offset_x, offset_y)
+            labels = [result.names[class_id] for class_id in boxes.cls.astype(int).tolist()]  # car, truck, bus
+            vehicles.extend(Vehicle(tuple(bbox), conf, label)
+                            for bbox, conf, label in zip(xyxy.tolist(), boxes.conf.tolist(), labels))
 
-        # Return the list of detected vehicles
         return vehicles
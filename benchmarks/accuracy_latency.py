@@ -0,0 +1,136 @@
+# Accuracy vs CPU latency of model variants (backend, INT8, inference size) on a held-out image set
+#   python benchmarks/accuracy_latency.py --data heldout/chars --text \
+#       models/CharModel/weights/best.pt@640 models/CharModel/weights/best.onnx@256 \
+#       models/CharModel/weights/best_int8.onnx@160 --out char_report.md
+#
+# The data folder uses the YOLO training layout: images/*.jpg with labels/*.txt of normalized
+# "class cx cy w h" lines. A variant is a model path, optionally followed by @imgsz.
+# Boxes are matched per class at IoU >= 0.5. With --text every image is also read as a plate (its characters
+# sorted left to right, like PlateCharacterDetector does) and compared with the labelled text.
+import argparse
+import glob
+import json
+import os
+import statistics
+import sys
+import time
+
+import cv2
+import numpy as np
+
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "")  # Force CPU inference
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from InferenceBackend import load_model
+from PlateTracker import iou_matrix
+
+
+def load_dataset(folder, limit):
+    # (image, boxes (N, 4) in pixels, classes (N,)) per labelled image
+    paths = sorted(p for ext in ("jpg", "jpeg", "png", "bmp") for p in glob.glob(os.path.join(folder, "images", "*." + ext)))
+    samples = []
+    for path in paths[:limit]:
+        image = cv2.imread(path)
+        if image is None:
+            continue
+        h, w = image.shape[:2]
+        label_path = os.path.join(folder, "labels", os.path.splitext(os.path.basename(path))[0] + ".txt")
+        rows = np.loadtxt(label_path, ndmin=2) if os.path.exists(label_path) else np.zeros((0, 5))
+        rows = rows.reshape(-1, 5)
+        cx, cy, bw, bh = rows[:, 1] * w, rows[:, 2] * h, rows[:, 3] * w, rows[:, 4] * h
+        boxes = np.stack([cx - bw / 2, cy - bh / 2, cx + bw / 2, cy + bh / 2], axis=1)
+        samples.append((image, boxes, rows[:, 0].astype(int)))
+    return samples
+
+
+def plate_text(boxes, classes, names):
+    order = np.argsort(boxes[:, 0])
+    return ''.join(names.get(int(classes[i]), '?') for i in order if names.get(int(classes[i]), '?').isalnum())
+
+
+def evaluate(model_path, imgsz, samples, conf, text):
+    model = load_model(model_path, imgsz=imgsz)
+    model(samples[0][0], conf=conf, imgsz=imgsz)  # Warm-up
+
+    true_positives = false_positives = false_negatives = correct_texts = 0
+    latencies = []
+    for image, boxes, classes in samples:
+        start = time.perf_counter()
+        result = model(image, conf=conf, imgsz=imgsz)[0]
+        latencies.append((time.perf_counter() - start) * 1000)
+
+        predicted = result.boxes
+        pred_classes = predicted.cls.astype(int)
+        matched = 0
+        if len(predicted) and len(boxes):
+            overlap = iou_matrix(boxes, predicted.xyxy)
+            overlap[classes[:, None] != pred_classes[None, :]] = 0
+            used = set()
+            for g in range(len(boxes)):
+                p = int(np.argmax(overlap[g]))
+                if overlap[g, p] >= 0.5 and p not in used:
+                    used.add(p)
+                    matched += 1
+        true_positives += matched
+        false_positives += len(predicted) - matched
+        false_negatives += len(boxes) - matched
+
+        if text:
+            names = result.names
+            correct_texts += plate_text(predicted.xyxy, pred_classes, names) == plate_text(boxes, classes, names)
+
+    precision = true_positives / max(true_positives + false_positives, 1)
+    recall = true_positives / max(true_positives + false_negatives, 1)
+    report = {
+        'model': model_path,
+        'imgsz': imgsz,
+        'precision': precision,
+        'recall': recall,
+        'f1': 2 * precision * recall / max(precision + recall, 1e-9),
+        'median_ms': statistics.median(latencies),
+        'p95_ms': float(np.percentile(latencies, 95)),
+    }
+    if text:
+        report['text_accuracy'] = correct_texts / len(samples)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Accuracy vs latency of model variants on a held-out set")
+    parser.add_argument("variants", nargs="+", help="Model paths, optionally with @imgsz")
+    parser.add_argument("--data", required=True, help="Folder with images/ and labels/ in YOLO format")
+    parser.add_argument("--text", action="store_true", help="Also score whole plate texts (character model)")
+    parser.add_argument("--conf", type=float, default=0.25)
+    parser.add_argument("--limit", type=int, default=1000, help="Maximum number of images")
+    parser.add_argument("--out", help="Write the report as Markdown (.md) or JSON (.json)")
+    args = parser.parse_args()
+
+    samples = load_dataset(args.data, args.limit)
+    if not samples:
+        raise SystemExit(f"No images found in {os.path.join(args.data, 'images')}")
+
+    reports = []
+    for variant in args.variants:
+        path, _, size = variant.rpartition("@") if "@" in variant else (variant, "", "")
+        reports.append(evaluate(path, int(size) if size else None, samples, args.conf, args.text))
+
+    columns = ['model', 'imgsz', 'precision', 'recall', 'f1'] + (['text_accuracy'] if args.text else []) + \
+        ['median_ms', 'p95_ms']
+    lines = ["| " + " | ".join(columns) + " |", "|" + "---|" * len(columns)]
+    for report in reports:
+        cells = [f"{report[c]:.3f}" if isinstance(report[c], float) else str(report[c]) for c in columns]
+        lines.append("| " + " | ".join(cells) + " |")
+    table = "\n".join(lines)
+    print(f"{len(samples)} images from {args.data}\n")
+    print(table)
+
+    if args.out:
+        with open(args.out, "w") as f:
+            if args.out.endswith(".json"):
+                json.dump({'data': args.data, 'images': len(samples), 'results': reports}, f, indent=2)
+            else:
+                f.write(f"{len(samples)} images from {args.data}\n\n{table}\n")
+
+
+if __name__ == "__main__":
+    main()
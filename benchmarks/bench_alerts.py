@@ -0,0 +1,101 @@
+# Detection throughput with alerts going to slow sinks: every plate is in the database, so every frame raises
+# alerts, delivered to a webhook on a local HTTP stub that answers slowly and to a sink that blocks like a modal
+# dialog nobody clicks away. With the alert bus the frame rate should match the run without alerts.
+#   python benchmarks/bench_alerts.py --frames 300 --webhook-delay 0.2
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from AlertBus import Alert, AlertBus, LogFileSink, WebhookSink
+from CarPlateDetector import CarPlateDetector
+from DatabaseManager import DatabaseManager
+from Metrics import MetricsRegistry
+from stub_models import StubCharModel, StubPlateModel, StubVehicleModel
+from synthetic import plate_scenes, plate_texts
+
+
+def webhook_stub(delay):
+    # Local HTTP server collecting the posted alerts, answering each after delay seconds
+    received = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers['Content-Length']))
+            time.sleep(delay)
+            received.append(json.loads(body))
+            self.send_response(204)
+            self.end_headers()
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, received
+
+
+def run(frames, texts, db, on_alert):
+    detector = CarPlateDetector(StubPlateModel(), StubCharModel(texts, imgsz=256), StubVehicleModel(),
+                                conf_threshold=0.5, cooldown=0, db=db, char_imgsz=256, metrics=MetricsRegistry())
+    detector.on_alert = on_alert
+    start = time.perf_counter()
+    for frame in frames:
+        detector.detect_plate(frame, track=False)
+    return len(frames) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Detection throughput with slow alert sinks")
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--plates", type=int, default=4, help="Plates per frame, all of them known")
+    parser.add_argument("--webhook-delay", type=float, default=0.2, help="Seconds the webhook stub takes per alert")
+    parser.add_argument("--ack-delay", type=float, default=2.0, help="Seconds a blocking sink takes per alert")
+    parser.add_argument("--direct-frames", type=int, default=5, help="Frames run with the webhook on the loop")
+    args = parser.parse_args()
+
+    texts = plate_texts(args.plates)
+    frames = [frame for frame, _ in plate_scenes(texts, args.frames)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, "alerts.db"))
+        db.insert_plates_bulk((text, f"Owner {i}", "car") for i, text in enumerate(texts))
+        server, received = webhook_stub(args.webhook_delay)
+        url = f"http://127.0.0.1:{server.server_address[1]}/alerts"
+
+        baseline = run(frames, texts, db, None)
+
+        bus = AlertBus()
+        log = bus.add_sink(LogFileSink(os.path.join(tmp, "alerts.jsonl")))
+        bus.add_sink(WebhookSink(url))
+        bus.add_sink(lambda alert: time.sleep(args.ack_delay), name='operator')
+        with_bus = run(frames, texts, db, bus.publish)
+
+        # The webhook called directly on the detection thread, the way the modal dialog used to be.
+        # A few frames are enough to see it.
+        webhook = WebhookSink(url)
+        direct = run(frames[:args.direct_frames], texts, db,
+                     lambda plate, owner, vehicle_type, source: webhook(Alert(plate, owner, vehicle_type, source)))
+
+        bus.remove_sink(log)
+        with open(log.path, encoding="utf-8") as f:
+            logged = sum(1 for _ in f)
+        dropped = bus.dropped()
+        bus.close(timeout=0)
+        server.shutdown()
+        db.close()
+
+    print(f"no alerts:            {baseline:8.1f} frames/s")
+    print(f"alert bus:            {with_bus:8.1f} frames/s ({with_bus / baseline:.0%}), {bus.published} alerts, "
+          f"{logged} logged, {len(received)} posted so far, dropped {dropped}")
+    print(f"webhook on the loop:  {direct:8.1f} frames/s ({direct / baseline:.0%})")
+
+
+if __name__ == "__main__":
+    main()
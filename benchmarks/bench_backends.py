@@ -0,0 +1,49 @@
+# CPU latency of the same model through different inference backends
+#   python benchmarks/bench_backends.py models/PlateModel/weights/best.pt models/PlateModel/weights/best.onnx \
+#       models/PlateModel/weights/best_openvino_model --batches 1,4,8
+import argparse
+import os
+import statistics
+import sys
+import time
+
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "")  # Force CPU inference
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from InferenceBackend import load_model
+from synthetic import lane_frames
+
+
+def measure(fn, repeats):
+    # Median wall time of fn() in milliseconds
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CPU latency per inference backend")
+    parser.add_argument("models", nargs="+", help=".pt, .onnx or OpenVINO model paths of the same network")
+    parser.add_argument("--batches", default="1,4,8", help="Comma separated batch sizes")
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--threads", type=int, help="Intra-op threads for ONNX Runtime/OpenVINO")
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    batches = [int(b) for b in args.batches.split(",")]
+    frames = [frame for frame, _ in lane_frames(max(batches), vehicle_every=2, vehicle_frames=1)]
+
+    print(f"{'model':<50} {'batch':>5} {'ms/batch':>9} {'ms/image':>9}")
+    for model_path in args.models:
+        model = load_model(model_path, imgsz=args.imgsz, threads=args.threads)
+        model(frames[:1], imgsz=args.imgsz)  # Warm-up so lazy initialization is not timed
+        for batch in batches:
+            elapsed = measure(lambda: model(frames[:batch], imgsz=args.imgsz), args.repeats)
+            print(f"{model_path[-50:]:<50} {batch:>5} {elapsed:>9.1f} {elapsed / batch:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
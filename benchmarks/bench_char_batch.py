@@ -0,0 +1,48 @@
+# Per-crop vs batched character recognition latency on CPU
+#   python benchmarks/bench_char_batch.py --model models/CharModel/weights/best.pt
+import argparse
+import os
+import statistics
+import sys
+import time
+
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "")  # Force CPU inference
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PlateCharacterDetector import PlateCharacterDetector
+from synthetic import make_plate_crops
+
+
+def measure(fn, repeats):
+    # Median wall time of fn() in milliseconds
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-crop vs batched character recognition latency")
+    parser.add_argument("--model", default="models/CharModel/weights/best.pt")
+    parser.add_argument("--counts", default="1,2,4,8,16", help="Comma separated plate counts per frame")
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--repeats", type=int, default=10)
+    args = parser.parse_args()
+
+    detector = PlateCharacterDetector(args.model, imgsz=args.imgsz)
+
+    # Warm-up so model fusing and allocations are not timed
+    detector.detect_characters_batch(make_plate_crops(2))
+
+    print(f"{'plates':>6} {'per-crop ms':>12} {'batched ms':>11} {'speedup':>8}")
+    for count in (int(c) for c in args.counts.split(",")):
+        crops = make_plate_crops(count, seed=count)
+        per_crop = measure(lambda: [detector.detect_characters(crop) for crop in crops], args.repeats)
+        batched = measure(lambda: detector.detect_characters_batch(crops), args.repeats)
+        print(f"{count:>6} {per_crop:>12.1f} {batched:>11.1f} {per_crop / batched:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
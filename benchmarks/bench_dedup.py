@@ -0,0 +1,119 @@
+# Memory and speed of duplicate suppression on a simulated day of a busy road, under a simulated clock so a
+# day takes seconds: the old dict of every text ever seen against DedupStore, and two lanes sharing one store
+#   python benchmarks/bench_dedup.py --hours 24 --plates-per-minute 60
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from DedupStore import DedupStore
+from synthetic import random_plate_text
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def reads(hours, plates_per_minute, reads_per_plate, noise, seed=0):
+    # (seconds, text) of every OCR read: each car is read on several frames and some reads are off by a character
+    rng = np.random.default_rng(seed)
+    letters = "0123456789ABCDEFGHJKLMNPRSTUVYZ"
+    seconds = 0.0
+    for _ in range(int(hours * 60 * plates_per_minute)):
+        seconds += rng.exponential(60 / plates_per_minute)
+        text = random_plate_text(rng)
+        for frame in range(reads_per_plate):
+            read = text
+            if rng.random() < noise:
+                i = rng.integers(len(text))
+                read = text[:i] + letters[rng.integers(len(letters))] + text[i + 1:]
+            yield seconds + frame * 0.1, read
+
+
+def legacy(events, cooldown):
+    # The dict CarPlateDetector used to keep
+    last_detected = {}
+    saved = 0
+    for now, text in events:
+        if text in last_detected and now - last_detected[text] < cooldown:
+            continue
+        last_detected[text] = now
+        saved += 1
+    return saved, len(last_detected)
+
+
+def bounded(events, cooldown, max_entries):
+    clock = Clock()
+    store = DedupStore(ttl=cooldown, max_entries=max_entries, clock=clock)
+    saved = 0
+    peak = 0
+    for now, text in events:
+        clock.now = now
+        saved += store.admit(text)
+        peak = max(peak, len(store))
+    return saved, peak
+
+
+def measured(fn, *args):
+    # Timed on its own, tracing allocations slows them down several times
+    start = time.perf_counter()
+    result = fn(*args)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    fn(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Duplicate suppression memory and speed")
+    parser.add_argument("--hours", type=float, default=24)
+    parser.add_argument("--plates-per-minute", type=float, default=60)
+    parser.add_argument("--reads-per-plate", type=int, default=8, help="Frames each car is read on")
+    parser.add_argument("--noise", type=float, default=0.2, help="Share of reads with a wrong character")
+    parser.add_argument("--cooldown", type=float, default=10)
+    parser.add_argument("--max-entries", type=int, default=100000)
+    args = parser.parse_args()
+
+    events = list(reads(args.hours, args.plates_per_minute, args.reads_per_plate, args.noise))
+    print(f"{len(events):,} reads over {args.hours:g} h")
+
+    (saved, size), elapsed, peak = measured(legacy, events, args.cooldown)
+    print(f"dict:       {saved:>9,} saved, {size:>9,} entries at the end, "
+          f"{peak / 1e6:7.1f} MB peak, {len(events) / elapsed:>12,.0f} reads/s")
+    (saved, size), elapsed, peak = measured(bounded, events, args.cooldown, args.max_entries)
+    print(f"DedupStore: {saved:>9,} saved, {size:>9,} entries at most,  "
+          f"{peak / 1e6:7.1f} MB peak, {len(events) / elapsed:>12,.0f} reads/s")
+
+    # Two lanes seeing every car, one second apart, through a shared store: each car is saved once
+    with tempfile.TemporaryDirectory() as tmp:
+        clock = Clock()
+        path = os.path.join(tmp, "dedup.db")
+        lanes = [DedupStore(ttl=args.cooldown, clock=clock, path=path) for _ in range(2)]
+        cars = list(reads(min(args.hours, 1), args.plates_per_minute, 1, 0, seed=1))
+        saved = [0, 0]
+        start = time.perf_counter()
+        for now, text in cars:
+            for lane, store in enumerate(lanes):
+                clock.now = now + lane
+                saved[lane] += store.admit(text)
+        elapsed = time.perf_counter() - start
+        for store in lanes:
+            store.close()
+    print(f"shared:     {len(cars):,} cars seen by two lanes, saved {saved[0]:,} + {saved[1]:,}, "
+          f"{2 * len(cars) / elapsed:,.0f} reads/s")
+
+
+if __name__ == "__main__":
+    main()
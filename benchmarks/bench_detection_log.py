@@ -0,0 +1,41 @@
+# Sustained ingest rate of the Detections event log
+#   python benchmarks/bench_detection_log.py --events 100000
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from DatabaseManager import DatabaseManager
+from DetectionLogWriter import DetectionLogWriter
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sustained ingest rate of the Detections event log")
+    parser.add_argument("--events", type=int, default=100000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--target", type=float, default=10000, help="Required events per second")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(os.path.join(tmp, "bench.db"))
+        writer = DetectionLogWriter(db, batch_size=args.batch_size)
+
+        # Time includes the final flush, so the rate is what actually reached the disk
+        start = time.perf_counter()
+        for i in range(args.events):
+            writer.log(f"34ABC{i % 5000:03d}", 0.9, (100, 200, 220, 240), "car", "camera:0")
+        writer.close()
+        elapsed = time.perf_counter() - start
+
+        db.close()
+
+    rate = args.events / elapsed
+    print(f"{writer.written} events written in {elapsed:.2f}s -> {rate:,.0f} events/s "
+          f"({writer.dropped} dropped, target {args.target:,.0f}/s: {'ok' if rate >= args.target else 'FAILED'})")
+
+
+if __name__ == "__main__":
+    main()
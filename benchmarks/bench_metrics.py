@@ -0,0 +1,55 @@
+# Overhead of the always-on instrumentation: cost of one histogram observation and counter increment,
+# the cost per frame (about a dozen records) and the time to render a scrape
+#   python benchmarks/bench_metrics.py
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Metrics import MetricsRegistry
+
+RECORDS_PER_FRAME = 12  # Timers and counters touched by one frame through capture, detection and render
+
+
+def per_call_us(fn, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Instrumentation overhead")
+    parser.add_argument("--calls", type=int, default=200000)
+    parser.add_argument("--frame-ms", type=float, default=20.0, help="Typical detection time of a frame")
+    args = parser.parse_args()
+
+    metrics = MetricsRegistry()
+    histogram = metrics.stage('plate_detection')
+    counter = metrics.counter('lpr_frames_total', 'Frames')
+
+    def timed():
+        start = time.perf_counter()
+        histogram.observe(time.perf_counter() - start)
+
+    empty = per_call_us(lambda: None, args.calls)
+    observe = per_call_us(lambda: histogram.observe(0.012), args.calls) - empty
+    inc = per_call_us(counter.inc, args.calls) - empty
+    timer = per_call_us(timed, args.calls) - empty
+    frame = RECORDS_PER_FRAME * timer
+
+    for stage in ('capture', 'motion_gate', 'tracking', 'ocr', 'db_lookup', 'vehicle_detection', 'render'):
+        metrics.stage(stage).observe(0.003)
+    render_ms = per_call_us(metrics.render, 200) / 1000
+
+    print(f"histogram observe:     {observe:.2f} us")
+    print(f"counter increment:     {inc:.2f} us")
+    print(f"timed stage:           {timer:.2f} us (two perf_counter calls and an observe)")
+    print(f"per frame:             {frame:.1f} us, {frame / (args.frame_ms * 1000):.3%} of a {args.frame_ms:g} ms frame")
+    print(f"render a scrape:       {render_ms:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
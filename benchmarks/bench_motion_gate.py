@@ -0,0 +1,47 @@
+# Cost and effect of the MotionGate on a mostly idle synthetic lane
+#   python benchmarks/bench_motion_gate.py --frames 3000 --vehicle-every 300
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from MotionGate import MotionGate
+from synthetic import lane_frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MotionGate cost and skipped frames on an idle lane")
+    parser.add_argument("--frames", type=int, default=3000)
+    parser.add_argument("--vehicle-every", type=int, default=300, help="Frames between vehicles")
+    parser.add_argument("--vehicle-frames", type=int, default=40, help="Frames a vehicle is visible")
+    parser.add_argument("--width", type=int, default=160, help="Width motion is measured at")
+    args = parser.parse_args()
+
+    gate = MotionGate(width=args.width)
+    elapsed = 0.0
+    vehicle_frames = missed = 0
+    roi_area = []
+    for frame, visible in lane_frames(args.frames, vehicle_every=args.vehicle_every,
+                                      vehicle_frames=args.vehicle_frames):
+        start = time.perf_counter()
+        moving, roi = gate.check(frame)
+        elapsed += time.perf_counter() - start
+
+        vehicle_frames += visible
+        missed += visible and not moving
+        if moving and roi:
+            x1, y1, x2, y2 = roi
+            roi_area.append((x2 - x1) * (y2 - y1) / (frame.shape[0] * frame.shape[1]))
+
+    print(f"frames:            {gate.frames} ({vehicle_frames} with a vehicle)")
+    print(f"gate cost:         {elapsed / gate.frames * 1000:.3f} ms/frame")
+    print(f"skipped:           {gate.skipped_fraction:.1%} of frames (idle share {1 - vehicle_frames / gate.frames:.1%})")
+    print(f"missed vehicles:   {missed} vehicle frames skipped")
+    if roi_area:
+        print(f"moving region:     {sum(roi_area) / len(roi_area):.1%} of the frame on average")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+# Post-processing cost of detection results with many boxes: plate box conversion, character parsing and
+# plate to vehicle matching, per-box Python loops (as before) against the array versions in the detectors
+#   python benchmarks/bench_postprocess.py --boxes 3,10,100,500
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from CarPlateDetector import CarPlateDetector
+from InferenceBackend import Boxes, Results
+from PlateCharacterDetector import PlateCharacterDetector
+from VehicleTypeDetector import VehicleTypeDetector
+
+NAMES = {i: c for i, c in enumerate("0123456789ABCDEFGHIJKLMNOPRSTUVYZ")}
+VEHICLE_NAMES = {0: 'car', 1: 'truck', 2: 'bus'}
+
+
+def random_results(rng, count, classes, width=1280, height=720, names=None):
+    x1 = rng.uniform(0, width - 200, count)
+    y1 = rng.uniform(0, height - 150, count)
+    xyxy = np.stack([x1, y1, x1 + rng.uniform(20, 200, count), y1 + rng.uniform(10, 150, count)], axis=1)
+    return Results(Boxes(xyxy.astype(np.float32), rng.uniform(0.3, 1, count).astype(np.float32),
+                         rng.integers(0, classes, count).astype(np.float32)), names or {})
+
+
+def legacy_plate_boxes(images, results, regions):
+    detections = []
+    for i, (image, result) in enumerate(zip(images, results)):
+        offset_x, offset_y = regions[i][:2] if regions[i] is not None else (0, 0)
+        for box in result.boxes:
+            x1, y1, x2, y2 = map(int, box.xyxy[0])
+            x1, y1, x2, y2 = x1 + offset_x, y1 + offset_y, x2 + offset_x, y2 + offset_y
+            detections.append((i, (x1, y1, x2, y2), float(box.conf[0]), image[y1:y2, x1:x2]))
+    return detections
+
+
+def legacy_characters(results):
+    characters = []
+    for result in results:
+        for box in result.boxes:
+            x1, _, _, _ = map(int, box.xyxy[0].tolist())
+            characters.append((x1, result.names.get(int(box.cls[0]), '?'), float(box.conf[0])))
+    characters.sort(key=lambda x: x[0])
+    plate_chars = [(label, conf) for _, label, conf in characters if label.isalnum()]
+    if len(plate_chars) > 1 and plate_chars[0][0].isalpha() and plate_chars[1][0].isdigit():
+        plate_chars = plate_chars[1:]
+    if len(plate_chars) > 1 and plate_chars[-1][0].isalpha() and plate_chars[-2][0].isdigit():
+        plate_chars = plate_chars[:-1]
+    return plate_chars
+
+
+def legacy_match(plate_bbox, vehicles):
+    px1, py1, px2, py2 = plate_bbox
+    center = ((px1 + px2) // 2, (py1 + py2) // 2)
+    best_match, best_area = None, 0
+    for vehicle in vehicles:
+        vx1, vy1, vx2, vy2 = vehicle.bbox
+        if vx1 <= center[0] <= vx2 and vy1 <= center[1] <= vy2:
+            area = (vx2 - vx1) * (vy2 - vy1)
+            if area > best_area:
+                best_area, best_match = area, vehicle.label
+    return best_match or "Unknown"
+
+
+def measure(fn, repeats):
+    # Median wall time of fn() in milliseconds
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-box loops against array post-processing")
+    parser.add_argument("--boxes", default="3,10,100,500", help="Comma separated boxes per frame")
+    parser.add_argument("--repeats", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    image = np.zeros((720, 1280, 3), dtype=np.uint8)
+
+    print(f"{'step':<18} {'boxes':>6} {'loop ms':>9} {'array ms':>9} {'speed-up':>9}")
+    for count in [int(b) for b in args.boxes.split(",")]:
+        plates = random_results(rng, count, 1)
+        chars = random_results(rng, count, len(NAMES), names=NAMES)
+        vehicles = VehicleTypeDetector._vehicles([random_results(rng, count, 3, names=VEHICLE_NAMES)])
+        regions = [(100, 50, 1280, 720)]
+
+        new = CarPlateDetector._plate_boxes([image], [plates], regions)
+        old = legacy_plate_boxes([image], [plates], regions)
+        assert [d[:3] for d in new] == [d[:3] for d in old]
+        assert PlateCharacterDetector._plate_characters([chars]) == legacy_characters([chars])
+        bboxes = [d[1] for d in new]
+        assert CarPlateDetector._match_vehicle_types(bboxes, vehicles) == [legacy_match(b, vehicles) for b in bboxes]
+
+        steps = [
+            ("plate boxes", lambda: legacy_plate_boxes([image], [plates], regions),
+             lambda: CarPlateDetector._plate_boxes([image], [plates], regions)),
+            ("characters", lambda: legacy_characters([chars]),
+             lambda: PlateCharacterDetector._plate_characters([chars])),
+            ("vehicle match", lambda: [legacy_match(b, vehicles) for b in bboxes],
+             lambda: CarPlateDetector._match_vehicle_types(bboxes, vehicles)),
+        ]
+        for name, loop, vectorized in steps:
+            loop_ms, array_ms = measure(loop, args.repeats), measure(vectorized, args.repeats)
+            print(f"{name:<18} {count:>6} {loop_ms:>9.3f} {array_ms:>9.3f} {loop_ms / max(array_ms, 1e-9):>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+# Allocations and time per displayed frame: the old render path (RGB conversion and drawing at full size,
+# QPixmap of the full frame, then a scaled copy) against FrameRenderer (shrink into a reused BGR buffer, draw
+# there, wrap it without a copy)
+#   python benchmarks/bench_render.py --size 1920x1080 --display 640x480
+#
+# NumPy/OpenCV buffers are counted with tracemalloc. Qt allocates QPixmaps outside of it, those are listed
+# separately from the sizes the two paths ask for.
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QImage, QPixmap
+from PyQt5.QtWidgets import QApplication, QLabel
+
+from CarPlateDetector import Plate
+from FrameRenderer import FrameRenderer
+from synthetic import plate_scenes, plate_texts
+
+
+def legacy(label, frame, plates):
+    # MainWindow.update_frame before FrameRenderer
+    rgb_image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    for plate in plates:
+        x1, y1, x2, y2 = plate.bbox
+        cv2.rectangle(rgb_image, (x1, y1), (x2, y2), (0, 255, 0), 2)
+        confidence_percent = plate.confidence * 100
+        text = f"{plate.text} ({plate.vehicle}) - {confidence_percent:.1f}%"
+        cv2.putText(rgb_image, text, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 255, 0), 2)
+    h, w, ch = rgb_image.shape
+    qt_image = QImage(rgb_image.data, w, h, ch * w, QImage.Format_RGB888)
+    pixmap = QPixmap.fromImage(qt_image)
+    label.setPixmap(pixmap.scaled(label.width(), label.height(), Qt.KeepAspectRatio))
+
+
+def rendered(renderer):
+    def render(label, frame, plates):
+        label.setPixmap(QPixmap.fromImage(renderer.render(frame, plates, label.width(), label.height())))
+    return render
+
+
+def measure(fn, label, scenes):
+    # (ms per frame, traced bytes allocated on top of what was already held, averaged over the frames)
+    for frame, plates in scenes[:5]:
+        fn(label, frame, plates)  # Warm up, the renderer allocates its buffer here
+
+    start = time.perf_counter()
+    for frame, plates in scenes:
+        fn(label, frame, plates)
+    elapsed = (time.perf_counter() - start) / len(scenes)
+
+    tracemalloc.start()
+    peaks = []
+    for frame, plates in scenes:
+        base = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        fn(label, frame, plates)
+        peaks.append(tracemalloc.get_traced_memory()[1] - base)
+    tracemalloc.stop()
+    return elapsed * 1000, sum(peaks) / len(peaks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render path allocations and time per frame")
+    parser.add_argument("--size", default="1920x1080", help="Frame size WxH")
+    parser.add_argument("--display", default="640x480", help="Label size WxH")
+    parser.add_argument("--frames", type=int, default=100)
+    parser.add_argument("--plates", type=int, default=4)
+    args = parser.parse_args()
+    width, height = (int(v) for v in args.size.split("x"))
+    display_w, display_h = (int(v) for v in args.display.split("x"))
+
+    app = QApplication(sys.argv)
+    label = QLabel()
+    label.resize(display_w, display_h)
+
+    texts = plate_texts(args.plates)
+    scenes = [(frame, [Plate(bbox, 0.9, text, "Not in database", vehicle) for bbox, text, vehicle in truths])
+              for frame, truths in plate_scenes(texts, args.frames, width=width, height=height)]
+
+    frame_mb = width * height * 3 / 1e6
+    scale = min(display_w / width, display_h / height)
+    display_mb = int(width * scale) * int(height * scale) * 3 / 1e6
+    renderer = FrameRenderer()
+    print(f"{args.size} frames shown in a {args.display} label ({frame_mb:.1f} MB full frame, "
+          f"{display_mb:.2f} MB display)")
+    print(f"{'path':<14} {'ms/frame':>9} {'traced MB/frame':>16} {'Qt pixmaps/frame':>28}")
+    for name, fn, qt in (("legacy", legacy, f"{frame_mb:.1f} MB + {display_mb:.2f} MB"),
+                         ("FrameRenderer", rendered(renderer), f"{display_mb:.2f} MB")):
+        ms, peak = measure(fn, label, scenes)
+        print(f"{name:<14} {ms:>9.2f} {peak / 1e6:>16.2f} {qt:>28}")
+    print(f"FrameRenderer buffers allocated over {2 * args.frames + 10} frames: {renderer.allocations}")
+    app.processEvents()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# Startup time of the GUI: time to the first shown window and to the first detection, measured in fresh
+# processes so imports are not cached
+#   python benchmarks/bench_startup.py --runs 5
+#   python benchmarks/bench_startup.py --plate-model models/PlateModel/weights/best.onnx \
+#       --char-model models/CharModel/weights/best.onnx --vehicle-model models/VehicleModel/weights/best.onnx
+#
+# Runs from the current directory like MainWindow.py does, so the default model and database paths resolve
+# the same way. The window is rendered offscreen unless --show is given.
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def child(args):
+    # One cold start, prints the seconds since the parent launched the process as JSON
+    launched = args.launched
+    sys.path.insert(0, REPO)
+    sys.path.insert(0, os.path.join(REPO, "benchmarks"))
+
+    from PyQt5.QtWidgets import QApplication
+    import MainWindow
+    imported = time.time()
+
+    # A failed model load would wait on a message box, report it instead
+    MainWindow.QMessageBox.critical = lambda parent, title, text: (print(text, file=sys.stderr), os._exit(1))
+
+    app = QApplication(sys.argv)
+    window = MainWindow.MainWindow()
+    for name in ("plate_model_path", "char_model_path", "vehicle_model_path"):
+        if getattr(args, name):
+            setattr(window, name, getattr(args, name))  # Before the deferred model load starts
+    window.show()
+    app.processEvents()
+    shown = time.time()
+
+    # The window loads the models in the background, keep the event loop running until it is done
+    while window.detector is None:
+        app.processEvents()
+        time.sleep(0.005)
+    ready = time.time()
+
+    from synthetic import lane_frames
+    frame = next(iter(lane_frames(1, vehicle_every=1, vehicle_frames=1)))[0]
+    window.detector.detect_plate(frame, track=False)
+    detected = time.time()
+
+    window.close()
+    print(json.dumps({
+        'import_s': imported - launched,
+        'first_window_s': shown - launched,
+        'models_ready_s': ready - launched,
+        'first_detection_s': detected - launched,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GUI time to first window and first detection")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--plate-model")
+    parser.add_argument("--char-model")
+    parser.add_argument("--vehicle-model")
+    parser.add_argument("--show", action="store_true", help="Show the window instead of rendering offscreen")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--launched", type=float, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    args.plate_model_path, args.char_model_path, args.vehicle_model_path = \
+        args.plate_model, args.char_model, args.vehicle_model
+
+    if args.child:
+        child(args)
+        return
+
+    env = dict(os.environ)
+    if not args.show:
+        env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    forwarded = [arg for arg in sys.argv[1:] if arg != "--show"]
+
+    runs = []
+    for _ in range(args.runs):
+        command = [sys.executable, os.path.abspath(__file__), "--child", "--launched", repr(time.time())] + forwarded
+        output = subprocess.run(command, env=env, capture_output=True, text=True)
+        lines = [line for line in output.stdout.splitlines() if line.startswith("{")]
+        if output.returncode or not lines:
+            raise SystemExit(output.stderr or output.stdout)
+        runs.append(json.loads(lines[-1]))
+
+    print(f"{'stage':<20} {'median s':>9} {'min s':>9}")
+    for key in runs[0]:
+        values = [run[key] for run in runs]
+        print(f"{key:<20} {statistics.median(values):>9.2f} {min(values):>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# Throughput and memory of N cameras: one shared StreamManager vs a DetectionPipeline with its own models per camera
+#   python benchmarks/bench_streams.py --video lane.mp4 --cameras 1,2,4,8
+#
+# Every configuration runs in a fresh process so the peak RSS belongs to it alone. Sources are decoded
+# as fast as possible, frames the detector can not keep up with are dropped like on a live camera.
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "")  # Force CPU inference
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def run_one(args):
+    # Run one configuration and print its result as JSON
+    from CarPlateDetector import CarPlateDetector
+    from DatabaseManager import DatabaseManager
+    from DetectionPipeline import DetectionPipeline
+    from StreamManager import StreamManager
+
+    db = DatabaseManager(args.db)
+
+    def make_detector():
+        return CarPlateDetector(args.plate_model, args.char_model, args.vehicle_model, db=db)
+
+    # Runs until the duration is over or every camera reached the end of the video
+    processed = 0
+    if args.mode == "shared":
+        counts = []
+        manager = StreamManager(make_detector(), max_batch=args.max_batch, on_result=lambda *_: counts.append(1))
+        for i in range(args.cameras):
+            manager.add_source(args.video, name=f"camera{i}", realtime=False)
+        start = time.perf_counter()
+        manager.start()
+        while time.perf_counter() - start < args.duration and manager.sources:
+            time.sleep(0.05)
+        processed = len(counts)
+        manager.stop()
+    else:
+        pipelines = []
+        for _ in range(args.cameras):
+            pipeline = DetectionPipeline(make_detector(), args.video, realtime=False)
+            pipeline.start()
+            pipelines.append(pipeline)
+        start = time.perf_counter()
+        while time.perf_counter() - start < args.duration and any(p.running for p in pipelines):
+            time.sleep(0.05)
+            processed += sum(len(p.take_results()) for p in pipelines)
+        for pipeline in pipelines:
+            pipeline.stop()
+            processed += len(pipeline.take_results())
+
+    elapsed = time.perf_counter() - start
+    print(json.dumps({
+        'mode': args.mode,
+        'cameras': args.cameras,
+        'fps': processed / elapsed,
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared vs per-camera model throughput and memory")
+    parser.add_argument("--video", required=True, help="Video file every simulated camera plays")
+    parser.add_argument("--cameras", default="1,2,4", help="Comma separated camera counts")
+    parser.add_argument("--duration", type=float, default=20, help="Seconds per configuration")
+    parser.add_argument("--max-batch", type=int, default=8)
+    parser.add_argument("--plate-model", default="models/PlateModel/weights/best.pt")
+    parser.add_argument("--char-model", default="models/CharModel/weights/best.pt")
+    parser.add_argument("--vehicle-model", default="models/VehicleModel/weights/best.pt")
+    parser.add_argument("--db", default="bench_streams.db")
+    parser.add_argument("--mode", choices=["shared", "separate"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        args.cameras = int(args.cameras)
+        run_one(args)
+        return
+
+    print(f"{'cameras':>7} {'mode':>9} {'frames/s':>9} {'peak RSS MB':>12}")
+    for cameras in args.cameras.split(","):
+        for mode in ("separate", "shared"):
+            command = [sys.executable, os.path.abspath(__file__), "--mode", mode, "--cameras", cameras]
+            for name in ("video", "duration", "max_batch", "plate_model", "char_model", "vehicle_model", "db"):
+                command += ["--" + name.replace("_", "-"), str(getattr(args, name))]
+            output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(f"{result['cameras']:>7} {mode:>9} {result['fps']:>9.1f} {result['peak_rss_mb']:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
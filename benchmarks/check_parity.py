@@ -0,0 +1,83 @@
+# Compare an exported model (ONNX/OpenVINO) with the ultralytics output of the original .pt
+#   python benchmarks/check_parity.py --reference models/PlateModel/weights/best.pt \
+#       --candidate models/PlateModel/weights/best.onnx --images "samples/*.jpg"
+#   python benchmarks/check_parity.py --reference models/CharModel/weights/best.pt \
+#       --candidate models/CharModel/weights/best.onnx --crops
+#
+# A reference box is matched by a candidate box of the same class with IoU >= --iou. Exits with status 1
+# when fewer than --min-match of the reference boxes are matched.
+import argparse
+import glob
+import os
+import sys
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from InferenceBackend import load_model, letterbox
+from PlateTracker import iou_matrix
+from synthetic import lane_frames, make_plate_crops
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Box parity of an exported model against the .pt model")
+    parser.add_argument("--reference", required=True, help=".pt model run through ultralytics")
+    parser.add_argument("--candidate", required=True, help="Exported .onnx file or OpenVINO model")
+    parser.add_argument("--images", help="Glob of test images, synthetic frames are used when not given")
+    parser.add_argument("--crops", action="store_true", help="Use synthetic plate crops, for the character model")
+    parser.add_argument("--count", type=int, default=50, help="Number of synthetic inputs")
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--conf", type=float, default=0.25)
+    parser.add_argument("--iou", type=float, default=0.9, help="IoU a matching box needs")
+    parser.add_argument("--min-match", type=float, default=0.95)
+    args = parser.parse_args()
+
+    if args.images:
+        images = [cv2.imread(path) for path in sorted(glob.glob(args.images))]
+        images = [image for image in images if image is not None]
+    elif args.crops:
+        # Letterboxed like PlateCharacterDetector does before inference
+        images = [letterbox(crop, args.imgsz)[0] for crop in make_plate_crops(args.count)]
+    else:
+        images = [frame for frame, _ in lane_frames(args.count, vehicle_every=10, vehicle_frames=8)]
+
+    reference = load_model(args.reference, imgsz=args.imgsz)
+    candidate = load_model(args.candidate, imgsz=args.imgsz)
+
+    total = matched = extra = 0
+    ious, conf_diffs = [], []
+    for image in images:
+        ref = reference(image, conf=args.conf, imgsz=args.imgsz)[0].boxes
+        cand = candidate(image, conf=args.conf, imgsz=args.imgsz)[0].boxes
+        total += len(ref)
+        if not len(ref) or not len(cand):
+            extra += len(cand)
+            continue
+
+        overlap = iou_matrix(ref.xyxy, cand.xyxy)
+        overlap[ref.cls[:, None] != cand.cls[None, :]] = 0  # Only boxes of the same class can match
+        used = set()
+        for r in np.argsort(-ref.conf):
+            c = int(np.argmax(overlap[r]))
+            if overlap[r, c] >= args.iou and c not in used:
+                used.add(c)
+                matched += 1
+                ious.append(overlap[r, c])
+                conf_diffs.append(abs(float(ref.conf[r]) - float(cand.conf[c])))
+        extra += len(cand) - len(used)
+
+    match_rate = matched / total if total else 1.0
+    print(f"inputs:              {len(images)}")
+    print(f"reference boxes:     {total}")
+    print(f"matched:             {matched} ({match_rate:.1%})")
+    print(f"extra candidate:     {extra}")
+    if ious:
+        print(f"mean IoU:            {np.mean(ious):.4f}")
+        print(f"max confidence diff: {max(conf_diffs):.4f}")
+    sys.exit(0 if match_rate >= args.min_match else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+# Offline evaluation of per-track text voting against single-frame OCR
+#
+# Recordings are JSON Lines, one frame per line:
+#   {"frame": 0, "plates": [{"bbox": [x1, y1, x2, y2], "conf": 0.9, "chars": [["3", 0.98], ...], "truth": "34ABC123"}]}
+# "truth" is optional, without it only consistency (distinct texts, OCR reads) is reported.
+#
+#   python benchmarks/eval_voting.py synthetic --out rec.jsonl
+#   python benchmarks/eval_voting.py record --video lane.mp4 --out rec.jsonl
+#   python benchmarks/eval_voting.py replay rec.jsonl --agreement 0.7 --min-reads 3
+import argparse
+import json
+import os
+import sys
+from collections import defaultdict
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PlateTracker import PlateTracker
+from synthetic import random_plate_text
+
+# Substitutions a character model typically makes
+CONFUSIONS = {'0': 'O', 'O': '0', '1': 'I', 'I': '1', '8': 'B', 'B': '8', '5': 'S', 'S': '5', '2': 'Z', 'Z': '2'}
+
+
+def noisy_read(text, rng, noise):
+    # Simulated OCR read of a plate: confusions and dropped characters, with lower confidence when wrong
+    chars = []
+    for c in text:
+        roll = rng.random()
+        if roll < noise * 0.15:
+            continue  # Missed character
+        if roll < noise:
+            chars.append([CONFUSIONS.get(c, rng.choice(list("ABCDEFGHJKLMNPRSTUVYZ0123456789"))),
+                          round(float(rng.uniform(0.3, 0.7)), 3)])
+        else:
+            chars.append([c, round(float(rng.uniform(0.7, 1.0)), 3)])
+    return chars
+
+
+def synthetic(args):
+    # Vehicles drive across a 1280 px wide frame, several of them visible at the same time
+    rng = np.random.default_rng(args.seed)
+    vehicles = []
+    for i in range(args.vehicles):
+        vehicles.append({
+            'truth': random_plate_text(rng),
+            'start': int(i * args.spacing),
+            'frames': int(rng.integers(args.min_frames, args.max_frames)),
+            'y': int(rng.integers(200, 600)),
+        })
+
+    last_frame = max(v['start'] + v['frames'] for v in vehicles)
+    with open(args.out, 'w') as f:
+        for frame in range(last_frame):
+            plates = []
+            for v in vehicles:
+                t = frame - v['start']
+                if not 0 <= t < v['frames'] or rng.random() < args.dropout:
+                    continue
+                x = int(1280 * t / v['frames'])
+                plates.append({
+                    'bbox': [x, v['y'], x + 120, v['y'] + 30],
+                    'conf': round(float(rng.uniform(0.75, 0.95)), 3),
+                    'chars': noisy_read(v['truth'], rng, args.noise),
+                    'truth': v['truth'],
+                })
+            f.write(json.dumps({'frame': frame, 'plates': plates}) + '\n')
+    print(f"Wrote {last_frame} frames with {args.vehicles} vehicles to {args.out}")
+
+
+def record(args):
+    # Run the real plate and character models on every frame of a video and store every read
+    import cv2
+    from CarPlateDetector import CarPlateDetector
+
+    detector = CarPlateDetector(args.plate_model, args.char_model, conf_threshold=args.conf)
+    cap = cv2.VideoCapture(args.video)
+    frame_index = 0
+    with open(args.out, 'w') as f:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+
+            boxes = []
+            for result in detector.plate_model(frame, conf=args.conf):
+                for box in result.boxes:
+                    boxes.append(([int(v) for v in box.xyxy[0]], float(box.conf[0])))
+            reads = detector.char_detector.detect_characters_batch(
+                [frame[y1:y2, x1:x2] for (x1, y1, x2, y2), _ in boxes], with_confidence=True)
+
+            plates = [{'bbox': bbox, 'conf': conf, 'chars': [list(c) for c in chars]}
+                      for (bbox, conf), chars in zip(boxes, reads)]
+            f.write(json.dumps({'frame': frame_index, 'plates': plates}) + '\n')
+            frame_index += 1
+    cap.release()
+    print(f"Recorded {frame_index} frames to {args.out}")
+
+
+def replay(args):
+    tracker = PlateTracker(agreement=args.agreement, min_reads=args.min_reads, max_ocr_runs=args.max_ocr_runs,
+                           settle_agreement=args.settle_agreement)
+
+    boxes = 0
+    ocr_reads = 0
+    commits = []  # (text, truth, agreed)
+    single_frame = defaultdict(set)  # truth -> distinct single-frame texts
+    single_frame_correct = 0
+    track_truth = {}
+
+    with open(args.recording) as f:
+        for line in f:
+            frame = json.loads(line)
+            plates = frame['plates']
+            boxes += len(plates)
+
+            tracks = tracker.update([(p['bbox'], p['conf']) for p in plates])
+            commits.extend((track.text, track_truth[track.track_id], False) for track in tracker.expired)
+            for plate, track in zip(plates, tracks):
+                text = ''.join(c for c, _ in plate['chars'])
+                truth = plate.get('truth')
+                track_truth.setdefault(track.track_id, truth)
+
+                # Baseline: every read is used on its own
+                if text:
+                    single_frame[truth].add(text)
+                    single_frame_correct += text == truth
+
+                if tracker.needs_ocr(track):
+                    ocr_reads += 1
+                    if tracker.add_reading(track, [tuple(c) for c in plate['chars']]):
+                        commits.append((track.text, track_truth[track.track_id], track.agreed))
+
+    print(f"plate boxes:           {boxes}")
+    print(f"OCR reads (voting):    {ocr_reads} ({ocr_reads / max(boxes, 1):.1%} of boxes)")
+    print(f"committed texts:       {len(commits)} ({len({t for t, _, _ in commits})} distinct, "
+          f"{sum(not agreed for _, _, agreed in commits)} settled below the agreement)")
+    print(f"single-frame texts:    {sum(len(v) for v in single_frame.values())} distinct")
+
+    truths = {t for t in single_frame if t is not None}
+    if truths:
+        correct = sum(text == truth for text, truth, _ in commits)
+        settled = [text == truth for text, truth, agreed in commits if not agreed]
+        per_truth = defaultdict(int)
+        for _, truth, _ in commits:
+            per_truth[truth] += 1
+        print(f"vehicles:              {len(truths)}")
+        print(f"voting accuracy:       {correct / max(len(commits), 1):.1%} of commits correct, "
+              f"{len(truths - set(per_truth))} vehicles never committed, "
+              f"{sum(n - 1 for n in per_truth.values() if n > 1)} duplicate commits")
+        if settled:
+            print(f"settled accuracy:      {sum(settled) / len(settled):.1%} of settled texts correct")
+        print(f"single-frame accuracy: {single_frame_correct / max(boxes, 1):.1%} of reads correct, "
+              f"{sum(len(v) - 1 for v in single_frame.values())} extra texts that would be stored as new plates")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline evaluation of per-track text voting")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    p = commands.add_parser("synthetic", help="Generate a noisy recording with ground truth")
+    p.add_argument("--out", default="voting_recording.jsonl")
+    p.add_argument("--vehicles", type=int, default=200)
+    p.add_argument("--spacing", type=float, default=12, help="Frames between vehicles entering")
+    p.add_argument("--min-frames", type=int, default=20)
+    p.add_argument("--max-frames", type=int, default=60)
+    p.add_argument("--noise", type=float, default=0.1, help="Per-character error rate")
+    p.add_argument("--dropout", type=float, default=0.05, help="Chance a plate is not detected in a frame")
+    p.add_argument("--seed", type=int, default=0)
+
+    p = commands.add_parser("record", help="Record plate boxes and OCR reads from a video")
+    p.add_argument("--video", required=True)
+    p.add_argument("--out", default="voting_recording.jsonl")
+    p.add_argument("--plate-model", default="models/PlateModel/weights/best.pt")
+    p.add_argument("--char-model", default="models/CharModel/weights/best.pt")
+    p.add_argument("--conf", type=float, default=0.75)
+
+    p = commands.add_parser("replay", help="Replay a recording through the tracker and voter")
+    p.add_argument("recording")
+    p.add_argument("--agreement", type=float, default=0.7)
+    p.add_argument("--min-reads", type=int, default=3)
+    p.add_argument("--max-ocr-runs", type=int, default=30, help="OCR reads per track before it is settled")
+    p.add_argument("--settle-agreement", type=float, default=0.4,
+                   help="Agreement a settled track's text needs, lower ones are dropped")
+
+    args = parser.parse_args()
+    {"synthetic": synthetic, "record": record, "replay": replay}[args.command](args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+# Reproducible benchmark suite: detection with stub models on synthetic plates, database reads and writes,
+# search and export at several table sizes. Runs on a CPU without model weights or network, and writes the
+# results as JSON so two commits can be compared.
+#   python benchmarks/run_suite.py --out before.json
+#   python benchmarks/run_suite.py --out after.json --compare before.json
+#   python benchmarks/run_suite.py --quick --only detect
+#
+# The stub models cost far less than real YOLO inference, so detection timings measure the code around the
+# models (box conversion, tracking, batched OCR, owner lookups, vehicle matching), not the models themselves.
+# Use bench_backends.py for those.
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+
+from CarPlateDetector import CarPlateDetector
+from DatabaseManager import DatabaseManager
+from Metrics import MetricsRegistry
+from PlateExporter import PlateExporter
+from stub_models import StubCharModel, StubPlateModel, StubVehicleModel
+from synthetic import plate_scenes, plate_texts, random_plate_text
+
+PLATES_PER_FRAME = (1, 4, 16)
+DB_SIZES = (1000, 10000, 100000)
+QUICK_DB_SIZES = (1000, 10000)
+VEHICLE_TYPES = ("car", "truck", "bus", None)
+
+
+def timed(fn, runs, warmup=1):
+    # Seconds of every call after warmup calls
+    for _ in range(warmup):
+        fn()
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def result(name, size, times, items=1, **extra):
+    # items is the number of operations one call performs, e.g. rows of a bulk insert
+    times = sorted(times)
+    median = statistics.median(times)
+    entry = {
+        'name': name,
+        'size': size,
+        'runs': len(times),
+        'median_ms': round(median * 1000, 4),
+        'p95_ms': round(times[min(len(times) - 1, int(len(times) * 0.95))] * 1000, 4),
+        'ops_per_s': round(items / median, 1) if median else None,
+    }
+    entry.update(extra)
+    print(f"{name:<28} {size:>7} {entry['median_ms']:>10.3f} {entry['p95_ms']:>10.3f} {entry['ops_per_s']:>12,.0f}"
+          + (f"  {extra}" if extra else ""))
+    return entry
+
+
+def detector_for(texts, db, char_imgsz):
+    # cooldown=0 so every frame goes all the way to the owner lookup, a separate registry keeps the
+    # process-wide metrics out of it
+    return CarPlateDetector(StubPlateModel(), StubCharModel(texts, imgsz=char_imgsz), StubVehicleModel(),
+                            conf_threshold=0.5, cooldown=0, db=db, char_imgsz=char_imgsz, metrics=MetricsRegistry())
+
+
+def bench_detection(args, tmp):
+    results = []
+    db = DatabaseManager(os.path.join(tmp, "detect.db"))
+    for plates in PLATES_PER_FRAME:
+        texts = plate_texts(plates, seed=plates)
+        # Every other plate is known, half of those with a vehicle type so the vehicle model runs for the rest
+        db.insert_plates_bulk((text, f"Owner {i}", "car" if i % 4 == 0 else None)
+                              for i, text in enumerate(texts) if i % 2 == 0)
+        frames = [frame for frame, _ in plate_scenes(texts, args.frames, seed=plates)]
+
+        # Every plate read on every frame, like a stream of unrelated photos. The first frame also checks that
+        # the pipeline still reports the right text and vehicle type (from the database when it has one).
+        detector = detector_for(texts, db, args.char_imgsz)
+        expected = {text: "car" if i % 4 == 0 else vehicle_type
+                    for i, (_, text, vehicle_type) in enumerate(next(plate_scenes(texts, 1))[1])}
+        found = detector.detect_plate(frames[0], track=False)
+        correct = sum(1 for plate in found if expected.get(plate.text) == plate.vehicle)
+        frame_iter = itertools.cycle(frames)
+        times = timed(lambda: detector.detect_plate(next(frame_iter), track=False), args.frames)
+        results.append(result("detect_plate", plates, times, plates, correct=f"{correct}/{plates}"))
+
+        # A video: plates are tracked and only read until their text is committed
+        detector = detector_for(texts, db, args.char_imgsz)
+        frame_iter = itertools.cycle(frames)
+        times = timed(lambda: detector.detect_plate(next(frame_iter), source="bench"), args.frames)
+        results.append(result("detect_plate_tracked", plates, times, plates, ocr_crops=detector.ocr_crops))
+
+        # Four cameras through one batched call
+        detector = detector_for(texts, db, args.char_imgsz)
+        frame_iter = itertools.cycle(frames)
+
+        def batch():
+            images = [next(frame_iter) for _ in range(4)]
+            detector.detect_plates(images, sources=[f"camera{k}" for k in range(4)], track=False)
+
+        times = timed(batch, max(1, args.frames // 4))
+        results.append(result("detect_plates_batch4", plates, times, 4 * plates))
+    db.close()
+    return results
+
+
+def fill_database(db, size, seed):
+    # size plates with owners, spread over a year, returns their texts
+    rng = np.random.default_rng(seed)
+    texts = set()
+    while len(texts) < size:
+        texts.add(random_plate_text(rng))
+    texts = sorted(texts)
+    start = time.mktime((2025, 1, 1, 0, 0, 0, 0, 0, -1))
+    db.insert_plates_bulk(
+        (text, f"Owner {i}", VEHICLE_TYPES[i % len(VEHICLE_TYPES)],
+         time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(start + i * 31536000 // size)))
+        for i, text in enumerate(texts))
+    return texts
+
+
+def bench_database(args, tmp):
+    results = []
+    rng = random.Random(0)
+    for size in args.db_sizes:
+        path = os.path.join(tmp, f"plates_{size}.db")
+        db = DatabaseManager(path)
+
+        # Bulk load of the whole table into an empty database
+        start = time.perf_counter()
+        texts = fill_database(db, size, seed=size)
+        results.append(result("db_insert_bulk", size, [time.perf_counter() - start], size))
+
+        # Single upserts of new plates, one transaction each
+        new = iter(f"99ZZ{i:05d}" for i in range(args.runs + 1))
+        times = timed(lambda: db.insert_plate(next(new), "Bench Owner", "car"), args.runs)
+        results.append(result("db_insert_plate", size, times))
+
+        # Owner lookups of plates that are not cached yet, then of the same plates again
+        db.owner_cache.invalidate()
+        sample = rng.sample(texts, min(len(texts), args.runs + 1))
+        lookups = iter(sample)
+        times = timed(lambda: db.get_owner(next(lookups)), args.runs)
+        results.append(result("db_get_owner_cold", size, times))
+        lookups = iter(sample)
+        times = timed(lambda: db.get_owner(next(lookups)), args.runs)
+        results.append(result("db_get_owner_warm", size, times))
+
+        start = time.perf_counter()
+        db.preload_owner_cache()
+        results.append(result("db_preload_owner_cache", size, [time.perf_counter() - start], size))
+        db.owner_cache.invalidate()
+
+        # Search: a plate prefix, an owner substring (too short for full-text search) and a vehicle type
+        for label, term in (("plate", texts[len(texts) // 2][:4]), ("owner", "r 1"), ("type", "truck")):
+            times = timed(lambda: db.search_plates(term, limit=200), args.runs // 10 or 1)
+            results.append(result(f"db_search_{label}", size, times))
+
+        # Paging: the first page and a page deep in the table, both sorted by date
+        times = timed(lambda: db.fetch_plates_page(limit=200, sort_column="date_time"), args.runs // 10 or 1)
+        results.append(result("db_fetch_page_first", size, times))
+        last = db.fetch_plates_page(limit=size // 2, sort_column="date_time")[-1]
+        after = (last[4], last[0])
+        times = timed(lambda: db.fetch_plates_page(after=after, limit=200, sort_column="date_time"),
+                      args.runs // 10 or 1)
+        results.append(result("db_fetch_page_deep", size, times))
+        # A scroll bar jump to the same depth, read by offset
+        times = timed(lambda: db.fetch_plates_at(size // 2, limit=200, sort_column="date_time"),
+                      args.runs // 10 or 1)
+        results.append(result("db_fetch_page_jump", size, times))
+
+        # Export of the whole table
+        exporter = PlateExporter(db)
+        formats = ["csv"]
+        try:
+            import pyarrow  # noqa: F401
+            formats.append("parquet")
+        except ImportError:
+            pass
+        for fmt in formats:
+            out = os.path.join(tmp, f"export_{size}.{fmt}")
+            times = timed(lambda: exporter.export(out), max(1, args.export_runs), warmup=0)
+            results.append(result(f"export_{fmt}", size, times, size))
+
+        db.close()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO, capture_output=True, text=True,
+                              timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def environment():
+    return {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'opencv': cv2.__version__,
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'time': time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+
+def compare(results, baseline_path, threshold):
+    # Print the median ratio of every benchmark against the baseline, returns the number of regressions
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    old = {(r['name'], r['size']): r for r in baseline['results']}
+    print(f"\nagainst {baseline_path} (commit {baseline['environment'].get('commit')})")
+    print(f"{'benchmark':<28} {'size':>7} {'old ms':>10} {'new ms':>10} {'ratio':>7}")
+    regressions = 0
+    for r in results:
+        before = old.get((r['name'], r['size']))
+        if not before or not before['median_ms']:
+            continue
+        ratio = r['median_ms'] / before['median_ms']
+        flag = ""
+        if ratio > threshold:
+            flag = "  slower"
+            regressions += 1
+        elif ratio < 1 / threshold:
+            flag = "  faster"
+        print(f"{r['name']:<28} {r['size']:>7} {before['median_ms']:>10.3f} {r['median_ms']:>10.3f} "
+              f"{ratio:>6.2f}x{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reproducible benchmark suite with stub models")
+    parser.add_argument("--out", help="Write the results to this JSON file")
+    parser.add_argument("--compare", help="JSON file of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="Median ratio above which --compare reports a regression and exits with 1")
+    parser.add_argument("--only", choices=("detect", "db"), help="Run one group of benchmarks")
+    parser.add_argument("--quick", action="store_true", help="Smaller tables and fewer runs")
+    parser.add_argument("--frames", type=int, default=200, help="Frames per detection benchmark")
+    parser.add_argument("--runs", type=int, default=1000, help="Calls per database benchmark")
+    parser.add_argument("--export-runs", type=int, default=3)
+    parser.add_argument("--db-sizes", type=lambda s: tuple(int(n) for n in s.split(",")),
+                        help=f"Comma separated table sizes, default {','.join(map(str, DB_SIZES))}")
+    parser.add_argument("--char-imgsz", type=int, default=256)
+    args = parser.parse_args()
+    if args.quick:
+        args.frames, args.runs, args.export_runs = min(args.frames, 50), min(args.runs, 200), 1
+    args.db_sizes = args.db_sizes or (QUICK_DB_SIZES if args.quick else DB_SIZES)
+
+    # One thread for OpenCV, so timings do not depend on how many cores happen to be idle
+    cv2.setNumThreads(1)
+
+    print(f"{'benchmark':<28} {'size':>7} {'median ms':>10} {'p95 ms':>10} {'ops/s':>12}")
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.only in (None, "detect"):
+            results += bench_detection(args, tmp)
+        if args.only in (None, "db"):
+            results += bench_database(args, tmp)
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({'environment': environment(), 'results': results}, f, indent=2)
+        print(f"\nResults written to {args.out}")
+
+    if args.compare and compare(results, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
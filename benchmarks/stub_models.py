@@ -0,0 +1,122 @@
+# Deterministic stand-ins for the three YOLO models, for benchmarks that must run anywhere: no weights, no
+# PyTorch, no network and the same boxes on every machine. They find what synthetic.plate_scenes draws with a
+# few OpenCV calls and answer with the same Results/Boxes as the real backends, so everything after the forward
+# pass (box conversion, tracking, OCR batching, database lookups, vehicle matching) runs the real code.
+#
+#   detector = CarPlateDetector(StubPlateModel(), StubCharModel(texts), StubVehicleModel(), db=db)
+import string
+
+import cv2
+import numpy as np
+
+from InferenceBackend import Boxes, Results, letterbox
+from synthetic import VEHICLE_COLORS, plate_index
+
+CHARACTERS = string.digits + string.ascii_uppercase
+
+
+def _images(source):
+    return [source] if isinstance(source, np.ndarray) else list(source)
+
+
+def _results(boxes, names, conf_threshold=None, score=0.9):
+    # Results of a list of (x1, y1, x2, y2, cls) boxes, all with the same confidence
+    if conf_threshold is not None and score < conf_threshold:
+        boxes = []
+    xyxy = np.asarray([box[:4] for box in boxes], dtype=np.float32).reshape(-1, 4)
+    cls = np.asarray([box[4] for box in boxes], dtype=np.float32)
+    return Results(Boxes(xyxy, np.full(len(boxes), score, dtype=np.float32), cls), names)
+
+
+def _white_mask(image):
+    # Plate backgrounds are the only near-white pixels of a scene
+    return cv2.inRange(image, (200, 200, 200), (255, 255, 255))
+
+
+class StubPlateModel:
+    # Plate boxes: bounding boxes of the near-white regions
+    names = {0: 'plate'}
+
+    def __init__(self, min_area=60):
+        self.min_area = min_area
+
+    def __call__(self, source, conf=None, imgsz=None):
+        results = []
+        for image in _images(source):
+            contours, _ = cv2.findContours(_white_mask(image), cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+            h, w = image.shape[:2]
+            boxes = []
+            for contour in contours:
+                x, y, bw, bh = cv2.boundingRect(contour)
+                if bw * bh >= self.min_area and bw > bh:
+                    # Grow by the black border drawn around the plate
+                    boxes.append((max(0, x - 2), max(0, y - 2), min(w, x + bw + 2), min(h, y + bh + 2), 0))
+            # Long texts run into the plate border and cut off white islands, those are part of a larger plate
+            boxes = sorted(b for b in boxes if not any(o is not b and o[0] <= b[0] and o[1] <= b[1] and
+                                                       b[2] <= o[2] and b[3] <= o[3] for o in boxes))
+            results.append(_results(boxes, self.names, conf))
+        return results
+
+
+class StubCharModel:
+    # Character boxes of the plate a crop shows, the plate is identified by the tint of its background and its
+    # text taken from texts (the list given to plate_scenes). Characters are spread over the plate width.
+    names = dict(enumerate(CHARACTERS))
+
+    def __init__(self, texts, imgsz=640):
+        self.texts = list(texts)
+        self.imgsz = imgsz
+        self._classes = {c: i for i, c in self.names.items()}
+
+    def __call__(self, source, conf=None, imgsz=None):
+        results = []
+        for image in _images(source):
+            if image.shape[0] != image.shape[1]:
+                image = letterbox(image, imgsz or self.imgsz)[0]  # Single crops arrive as they are
+            # The letterboxed plate is centered: its middle column gives the height, a row near its top edge
+            # (above the characters) the width and the tint
+            h, w = image.shape[:2]
+            ys = np.flatnonzero(_white_mask(image[:, w // 2:w // 2 + 1]))
+            if not len(ys):
+                results.append(_results([], self.names, conf))
+                continue
+            top = ys[0] + max(1, (ys[-1] - ys[0]) // 8)
+            xs = np.flatnonzero(_white_mask(image[top:top + 1]))
+            if len(xs) < 4:
+                results.append(_results([], self.names, conf))
+                continue
+
+            index = plate_index(np.median(image[top, xs], axis=0))
+            text = self.texts[index] if index < len(self.texts) else ""
+            x, y, w, h = xs[0], ys[0], xs[-1] - xs[0] + 1, ys[-1] - ys[0] + 1
+            step = w / max(1, len(text))
+            boxes = [(x + k * step, y, x + (k + 1) * step, y + h, self._classes[c]) for k, c in enumerate(text)]
+            results.append(_results(boxes, self.names, conf))
+        return results
+
+
+class StubVehicleModel:
+    # Vehicle boxes: the dark vehicle bodies, labelled by their body color
+    names = dict(enumerate(VEHICLE_COLORS))
+
+    def __init__(self, min_area=2000):
+        self.min_area = min_area
+        self._labels = {color: i for i, color in enumerate(VEHICLE_COLORS.values())}
+
+    def __call__(self, source, conf=None, imgsz=None):
+        results = []
+        for image in _images(source):
+            mask = cv2.inRange(image, (0, 0, 0), (50, 50, 50))
+            contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+            boxes = []
+            for contour in contours:
+                x, y, w, h = cv2.boundingRect(contour)
+                if w * h < self.min_area:
+                    continue
+                color = tuple(int(c) for c in image[y + 1, x + 1])
+                # Nearest body color, noise may have moved it a little
+                label = min(self._labels, key=lambda c: sum(abs(a - b) for a, b in zip(c, color)))
+                boxes.append((x, y, x + w, y + h, self._labels[label]))
+            boxes.sort()
+            results.append(_results(boxes, self.names, conf))
+        return results
@@ -0,0 +1,118 @@
+import cv2
+import numpy as np
+
+PLATE_LETTERS = "ABCDEFGHJKLMNPRSTUVYZ"
+
+
+def random_plate_text(rng):
+    # Turkish style plate text: province code, 1-3 letters, 2-4 digits
+    province = f"{rng.integers(1, 82):02d}"
+    letters = ''.join(rng.choice(list(PLATE_LETTERS), size=rng.integers(1, 4)))
+    digits = ''.join(str(d) for d in rng.integers(0, 10, size=rng.integers(2, 5)))
+    return province + letters + digits
+
+
+def make_plate_crop(text, width=200, height=44, background=(255, 255, 255)):
+    # White plate with black characters and a blue country strip, similar to a real crop
+    crop = np.full((height, width, 3), background, dtype=np.uint8)
+    cv2.rectangle(crop, (0, 0), (width // 12, height), (160, 60, 0), -1)
+    cv2.rectangle(crop, (0, 0), (width - 1, height - 1), (0, 0, 0), 2)
+    cv2.putText(crop, text, (width // 10, int(height * 0.75)), cv2.FONT_HERSHEY_SIMPLEX,
+                height / 40, (0, 0, 0), 2, cv2.LINE_AA)
+    return crop
+
+
+def make_plate_crops(count, seed=0):
+    rng = np.random.default_rng(seed)
+    return [make_plate_crop(random_plate_text(rng)) for _ in range(count)]
+
+
+def lane_frames(count, width=1280, height=720, vehicle_every=150, vehicle_frames=40, noise=3, seed=0):
+    # Fixed camera over a lane: static background with sensor noise, now and then a vehicle with a plate drives
+    # through the frame. Yields (frame, vehicle_visible).
+    rng = np.random.default_rng(seed)
+    background = np.full((height, width, 3), 90, dtype=np.uint8)
+    cv2.rectangle(background, (0, height // 2), (width, height), (70, 70, 70), -1)  # Road
+    cv2.rectangle(background, (width // 2 - 10, height // 3), (width // 2 + 10, height // 2), (0, 0, 200), -1)  # Barrier
+
+    plate = make_plate_crop(random_plate_text(rng))
+    for i in range(count):
+        frame = background.copy()
+        # Vehicle body moves left to right with its plate near the bottom
+        t = i % vehicle_every
+        x = int((width + 400) * t / vehicle_frames) - 400
+        visible = t < vehicle_frames and x + 400 > 0
+        if visible:
+            y = height // 2
+            cv2.rectangle(frame, (x, y), (x + 400, y + 220), (25, 25, 40), -1)
+            px, py = x + 100, y + 160
+            x1, x2 = max(0, px), min(width, px + plate.shape[1])
+            if x2 > x1:
+                frame[py:py + plate.shape[0], x1:x2] = plate[:, x1 - px:x2 - px]
+
+        if noise:
+            frame = cv2.add(frame, rng.integers(0, noise, size=frame.shape, dtype=np.uint8))
+        yield frame, visible
+
+
+# Plates of plate_scenes carry their index in a slight tint of the white background, so the stub models can
+# tell which plate a crop shows without reading it. Steps of 4 survive resizing and a little sensor noise.
+PLATE_CODES = 144
+VEHICLE_COLORS = {'car': (25, 25, 40), 'truck': (25, 40, 25), 'bus': (40, 25, 25)}
+
+
+def plate_color(index):
+    a, b = divmod(index % PLATE_CODES, 12)
+    return 255 - 4 * a, 255 - 4 * b, 255
+
+
+def plate_index(color):
+    # Inverse of plate_color for a measured (B, G, R) background
+    a = int(round((255 - float(color[0])) / 4))
+    b = int(round((255 - float(color[1])) / 4))
+    return a * 12 + b
+
+
+def plate_texts(count, seed=0):
+    # count distinct plate texts
+    rng = np.random.default_rng(seed)
+    texts = []
+    while len(texts) < count:
+        text = random_plate_text(rng)
+        if text not in texts:
+            texts.append(text)
+    return texts
+
+
+def plate_scenes(texts, count, width=1280, height=720, speed=4, noise=0, seed=0):
+    # One vehicle per text in a grid over the frame, all of them creeping to the right by speed pixels a frame.
+    # Yields (frame, [(bbox, text, vehicle_type), ...]) with the true plate box of every vehicle.
+    rng = np.random.default_rng(seed)
+    background = np.full((height, width, 3), 90, dtype=np.uint8)
+    cv2.rectangle(background, (0, height // 2), (width, height), (70, 70, 70), -1)  # Road
+
+    cols = int(np.ceil(np.sqrt(len(texts))))
+    rows = int(np.ceil(len(texts) / cols)) if texts else 1
+    cell_w, cell_h = width // cols, height // rows
+    body_w, body_h = int(cell_w * 0.6), int(cell_h * 0.7)
+    plate_w, plate_h = body_w // 2, max(12, body_w // 9)
+    types = list(VEHICLE_COLORS)
+    plates = [make_plate_crop(text, plate_w, plate_h, plate_color(i)) for i, text in enumerate(texts)]
+
+    for f in range(count):
+        frame = background.copy()
+        shift = (f * speed) % max(1, cell_w - body_w)
+        truths = []
+        for i, (text, plate) in enumerate(zip(texts, plates)):
+            row, col = divmod(i, cols)
+            x = col * cell_w + shift
+            y = row * cell_h + (cell_h - body_h) // 2
+            vehicle_type = types[i % len(types)]
+            cv2.rectangle(frame, (x, y), (x + body_w, y + body_h), VEHICLE_COLORS[vehicle_type], -1)
+            px, py = x + (body_w - plate_w) // 2, y + body_h - plate_h - body_h // 10
+            frame[py:py + plate_h, px:px + plate_w] = plate
+            truths.append(((px, py, px + plate_w, py + plate_h), text, vehicle_type))
+
+        if noise:
+            frame = cv2.add(frame, rng.integers(0, noise, size=frame.shape, dtype=np.uint8))
+        yield frame, truths
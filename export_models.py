@@ -0,0 +1,36 @@
+# Export the YOLO models to ONNX or OpenVINO so they can run without PyTorch
+#   python export_models.py --format onnx
+#   python export_models.py --format openvino --models models/CharModel/weights/best.pt
+#
+# Needs ultralytics (and the exporter it asks for) once, the exported models only need onnxruntime or
+# openvino at runtime. Point the model paths in the Settings page (or lpr.py) at the exported files.
+import argparse
+
+DEFAULT_MODELS = [
+    "models/PlateModel/weights/best.pt",
+    "models/CharModel/weights/best.pt",
+    "models/VehicleModel/weights/best.pt",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the YOLO models to ONNX or OpenVINO")
+    parser.add_argument("--format", choices=["onnx", "openvino"], default="onnx")
+    parser.add_argument("--models", nargs="+", default=DEFAULT_MODELS)
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--static", action="store_true",
+                        help="Fixed batch and input size, batched inference then runs one image at a time")
+    args = parser.parse_args()
+
+    from ultralytics import YOLO
+
+    for model_path in args.models:
+        options = {'format': args.format, 'imgsz': args.imgsz, 'dynamic': not args.static}
+        if args.format == "onnx":
+            options['simplify'] = True
+        exported = YOLO(model_path).export(**options)
+        print(f"{model_path} -> {exported}")
+
+
+if __name__ == "__main__":
+    main()
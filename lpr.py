@@ -0,0 +1,397 @@
+# Headless license plate recognition over image folders, globs and video files
+#
+#   python lpr.py archive/ "cams/**/*.mp4" --out results.jsonl --workers 4
+#   python lpr.py shots/*.jpg --format csv --out results.csv --annotate annotated/
+#   python lpr.py --stream 0 rtsp://cam2/live --out live.jsonl
+#
+# Every worker process loads its own models, results are written by the main process as they arrive.
+# --stream treats the inputs as live sources that share one set of models through a StreamManager.
+import argparse
+import csv
+import glob
+import json
+import os
+import queue
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import cv2
+from DetectionPipeline import FrameScheduler
+from MotionGate import MotionGate
+
+IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.bmp'}
+VIDEO_EXTENSIONS = {'.mp4', '.avi', '.mov', '.mkv'}
+
+FIELDS = ['source', 'frame', 'time', 'plate', 'confidence', 'x1', 'y1', 'x2', 'y2', 'owner', 'vehicle']
+
+_detector = None  # CarPlateDetector of the current worker process
+_annotate_dir = None
+_stride = 1  # Detect on every n-th video frame
+_motion = False  # Gate video frames with a MotionGate
+_motion_roi = False
+
+
+def collect_inputs(patterns):
+    # Expand directories (recursively) and glob patterns into a sorted list of image and video files
+    files = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for root, _, names in os.walk(pattern):
+                files.extend(os.path.join(root, name) for name in names)
+        elif glob.has_magic(pattern):
+            files.extend(glob.glob(pattern, recursive=True))
+        else:
+            files.append(pattern)
+
+    known = IMAGE_EXTENSIONS | VIDEO_EXTENSIONS
+    return sorted({f for f in files if os.path.splitext(f)[1].lower() in known})
+
+
+def annotate(image, plates):
+    # Draw the plate boxes and texts the same way the GUI does
+    for plate in plates:
+        x1, y1, x2, y2 = plate.bbox
+        cv2.rectangle(image, (x1, y1), (x2, y2), (0, 255, 0), 2)
+
+        confidence_percent = plate.confidence * 100
+        text = f"{plate.text} ({plate.vehicle}) - {confidence_percent:.1f}%"
+        cv2.putText(image, text, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 255, 0), 2)
+    return image
+
+
+def _init_worker(options):
+    # Load the models once per worker process, imported here so the main process stays light
+    global _detector, _annotate_dir, _stride, _motion, _motion_roi
+    from CarPlateDetector import CarPlateDetector
+    from DatabaseManager import DatabaseManager
+    from DedupStore import DedupStore
+
+    # With a dedup database the workers share which plates they reported within the cooldown
+    dedup = DedupStore(options['cooldown'], path=options['dedup_db']) if options.get('dedup_db') else None
+    _detector = CarPlateDetector(
+        plate_model_path=options['plate_model'],
+        char_model_path=options['char_model'],
+        vehicle_model_path=options['vehicle_model'],
+        conf_threshold=options['conf'],
+        cooldown=options['cooldown'],
+        db=DatabaseManager(options['db']),
+        plate_imgsz=options.get('plate_imgsz'),
+        char_imgsz=options.get('char_imgsz', 640),
+        vehicle_imgsz=options.get('vehicle_imgsz'),
+        dedup=dedup,
+    )
+    _annotate_dir = options['annotate']
+    _stride = options.get('stride', 1)
+    _motion = options.get('motion', False)
+    _motion_roi = options.get('motion_roi', False)
+
+
+def _record(source, frame_index, seconds, plate):
+    x1, y1, x2, y2 = plate.bbox
+    return {
+        'source': source,
+        'frame': frame_index,
+        'time': seconds,
+        'plate': plate.text,
+        'confidence': round(plate.confidence, 4),
+        'x1': x1, 'y1': y1, 'x2': x2, 'y2': y2,
+        'owner': plate.owner,
+        'vehicle': plate.vehicle,
+    }
+
+
+def _annotated_path(index, source, frame_index=None):
+    # Prefixed with the input index so files with the same name in different folders do not collide
+    stem = os.path.splitext(os.path.basename(source))[0]
+    suffix = f"_f{frame_index:06d}" if frame_index is not None else ""
+    return os.path.join(_annotate_dir, f"{index:06d}_{stem}{suffix}.jpg")
+
+
+def process_file(index, source):
+    # Run detection on one image or video file, returns its result records
+    if os.path.splitext(source)[1].lower() in VIDEO_EXTENSIONS:
+        return _process_video(index, source)
+    return _process_image(index, source)
+
+
+def _process_image(index, source):
+    image = cv2.imread(source)
+    if image is None:
+        raise ValueError(f"Could not read image {source}")
+
+    plates = _detector.detect_plate(image, source, track=False)
+    if _annotate_dir and plates:
+        cv2.imwrite(_annotated_path(index, source), annotate(image, plates))
+    return [_record(source, None, None, plate) for plate in plates]
+
+
+def _process_video(index, source):
+    cap = cv2.VideoCapture(source)
+    if not cap.isOpened():
+        raise ValueError(f"Could not open video {source}")
+
+    fps = cap.get(cv2.CAP_PROP_FPS) or 0
+    scheduler = FrameScheduler(fps, _stride, adaptive=False)
+    gate = MotionGate() if _motion else None
+    records = []
+    frame_index = -1
+    _detector.reset_tracking(source)
+    try:
+        while True:
+            frame_index += 1
+            if not scheduler.should_decode():
+                # Frames between strides are only grabbed, decoding is the expensive part
+                if not cap.grab():
+                    break
+                continue
+
+            ret, frame = cap.read()
+            if not ret:
+                break
+
+            moving, region = gate.check(frame) if gate else (True, None)
+            if not moving:
+                continue
+
+            # Tracked plates are reported once, when their OCR reads agree
+            plates = _detector.detect_plate(frame, source, region=region if _motion_roi else None)
+            seconds = round(frame_index / fps, 3) if fps > 0 else None
+            records.extend(_record(source, frame_index, seconds, plate) for plate in plates)
+
+            if _annotate_dir and plates:
+                cv2.imwrite(_annotated_path(index, source, frame_index), annotate(frame, plates))
+    finally:
+        cap.release()
+        _detector.reset_tracking(source)
+
+    if gate:
+        print(f"{source}: motion gate skipped {gate.skipped_fraction:.0%} of {gate.frames} frames", file=sys.stderr)
+    return records
+
+
+def log_records(event_log, records):
+    for r in records:
+        event_log.log(r['plate'], r['confidence'], (r['x1'], r['y1'], r['x2'], r['y2']), r['vehicle'], r['source'])
+
+
+def publish_alerts(alerts, records):
+    # Alerts for the plates found in the database, published by the main process whichever worker found them
+    for r in records:
+        if r['owner'] != "Not in database":
+            alerts.publish(r['plate'], r['owner'], r['vehicle'], r['source'])
+
+
+class ResultWriter:
+    # Writes result records as JSON Lines or CSV, to a file or stdout
+    def __init__(self, path, fmt):
+        self.file = sys.stdout if path == '-' else open(path, 'w', newline='', encoding='utf-8')
+        self.fmt = fmt
+        if fmt == 'csv':
+            self.writer = csv.DictWriter(self.file, fieldnames=FIELDS)
+            self.writer.writeheader()
+
+    def write(self, records):
+        for record in records:
+            if self.fmt == 'csv':
+                self.writer.writerow(record)
+            else:
+                self.file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self.file.flush()
+
+    def close(self):
+        if self.file is not sys.stdout:
+            self.file.close()
+
+
+def _results(files, options, workers):
+    # Yield (source, records, error) per file as they finish
+    if workers <= 1:
+        _init_worker(options)
+        for index, source in enumerate(files):
+            try:
+                yield source, process_file(index, source), None
+            except Exception as e:
+                yield source, [], e
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(options,)) as pool:
+        futures = {pool.submit(process_file, index, source): source for index, source in enumerate(files)}
+        for future in as_completed(futures):
+            try:
+                yield futures[future], future.result(), None
+            except Exception as e:
+                yield futures[future], [], e
+
+
+def run_streams(sources, options, writer, event_log, max_batch, alerts=None):
+    # Process live sources side by side until all of them end or Ctrl+C, returns (sources failed, plates)
+    from StreamManager import StreamManager
+
+    _init_worker(options)
+    pending = queue.Queue()  # Records from the inference thread, written by this thread
+    frame_counts = {}
+    start = time.perf_counter()
+
+    def on_result(source, frame, plates):
+        frame_index = frame_counts.get(source, 0)
+        frame_counts[source] = frame_index + 1
+        if not plates:
+            return
+        seconds = round(time.perf_counter() - start, 3)
+        pending.put([_record(source, frame_index, seconds, plate) for plate in plates])
+        if _annotate_dir:
+            cv2.imwrite(_annotated_path(0, source.replace('/', '_'), frame_index), annotate(frame, plates))
+
+    manager = StreamManager(_detector, max_batch=max_batch, on_result=on_result, motion=_motion,
+                            motion_roi=_motion_roi)
+    failed = 0
+    for source in sources:
+        if not manager.add_source(source):
+            print(f"Could not open {source}", file=sys.stderr)
+            failed += 1
+    manager.start()
+
+    plates = 0
+    try:
+        while manager.sources or not pending.empty():
+            try:
+                records = pending.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            writer.write(records)
+            plates += len(records)
+            if event_log:
+                log_records(event_log, records)
+            if alerts:
+                publish_alerts(alerts, records)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        manager.stop()
+    return failed, plates
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="lpr", description="Recognize license plates in image and video files")
+    parser.add_argument("inputs", nargs="+", help="Image/video files, directories or glob patterns")
+    parser.add_argument("--stream", action="store_true",
+                        help="Treat the inputs as live sources (device indices, files, RTSP URLs) run side by side")
+    parser.add_argument("--max-batch", type=int, default=8, help="Frames per inference call in --stream mode")
+    parser.add_argument("--out", default="-", help="Output file, - for stdout")
+    parser.add_argument("--format", choices=["jsonl", "csv"], help="Output format, guessed from --out by default")
+    parser.add_argument("--stride", type=int, default=1, help="Detect on every n-th video frame")
+    parser.add_argument("--motion", action="store_true", help="Skip video frames where nothing moves")
+    parser.add_argument("--motion-roi", action="store_true", help="Search plates only in the moving region")
+    parser.add_argument("--annotate", metavar="DIR", help="Write frames with detected plates drawn on them to DIR")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes, each loads its own models")
+    parser.add_argument("--plate-model", default="models/PlateModel/weights/best.pt")
+    parser.add_argument("--char-model", default="models/CharModel/weights/best.pt")
+    parser.add_argument("--vehicle-model", default="models/VehicleModel/weights/best.pt")
+    parser.add_argument("--plate-imgsz", type=int, help="Plate model inference size, model default when not given")
+    parser.add_argument("--char-imgsz", type=int, default=640, help="Character model inference size")
+    parser.add_argument("--vehicle-imgsz", type=int, help="Vehicle model inference size")
+    parser.add_argument("--no-vehicle", action="store_true", help="Skip vehicle type detection")
+    parser.add_argument("--conf", type=float, default=0.75, help="Minimum plate detection confidence")
+    parser.add_argument("--cooldown", type=float, default=0,
+                        help="Seconds the same plate is suppressed for, off by default for archives")
+    parser.add_argument("--dedup-db", metavar="FILE",
+                        help="SQLite file through which workers and other lpr runs share the plates suppressed by "
+                             "--cooldown, so a car seen by several cameras is reported once")
+    parser.add_argument("--db", default="LPR.db", help="Database used for owner lookups")
+    parser.add_argument("--log-detections", action="store_true",
+                        help="Also record every detection in the Detections table of --db")
+    parser.add_argument("--alert-log", metavar="FILE", help="Append plates found in --db to FILE as JSON lines")
+    parser.add_argument("--alert-webhook", metavar="URL", help="POST every plate found in --db to URL as JSON")
+    parser.add_argument("--metrics-port", type=int,
+                        help="Serve Prometheus metrics on localhost at this port (with --stream or --workers 1)")
+    args = parser.parse_args(argv)
+
+    files = args.inputs if args.stream else collect_inputs(args.inputs)
+    if not files:
+        print("No image or video files found", file=sys.stderr)
+        return 2
+
+    fmt = args.format or ('csv' if args.out.lower().endswith('.csv') else 'jsonl')
+    if args.annotate:
+        os.makedirs(args.annotate, exist_ok=True)
+
+    options = {
+        'plate_model': args.plate_model,
+        'char_model': args.char_model,
+        'vehicle_model': None if args.no_vehicle else args.vehicle_model,
+        'plate_imgsz': args.plate_imgsz,
+        'char_imgsz': args.char_imgsz,
+        'vehicle_imgsz': args.vehicle_imgsz,
+        'conf': args.conf,
+        'cooldown': args.cooldown,
+        'dedup_db': args.dedup_db,
+        'db': args.db,
+        'annotate': args.annotate,
+        'stride': args.stride,
+        'motion': args.motion or args.motion_roi,
+        'motion_roi': args.motion_roi,
+    }
+
+    event_log = None
+    if args.log_detections:
+        # Detections are written by this process only, workers just read owners
+        from DatabaseManager import DatabaseManager
+        from DetectionLogWriter import DetectionLogWriter
+        event_log = DetectionLogWriter(DatabaseManager(args.db))
+
+    metrics_server = None
+    if args.metrics_port:
+        # Stage timings are recorded in the process that runs the detector, worker processes keep their own
+        from Metrics import MetricsServer
+        metrics_server = MetricsServer(args.metrics_port).start()
+
+    alerts = None
+    if args.alert_log or args.alert_webhook:
+        # Delivered from their own threads, a slow webhook does not hold up writing results
+        from AlertBus import AlertBus, LogFileSink, WebhookSink
+        alerts = AlertBus()
+        if args.alert_log:
+            alerts.add_sink(LogFileSink(args.alert_log))
+        if args.alert_webhook:
+            alerts.add_sink(WebhookSink(args.alert_webhook))
+
+    writer = ResultWriter(args.out, fmt)
+    start = time.perf_counter()
+    done = failed = plates = 0
+    try:
+        if args.stream:
+            failed, plates = run_streams(files, options, writer, event_log, args.max_batch, alerts)
+            done = len(files)
+        else:
+            for source, records, error in _results(files, options, args.workers):
+                done += 1
+                if error is not None:
+                    failed += 1
+                    print(f"Error processing {source}: {error}", file=sys.stderr)
+                    continue
+
+                writer.write(records)
+                plates += len(records)
+                if event_log:
+                    log_records(event_log, records)
+                if alerts:
+                    publish_alerts(alerts, records)
+                print(f"[{done}/{len(files)}] {source}: {len(records)} plates", file=sys.stderr)
+    finally:
+        writer.close()
+        if event_log:
+            event_log.close()
+            event_log.db.close()
+        if metrics_server:
+            metrics_server.stop()
+        if alerts:
+            alerts.close(timeout=30)  # Deliver the alerts still queued
+
+    print(f"Processed {done} files ({failed} failed), {plates} plates in {time.perf_counter() - start:.1f}s",
+          file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
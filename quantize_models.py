@@ -0,0 +1,123 @@
+# INT8 quantization of exported models for CPU deployments
+#   python quantize_models.py models/CharModel/weights/best.onnx --mode dynamic
+#   python quantize_models.py models/PlateModel/weights/best.onnx --mode static --calibration heldout/plates/images
+#   python quantize_models.py models/PlateModel/weights/best_openvino_model --calibration heldout/plates/images
+#
+# ONNX models are quantized with onnxruntime: dynamic (weights only, no data needed) or static (weights and
+# activations, calibrated on sample images; the faster one for convolutional models). OpenVINO models are
+# quantized with NNCF and always need calibration images. Check the result with
+# benchmarks/accuracy_latency.py before deploying it.
+import argparse
+import glob
+import os
+import shutil
+import sys
+
+import cv2
+
+from InferenceBackend import preprocess
+
+IMAGE_PATTERNS = ("*.jpg", "*.jpeg", "*.png", "*.bmp")
+
+
+def calibration_images(folder, limit):
+    paths = sorted(p for pattern in IMAGE_PATTERNS for p in glob.glob(os.path.join(folder, pattern)))[:limit]
+    images = [cv2.imread(p) for p in paths]
+    images = [image for image in images if image is not None]
+    if not images:
+        raise SystemExit(f"No calibration images found in {folder}")
+    return images
+
+
+def quantize_onnx(model_path, output_path, mode, images, imgsz, exclude):
+    import onnx
+    from onnxruntime.quantization import (CalibrationDataReader, QuantFormat, QuantType, quantize_dynamic,
+                                          quantize_static)
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    # Shape inference and graph cleanup first, as onnxruntime recommends before quantizing
+    prepared_path = output_path + ".prep.onnx"
+    try:
+        quant_pre_process(model_path, prepared_path, skip_symbolic_shape=True)
+    except Exception as e:
+        print(f"Pre-processing skipped: {e}")
+        shutil.copyfile(model_path, prepared_path)
+
+    model = onnx.load(prepared_path)
+    excluded = [node.name for node in model.graph.node if exclude and any(p in node.name for p in exclude)]
+
+    if mode == "dynamic":
+        quantize_dynamic(prepared_path, output_path, weight_type=QuantType.QInt8, nodes_to_exclude=excluded)
+    else:
+        input_name = model.graph.input[0].name
+
+        class Reader(CalibrationDataReader):
+            def __init__(self):
+                self.blobs = iter(preprocess([image], imgsz)[0] for image in images)
+
+            def get_next(self):
+                blob = next(self.blobs, None)
+                return None if blob is None else {input_name: blob}
+
+        quantize_static(prepared_path, output_path, Reader(), quant_format=QuantFormat.QDQ, per_channel=True,
+                        activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8, nodes_to_exclude=excluded)
+    os.remove(prepared_path)
+
+    # Keep the class names and sizes the ultralytics export stored in the model
+    source = onnx.load(model_path)
+    quantized = onnx.load(output_path)
+    if not quantized.metadata_props:
+        for prop in source.metadata_props:
+            quantized.metadata_props.add(key=prop.key, value=prop.value)
+        onnx.save(quantized, output_path)
+
+
+def quantize_openvino(model_path, output_dir, images, imgsz):
+    import nncf
+    import openvino as ov
+
+    xml_path = model_path if model_path.endswith(".xml") else glob.glob(os.path.join(model_path, "*.xml"))[0]
+    model = ov.Core().read_model(xml_path)
+    dataset = nncf.Dataset(images, lambda image: preprocess([image], imgsz)[0])
+    quantized = nncf.quantize(model, dataset, preset=nncf.QuantizationPreset.MIXED, subset_size=len(images))
+
+    os.makedirs(output_dir, exist_ok=True)
+    ov.save_model(quantized, os.path.join(output_dir, os.path.basename(xml_path)))
+    metadata = os.path.join(os.path.dirname(xml_path), "metadata.yaml")
+    if os.path.exists(metadata):
+        shutil.copy(metadata, output_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="INT8 quantization of ONNX and OpenVINO models")
+    parser.add_argument("model", help="Exported .onnx file or *_openvino_model directory")
+    parser.add_argument("--mode", choices=["dynamic", "static"], default="static",
+                        help="ONNX only, OpenVINO is always calibrated")
+    parser.add_argument("--calibration", help="Folder of representative images, e.g. a held-out set")
+    parser.add_argument("--limit", type=int, default=300, help="Calibration images to use")
+    parser.add_argument("--imgsz", type=int, default=640, help="Input size the model will run at")
+    parser.add_argument("--exclude", nargs="*", default=[],
+                        help="Keep nodes whose name contains one of these in float, e.g. /model.22/dfl")
+    parser.add_argument("--out", help="Output path, <name>_int8.onnx or <name>_int8_openvino_model by default")
+    args = parser.parse_args()
+
+    model_path = args.model.rstrip("/\\")
+    openvino = not model_path.endswith(".onnx")
+    if (openvino or args.mode == "static") and not args.calibration:
+        parser.error("--calibration is required for static quantization")
+    images = calibration_images(args.calibration, args.limit) if args.calibration else []
+
+    if openvino:
+        base = model_path[:-len("_openvino_model")] if model_path.endswith("_openvino_model") else model_path
+        output = args.out or base + "_int8_openvino_model"
+        quantize_openvino(model_path, output, images, args.imgsz)
+    else:
+        output = args.out or model_path[:-len(".onnx")] + "_int8.onnx"
+        quantize_onnx(model_path, output, args.mode, images, args.imgsz, args.exclude)
+
+    print(f"{args.model} -> {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
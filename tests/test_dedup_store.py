@@ -0,0 +1,160 @@
+# DedupStore under a simulated clock, so expiry is tested to the exact second without sleeping
+#   python -m unittest discover tests
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from DedupStore import DedupStore
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class DedupStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = Clock()
+
+    def test_first_sighting_is_admitted_and_repeats_are_suppressed(self):
+        store = DedupStore(ttl=10, clock=self.clock)
+        self.assertTrue(store.admit("34ABC123"))
+        self.assertFalse(store.admit("34ABC123"))
+        self.assertTrue(store.admit("06XYZ99"))
+        self.assertEqual(store.suppressed, 1)
+
+    def test_entry_expires_exactly_at_ttl(self):
+        store = DedupStore(ttl=10, clock=self.clock)
+        store.admit("34ABC123")
+
+        self.clock.now += 9.75
+        self.assertFalse(store.admit("34ABC123"))
+        self.clock.now += 0.25  # ttl seconds after the report
+        self.assertTrue(store.admit("34ABC123"))
+
+    def test_duplicate_does_not_extend_suppression(self):
+        store = DedupStore(ttl=10, clock=self.clock)
+        store.admit("34ABC123")
+
+        # Seen on every frame for the whole window, still reported again ttl seconds after the first report
+        for _ in range(9):
+            self.clock.now += 1
+            self.assertFalse(store.admit("34ABC123"))
+        self.clock.now += 1
+        self.assertTrue(store.admit("34ABC123"))
+
+    def test_expired_entries_are_dropped(self):
+        store = DedupStore(ttl=10, clock=self.clock)
+        for i in range(5):
+            store.admit(f"PLATE{i}")
+            self.clock.now += 1
+        self.assertEqual(len(store), 5)
+
+        self.clock.now += 10
+        store.admit("NEW")
+        self.assertEqual(len(store), 1)
+
+    def test_max_entries_evicts_oldest(self):
+        store = DedupStore(ttl=10, max_entries=3, clock=self.clock)
+        for key in ("A", "B", "C", "D"):
+            self.assertTrue(store.admit(key))
+            self.clock.now += 1
+
+        self.assertEqual(len(store), 3)
+        self.assertEqual(store.evicted, 1)
+        self.assertTrue(store.admit("A"))  # Forgotten early, within its ttl
+        self.assertFalse(store.admit("C"))
+        self.assertFalse(store.admit("D"))
+
+    def test_zero_ttl_disables_suppression(self):
+        store = DedupStore(ttl=0, clock=self.clock)
+        self.assertTrue(store.admit("34ABC123"))
+        self.assertTrue(store.admit("34ABC123"))
+        self.assertEqual(len(store), 0)
+        self.assertEqual(store.suppressed, 0)
+
+    def test_ttl_can_be_lowered_to_zero_later(self):
+        # CarPlateDetector.cooldown sets ttl on a running store
+        store = DedupStore(ttl=10, clock=self.clock)
+        store.admit("34ABC123")
+        store.ttl = 0
+        self.assertTrue(store.admit("34ABC123"))
+
+    def test_clear_forgets_everything(self):
+        store = DedupStore(ttl=10, clock=self.clock)
+        store.admit("34ABC123")
+        store.clear()
+        self.assertTrue(store.admit("34ABC123"))
+
+
+class SharedDedupStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = Clock()
+        self.tmp = tempfile.TemporaryDirectory()
+        path = os.path.join(self.tmp.name, "dedup.db")
+        self.first = DedupStore(ttl=10, clock=self.clock, path=path)
+        self.second = DedupStore(ttl=10, clock=self.clock, path=path)
+
+    def tearDown(self):
+        self.first.close()
+        self.second.close()
+        self.tmp.cleanup()
+
+    def test_second_store_is_refused_within_ttl(self):
+        self.assertTrue(self.first.admit("34ABC123"))
+        self.clock.now += 5
+        self.assertFalse(self.second.admit("34ABC123"))
+        self.assertEqual(self.second.suppressed, 1)
+
+    def test_second_store_is_accepted_after_ttl(self):
+        self.assertTrue(self.first.admit("34ABC123"))
+        self.clock.now += 9.5
+        self.assertFalse(self.second.admit("34ABC123"))
+        self.clock.now += 0.5  # ttl seconds after the first store's claim
+        self.assertTrue(self.second.admit("34ABC123"))
+
+        # The second store holds the claim now, the first is refused until ttl after it
+        self.clock.now += 1
+        self.assertFalse(self.first.admit("34ABC123"))
+
+    def test_refused_claim_is_remembered_locally(self):
+        self.first.admit("34ABC123")
+        self.clock.now += 2
+        self.second.admit("34ABC123")
+        self.assertEqual(len(self.second), 1)
+
+        # Suppressed without asking the shared table again, and only until ttl after the other store's claim
+        self.second.close()
+        self.clock.now += 7
+        self.assertFalse(self.second.admit("34ABC123"))
+        self.clock.now += 1
+        self.assertTrue(self.second.admit("34ABC123"))
+
+    def test_refused_claim_keeps_entries_in_time_order(self):
+        # Queued with the other store's older time, a refused claim at the back would hold up expiry
+        self.first.admit("34ABC123")
+        self.clock.now += 5
+        self.second.admit("06XYZ99")
+        self.second.admit("34ABC123")
+        self.assertEqual(list(self.second._entries.values()), [1005, 1005])
+
+        self.second.close()
+        self.clock.now += 10
+        self.assertTrue(self.second.admit("NEW"))
+        self.assertEqual(len(self.second), 1)
+        self.assertEqual(self.second._refused, {})
+
+    def test_different_plates_do_not_interfere(self):
+        self.assertTrue(self.first.admit("34ABC123"))
+        self.assertTrue(self.second.admit("06XYZ99"))
+        self.assertFalse(self.first.admit("06XYZ99"))
+
+
+if __name__ == "__main__":
+    unittest.main()
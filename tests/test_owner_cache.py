@@ -0,0 +1,106 @@
+# OwnerCache and DatabaseManager.get_owner under a simulated clock
+#   python -m unittest discover tests
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from DatabaseManager import DatabaseManager
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class OwnerCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = DatabaseManager(os.path.join(self.tmp.name, "plates.db"))
+        self.clock = Clock()
+        self.db.owner_cache.clock = self.clock
+        self.queries = 0
+
+        connection = self.db._connection
+
+        def counted():
+            self.queries += 1
+            return connection()
+        self.db._connection = counted
+
+    def tearDown(self):
+        self.db.close()
+        self.tmp.cleanup()
+
+    def test_row_without_owner_stays_known(self):
+        # A row with a NULL owner is a plate of the table, not a miss, so its vehicle type is kept
+        self.db.insert_plates_bulk([("34 ABC 123", None, "truck")])
+        self.db.preload_owner_cache()
+
+        self.clock.now += self.db.owner_cache.negative_ttl + 1
+        self.queries = 0
+        self.assertEqual(self.db.get_owner("34 ABC 123"), (None, "truck"))
+        self.assertEqual(self.queries, 0)
+
+    def test_looked_up_row_without_owner_stays_known(self):
+        self.db.insert_plates_bulk([("34ABC123", None, "truck")])
+        self.db.owner_cache.invalidate()
+        self.assertEqual(self.db.get_owner("34ABC123"), (None, "truck"))
+
+        self.clock.now += self.db.owner_cache.negative_ttl + 1
+        self.queries = 0
+        self.assertEqual(self.db.get_owner("34ABC123"), (None, "truck"))
+        self.assertEqual(self.queries, 0)
+
+    def test_complete_cache_answers_misses_without_query(self):
+        self.db.insert_plates_bulk([("34ABC123", "Alice", "car")])
+        self.db.preload_owner_cache()
+        self.assertTrue(self.db.owner_cache.complete)
+
+        self.queries = 0
+        self.assertEqual(self.db.get_owner("06XYZ99"), (None, None))
+        self.clock.now += self.db.owner_cache.negative_ttl + 1
+        self.assertEqual(self.db.get_owner("06XYZ99"), (None, None))
+        self.assertEqual(self.queries, 0)
+
+    def test_incomplete_cache_looks_up_misses_again_after_negative_ttl(self):
+        self.assertEqual(self.db.get_owner("06XYZ99"), (None, None))
+        self.clock.now += self.db.owner_cache.negative_ttl + 1
+        self.queries = 0
+        self.db.get_owner("06XYZ99")
+        self.assertEqual(self.queries, 1)
+
+    def test_writes_keep_complete_cache_exact(self):
+        self.db.preload_owner_cache()
+        self.db.insert_plate("34ABC123", "Alice", "car")
+        self.db.insert_plates_bulk([("06XYZ99", "Bob", "bus")])
+        self.assertEqual(self.db.get_owner("34ABC123"), ("Alice", "car"))
+        self.assertEqual(self.db.get_owner("06XYZ99"), ("Bob", "bus"))
+
+        plate_id = next(row[0] for row in self.db.get_plates() if row[1] == "34ABC123")
+        self.db.delete_plate(plate_id)
+        self.assertEqual(self.db.get_owner("34ABC123"), (None, None))
+        self.assertTrue(self.db.owner_cache.complete)
+
+    def test_lookup_older_than_a_write_is_not_cached(self):
+        # A lookup that read the table before an insert must not overwrite the inserted owner
+        generation = self.db.owner_cache.generation
+        self.db.insert_plate("34ABC123", "Alice", "car")
+        self.db.owner_cache.fill("34ABC123", None, generation)
+        self.assertEqual(self.db.get_owner("34ABC123"), ("Alice", "car"))
+
+    def test_preload_larger_than_cache_is_not_complete(self):
+        self.db.owner_cache.maxsize = 2
+        self.db.insert_plates_bulk((f"PLATE{i}", f"Owner {i}") for i in range(3))
+        self.assertEqual(self.db.preload_owner_cache(), 2)
+        self.assertFalse(self.db.owner_cache.complete)
+        self.assertEqual(self.db.get_owner("PLATE0"), ("Owner 0", None))
+
+
+if __name__ == "__main__":
+    unittest.main()
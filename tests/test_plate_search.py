@@ -0,0 +1,47 @@
+# Fuzzy plate search: separators and OCR confusions are ignored, in SQL and in Python alike
+#   python -m unittest discover tests
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from DatabaseManager import PLATE_KEY, DatabaseManager, plate_key
+
+
+class PlateSearchTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = DatabaseManager(os.path.join(self.tmp.name, "plates.db"))
+        self.db.insert_plates_bulk([("34 ABC 123", "Ann", "car"), ("06-XY-99", "Bo"), ("34ABD999", "Cy")])
+
+    def tearDown(self):
+        self.db.close()
+        self.tmp.cleanup()
+
+    def plates(self, term):
+        return sorted(row[1] for row in self.db.search_plates(term))
+
+    def test_sql_key_matches_python_key(self):
+        with self.db._connection() as conn:
+            for plate in ("34 ABC 123", "06-XY-99", "b.ab_12/34", "OQIZSGB"):
+                self.assertEqual(conn.execute(f"SELECT {PLATE_KEY} FROM (SELECT ? AS plate)", (plate,)).fetchone()[0],
+                                 plate_key(plate))
+
+    def test_stored_separators_are_ignored(self):
+        self.assertEqual(self.plates("34ABC"), ["34 ABC 123"])
+        self.assertEqual(self.plates("06XY9"), ["06-XY-99"])
+
+    def test_searched_separators_and_confusions_are_ignored(self):
+        self.assertEqual(self.plates("34 A8C"), ["34 ABC 123"])
+        self.assertEqual(self.plates("O6 xy"), ["06-XY-99"])
+        self.assertEqual(self.plates("34AB"), ["34 ABC 123", "34ABD999"])
+
+    def test_paged_search_and_count_agree(self):
+        self.assertEqual(self.db.count_plates(search_term="34 A8C"), 1)
+        self.assertEqual([row[1] for row in self.db.fetch_plates_page(search_term="34-abc")], ["34 ABC 123"])
+
+
+if __name__ == "__main__":
+    unittest.main()
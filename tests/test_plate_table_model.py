@@ -0,0 +1,64 @@
+# PlateTableModel reads pages on demand and keeps only a window of them
+#   python -m unittest discover tests
+import os
+import random
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5.QtCore import QCoreApplication, Qt
+
+from DatabaseManager import DatabaseManager
+from PlateTableModel import PlateTableModel
+
+app = QCoreApplication.instance() or QCoreApplication([])
+
+
+class PlateTableModelTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = DatabaseManager(os.path.join(self.tmp.name, "plates.db"))
+        # Every third owner NULL, so sorting by owner crosses the NULL part of the column
+        self.db.insert_plates_bulk((f"PLATE{i:04d}", None if i % 3 == 0 else f"Owner {i % 7}") for i in range(1000))
+        self.model = PlateTableModel(self.db, page_size=50, max_pages=3)
+
+    def tearDown(self):
+        self.db.close()
+        self.tmp.cleanup()
+
+    def expected(self, column, descending):
+        rows = self.db.get_plates()
+        index = self.db.PLATE_COLUMNS.index(column)
+        # SQLite's order: NULLs first ascending, last descending, ties by id in the same direction
+        key = (lambda row: (row[index] is not None, row[index] or "", row[0]))
+        return sorted(rows, key=key, reverse=descending)
+
+    def test_row_count_covers_the_whole_table(self):
+        self.model.sort(0, Qt.DescendingOrder)
+        self.assertEqual(self.model.rowCount(), 1000)
+        self.assertEqual(len(self.model._pages), 0)
+
+    def test_scrolling_reads_every_row_in_order(self):
+        for column, order in ((0, Qt.DescendingOrder), (2, Qt.AscendingOrder), (2, Qt.DescendingOrder)):
+            self.model.sort(column, order)
+            rows = [self.model.row_data(row) for row in range(self.model.rowCount())]
+            self.assertEqual(rows, self.expected(self.db.PLATE_COLUMNS[column], order == Qt.DescendingOrder))
+            self.assertLessEqual(len(self.model._pages), 3)
+
+    def test_jumps_read_the_same_rows_as_scrolling(self):
+        self.model.sort(2, Qt.DescendingOrder)
+        expected = self.expected("owner", True)
+        for row in random.Random(1).sample(range(1000), 100):
+            self.assertEqual(self.model.row_data(row), expected[row])
+        self.assertLessEqual(len(self.model._pages), 3)
+
+    def test_search_counts_matching_rows(self):
+        self.model.set_search("PLATE099")
+        self.assertEqual(self.model.rowCount(), 10)
+        self.assertEqual(self.model.index(0, 1).data(), "PLATE0999")
+
+
+if __name__ == "__main__":
+    unittest.main()
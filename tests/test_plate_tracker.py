@@ -0,0 +1,78 @@
+# PlateTracker: OCR stops at the read cap, tracks whose reads never agree are settled on their best text
+#   python -m unittest discover tests
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PlateTracker import PlateTracker
+
+BOX = ((100, 100, 220, 130), 0.9)
+
+
+def read(text, conf=0.9):
+    return [(c, conf) for c in text]
+
+
+class PlateTrackerTest(unittest.TestCase):
+    def setUp(self):
+        self.tracker = PlateTracker(max_misses=2, agreement=0.7, min_reads=3, max_ocr_runs=6, settle_agreement=0.4)
+
+    def test_agreeing_reads_commit(self):
+        track, = self.tracker.update([BOX])
+        self.assertFalse(self.tracker.add_reading(track, read("34ABC123")))
+        self.assertFalse(self.tracker.add_reading(track, read("34ABC123")))
+        self.assertTrue(self.tracker.add_reading(track, read("34ABC123")))
+        self.assertEqual(track.text, "34ABC123")
+        self.assertTrue(track.agreed)
+        self.assertFalse(self.tracker.needs_ocr(track))
+
+    def test_read_cap_settles_best_text(self):
+        track, = self.tracker.update([BOX])
+        # Every position agrees except the last, which is split 50/50 and never reaches 0.7
+        results = [self.tracker.add_reading(track, read("34ABC12" + c)) for c in "383838"]
+        self.assertEqual(results, [False] * 5 + [True])
+        self.assertEqual(track.ocr_runs, 6)
+        self.assertIn(track.text, ("34ABC123", "34ABC128"))
+        self.assertFalse(track.agreed)
+        self.assertFalse(self.tracker.needs_ocr(track))
+        self.assertFalse(self.tracker.add_reading(track, read("34ABC123")))
+        self.assertEqual(track.ocr_runs, 6)
+
+    def test_expired_track_is_settled(self):
+        track, = self.tracker.update([BOX])
+        for c in "383":
+            self.tracker.add_reading(track, read("34ABC12" + c))
+        self.assertIsNone(track.text)
+
+        for _ in range(3):
+            self.tracker.update([])
+        self.assertEqual(self.tracker.expired, [track])
+        self.assertEqual(track.text, "34ABC123")
+        self.assertFalse(track.agreed)
+        self.assertEqual(self.tracker.tracks, [])
+
+        self.tracker.update([])
+        self.assertEqual(self.tracker.expired, [])
+
+    def test_track_below_settle_agreement_is_dropped(self):
+        track, = self.tracker.update([BOX])
+        for text in ("34ABC123", "06XYZ991", "BAB12345"):
+            self.tracker.add_reading(track, read(text))
+        for _ in range(3):
+            self.tracker.update([])
+        self.assertEqual(self.tracker.expired, [])
+        self.assertIsNone(track.text)
+
+    def test_track_with_too_few_reads_is_not_settled(self):
+        # A track broken off after a frame or two would mostly report a vehicle its successor reports as well
+        track, = self.tracker.update([BOX])
+        self.tracker.add_reading(track, read("34ABC123"))
+        for _ in range(3):
+            self.tracker.update([])
+        self.assertEqual(self.tracker.expired, [])
+
+
+if __name__ == "__main__":
+    unittest.main()